@@ -2,6 +2,9 @@ import requests
 import json
 import inspect
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,49 +26,72 @@ queryParams = {
     "returnFieldsByFieldId": "false"
 }
 
-def DBAIRTABLEFetchData(credentials, databaseName, tableName, queryParams=None):
-    try:
-        access_token = credentials.get("access_token")  # Airtable PAT
-        url = f"https://api.airtable.com/v0/{databaseName}/{tableName}"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
+# Airtable allows 5 requests/second per base
+RATE_LIMIT_PER_BASE = 5
+_buckets = {}
+_buckets_lock = threading.Lock()
 
-        all_records = []
-        offset = None
+def _acquire(databaseName):
+    """Token bucket per base: blocks until a request to this base is allowed."""
+    with _buckets_lock:
+        bucket = _buckets.setdefault(databaseName, {"tokens": RATE_LIMIT_PER_BASE, "updated": time.monotonic(), "lock": threading.Lock()})
+    while True:
+        with bucket["lock"]:
+            now = time.monotonic()
+            bucket["tokens"] = min(RATE_LIMIT_PER_BASE, bucket["tokens"] + (now - bucket["updated"]) * RATE_LIMIT_PER_BASE)
+            bucket["updated"] = now
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return
+            wait = (1 - bucket["tokens"]) / RATE_LIMIT_PER_BASE
+        time.sleep(wait)
 
-        while True:
-            # Flatten Airtable query params (especially fields[] and sort[])
-            params = []
-            if queryParams:
-                for key, value in queryParams.items():
-                    if isinstance(value, list):
-                        for item in value:
-                            params.append((key, item))
-                    elif value is not None:
-                        params.append((key, value))
+def DBAIRTABLEStreamData(credentials, databaseName, tableName, queryParams=None):
+    """
+    Generator yielding formatted records (fields + id) page by page.
+    The next page is requested while the caller is still processing the current one.
+    """
+    access_token = credentials.get("access_token")  # Airtable PAT
+    url = f"https://api.airtable.com/v0/{databaseName}/{tableName}"
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
 
-            if offset:
-                params.append(("offset", offset))
+    # Flatten Airtable query params (especially fields[] and sort[])
+    params = []
+    if queryParams:
+        for key, value in queryParams.items():
+            if isinstance(value, list):
+                for item in value:
+                    params.append((key, item))
+            elif value is not None:
+                params.append((key, value))
 
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
+    session = requests.Session()
 
-            data = response.json()
-            records = data.get("records", [])
-            all_records.extend(records)
+    def fetchPage(offset):
+        _acquire(databaseName)
+        response = session.get(url, headers=headers, params=params + ([("offset", offset)] if offset else []))
+        response.raise_for_status()
+        return response.json()
+
+    with session, ThreadPoolExecutor(max_workers=1) as prefetcher:
+        page = prefetcher.submit(fetchPage, None)
+        while page is not None:
+            data = page.result()
 
             offset = data.get("offset")
-            if not offset:
-                break
+            page = prefetcher.submit(fetchPage, offset) if offset else None
 
-        formatted_data = []
-        for record in all_records:
-            fields = record.get("fields", {})
-            fields["id"] = record.get("id")
-            formatted_data.append(fields)
+            for record in data.get("records", []):
+                fields = record.get("fields", {})
+                fields["id"] = record.get("id")
+                yield fields
 
+def DBAIRTABLEFetchData(credentials, databaseName, tableName, queryParams=None):
+    try:
+        formatted_data = list(DBAIRTABLEStreamData(credentials, databaseName, tableName, queryParams))
         return json.dumps(formatted_data, default=str)
 
     except Exception as e:
@@ -1,9 +1,14 @@
 import getpass
 import json
-import pyodbc
+import os
+from mssql_common import SESSION_STATE, catalog_version, get_catalog, get_pool, lookup_name, quote_name
 # from sqlalchemy import create_engine
 # import pymssql
 
+# Rows pulled per fetchmany() call when streaming a table
+FETCH_BATCH_SIZE = int(os.getenv("MsSQLfetchBatchSize", 1000))
+
+
 class MSSQLConnector:
     def __init__(self, server='localhost', user='sa', password=None, database=None):
         self.server = server
@@ -11,8 +16,17 @@ class MSSQLConnector:
         self.database = database
         self.password = password or getpass.getpass(prompt='Enter MSSQL password: ')
         self.conn = None
+        self._pool = None
+        self._context_changed = False
+        self._schema_version = None
         self.connect()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     # def get_engine(username, password, server, database):                                     DRIVERLESS ATTEMPT 1
     #     connection_string = f"mssql+pytds://{username}:{password}@{server}/{database}"
     #     engine = create_engine(connection_string)
@@ -28,7 +42,9 @@ class MSSQLConnector:
             )
             if self.database:
                 conn_str += f'DATABASE={self.database};'
-            self.conn = pyodbc.connect(conn_str)
+            # Borrow a ready connection for this database; close() gives it back
+            self._pool = get_pool(conn_str)
+            self.conn, reused = self._pool.acquire()
             self.cursor = self.conn.cursor()
             # # DRIVERLESS ATTEMPT 1
             # connection_string = f"mssql://{self.user}:{self.password}@{self.server}/{self.database or ''}"   
@@ -37,9 +53,16 @@ class MSSQLConnector:
             # # DRIVERLESS ATTEMPT 2
             # self.conn = pymssql.connect(self.server, self.user, self.password, self.database)
             # self.cursor = self.conn.cursor()
-            print(f"[✓] Connected to {self.database or 'server'} as {self.user}")
+            if not reused:
+                print(f"[✓] Connected to {self.database or 'server'} as {self.user}")
         except Exception as e:
+            # Give the pool slot back, or every failure here leaks one until the pool is exhausted
+            if self.conn is not None:
+                self._pool.discard(self.conn)
+            self.conn = None
+            self.cursor = None
             print(f"[!] Connection failed: {e}")
+            raise RuntimeError(f"[!] Connection failed: {e} server: {self.server}, user: {self.user}, database: {self.database}")
 
     # Fetching method 1 - gives result as lists -  can test using testConnection.py
     def _fetch_databases(self):
@@ -111,8 +134,7 @@ class MSSQLConnector:
 
     def fetch_tables(self):
         try:
-            self.cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'")
-            tables = [row[0] for row in self.cursor.fetchall()]
+            tables = [entry["name"] for entry in self.catalog().values()]
             return {
                 "success": True,
                 "message": "retrieved mssql table names",
@@ -124,15 +146,8 @@ class MSSQLConnector:
 
     def fetch_columns(self):
         try:
-            self.cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'")
-            tables = [row[0] for row in self.cursor.fetchall()]
-
-            columns_dict = {}
-            for table in tables:
-                self.cursor.execute("SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ?", table)
-                columns = [col[0] for col in self.cursor.fetchall()]
-                columns_dict[table] = columns
-
+            catalog = self.catalog()
+            columns_dict = {table: [col["name"] for col in entry["columns"]] for table, entry in catalog.items()}
             return {
                 "success": True,
                 "message": "retrieved mssql column names",
@@ -142,6 +157,18 @@ class MSSQLConnector:
         except Exception as e:
             return self._error_response("fetch_columns", e)
 
+    def fetch_columns_detail(self):
+        """Columns with types, nullability, keys and row estimates for every table."""
+        try:
+            return {
+                "success": True,
+                "message": "retrieved mssql catalog",
+                "data": self.catalog(),
+                "statusCode": 200
+            }
+        except Exception as e:
+            return self._error_response("fetch_columns_detail", e)
+
     def fetch_data(self, tableName):
         try:
             self.cursor.execute(f"SELECT * FROM {tableName}")
@@ -156,6 +183,82 @@ class MSSQLConnector:
         except Exception as e:
             return self._error_response("fetch_data", e)
 
+    def schema_version(self):
+        """DDL fingerprint of this database, read once per connector use."""
+        if self._schema_version is None:
+            self._schema_version = catalog_version(self.cursor)
+        return self._schema_version
+
+    def catalog(self):
+        """Cached catalog of this database (see get_catalog)."""
+        return get_catalog(self.cursor, self.server, self.database, self.schema_version())
+
+    def describe_table(self, table):
+        """Catalog entry of table ("name" or "schema.name", case-insensitive); ValueError if unknown."""
+        catalog = self.catalog()
+        tables = {}
+        for key, entry in catalog.items():
+            tables[key.lower()] = entry
+            tables.setdefault(f"{entry['schema']}.{entry['name']}".lower(), entry)
+        return lookup_name(tables, table, "table")
+
+    def build_select(self, table, columns=None, after=None, limit=None):
+        """
+        SELECT for table, optionally projected to columns. Passing after
+        (primary key values of the last row already read) or limit pages
+        through the table in primary key order.
+        Names are checked against the catalog before being quoted into the
+        statement. Returns (query, params, key_columns) and raises ValueError
+        for unknown names or a table without a primary key.
+        """
+        entry = self.describe_table(table)
+        names = {col["name"].lower(): col["name"] for col in entry["columns"]}
+        selected = [lookup_name(names, col, "column") for col in columns] if columns else None
+
+        key_columns = []
+        paged = bool(after) or limit is not None
+        if paged:
+            keys = sorted((col for col in entry["columns"] if col["primaryKey"]), key=lambda col: col["keyOrdinal"])
+            key_columns = [col["name"] for col in keys]
+            if not key_columns:
+                raise ValueError(f"Table {table} has no primary key to page on")
+            if after and len(after) != len(key_columns):
+                raise ValueError(f"after needs one value per primary key column: {', '.join(key_columns)}")
+            # The next page starts from the key of the last row, so keys are always selected
+            if selected:
+                selected += [name for name in key_columns if name not in selected]
+
+        query = "SELECT "
+        params = []
+        if limit is not None:
+            query += "TOP (?) "
+            params.append(int(limit))
+        query += ", ".join(quote_name(name) for name in selected) if selected else "*"
+        query += f" FROM {quote_name(entry['schema'])}.{quote_name(entry['name'])}"
+        if after:
+            # (k1, k2) > (v1, v2) spelled out, which SQL Server can still seek on
+            clauses = []
+            for i, name in enumerate(key_columns):
+                equal = [f"{quote_name(prev)} = ?" for prev in key_columns[:i]]
+                clauses.append("(" + " AND ".join(equal + [f"{quote_name(name)} > ?"]) + ")")
+                params.extend(list(after[:i]) + [after[i]])
+            query += " WHERE " + " OR ".join(clauses)
+        if paged:
+            query += " ORDER BY " + ", ".join(quote_name(name) for name in key_columns)
+        return query, params, key_columns
+
+    def stream_data(self, query, params=(), batch_size=FETCH_BATCH_SIZE):
+        """Yield the rows of query as dicts, holding one fetchmany() batch at a time."""
+        self.cursor.arraysize = batch_size
+        self.cursor.execute(query, *params)
+        columns = [col[0] for col in self.cursor.description]
+        while True:
+            rows = self.cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+
     def _error_response(self, func_name, exception):
         return {
             "success": False,
@@ -171,24 +274,20 @@ class MSSQLConnector:
         self.cursor.execute(query)
         return [row[0] for row in self.cursor.fetchall()]
     
+    def _table_columns(self, table):
+        try:
+            return self.describe_table(table)["columns"]
+        except ValueError:
+            return []
+
     def fetch_column(self, table):
-        query = f"""
-            SELECT COLUMN_NAME
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_NAME = ?
-        """
-        self.cursor.execute(query, (table,))
-        columns = [row[0] for row in self.cursor.fetchall()]
-        return {"columns": columns}
-    
+        return {"columns": [col["name"] for col in self._table_columns(table)]}
+
     def fetch_table_schema(self, table):
-        query = f"""
-        SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_NAME = '{table}'
-        """
-        self.cursor.execute(query)
-        return [dict(zip(['column_name', 'data_type', 'is_nullable'], row)) for row in self.cursor.fetchall()]
+        return [
+            {"column_name": col["name"], "data_type": col["dataType"], "is_nullable": "YES" if col["nullable"] else "NO"}
+            for col in self._table_columns(table)
+        ]
 
     def fetch_preview_data(self, table, limit=5):
         query = f"SELECT TOP {limit} * FROM [{table}]"
@@ -198,6 +297,11 @@ class MSSQLConnector:
         return [dict(zip(columns, row)) for row in rows]
     
     def run_custom_query(self, query):
+        # USE, SET and #temp tables outlive the request, so such a connection isn't reused
+        if SESSION_STATE.search(query):
+            self._context_changed = True
+        # The query may be DDL, so the fingerprint is read again on next use
+        self._schema_version = None
         cursor = self.conn.cursor()
         cursor.execute(query)
         columns = [col[0] for col in cursor.description]
@@ -206,7 +310,15 @@ class MSSQLConnector:
         return [dict(zip(columns, row)) for row in rows]
 
     def close(self):
+        """Return the connection to its pool (or close it if the session state may have changed)."""
         if self.conn:
-            self.cursor.close()
-            self.conn.close()
-            print("[✓] Connection closed.")
\ No newline at end of file
+            try:
+                self.cursor.close()
+            except Exception:
+                pass
+            if self._context_changed:
+                self._pool.discard(self.conn)
+            else:
+                self._pool.release(self.conn)
+            self.conn = None
+            self.cursor = None
\ No newline at end of file
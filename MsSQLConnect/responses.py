@@ -0,0 +1,73 @@
+"""
+Flask response helpers shared by the MSSQL services: ETag revalidation and
+streamed JSON / NDJSON bodies.
+
+MsSQLinDocker/app holds the source copy; MsSQLConnect keeps an identical
+mirror. Edit this file there, then run `python MsSQLConnect/sync_shared.py`
+(add --check to only report drift).
+"""
+import hashlib
+import json
+
+from flask import Response, jsonify, request
+
+from mssqlConnector import FETCH_BATCH_SIZE
+
+
+def revalidated(key, build):
+    """
+    JSON response from build() with an ETag derived from key (e.g. the database's
+    DDL fingerprint) and the request URL. A matching If-None-Match gets a 304
+    without build() being called.
+    """
+    etag = hashlib.sha1(repr((key, request.full_path)).encode("utf-8")).hexdigest()
+    response = Response(status=304) if request.if_none_match.contains(etag) else jsonify(build())
+    response.set_etag(etag)
+    # Clients keep the body but revalidate on every poll
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def chunked(pieces, size=FETCH_BATCH_SIZE):
+    """Join serialized rows into one write per batch instead of one per row."""
+    buffer = []
+    try:
+        for piece in pieces:
+            buffer.append(piece)
+            if len(buffer) >= size:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        pieces.close()
+
+
+def ndjson_rows(rows):
+    try:
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+    except Exception as e:
+        # Headers are already sent, so a failure is reported as the last line
+        yield json.dumps({"success": False, "message": "could not perform fetch_data", "log": str(e)}) + "\n"
+
+
+def json_rows(rows, key_columns, limit):
+    """
+    {"data": [...], "next": [...], "success": ...} written row by row. The
+    outcome comes after the rows, and "next" holds the after= values for the
+    following page when a full page was returned.
+    """
+    count = 0
+    last = None
+    yield '{"data": ['
+    try:
+        for row in rows:
+            yield ("," if count else "") + json.dumps(row, default=str)
+            count += 1
+            last = row
+        outcome = {"success": True, "message": "retrieved mssql data", "statusCode": 200}
+    except Exception as e:
+        outcome = {"success": False, "message": "could not perform fetch_data", "log": str(e), "statusCode": 400}
+    next_after = [last[name] for name in key_columns] if limit and count == limit else None
+    yield '], "next": ' + json.dumps(next_after, default=str) + ", " + json.dumps(outcome)[1:]
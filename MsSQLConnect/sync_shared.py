@@ -0,0 +1,40 @@
+"""
+Copies the modules shared with the Docker service from MsSQLinDocker/app into
+this folder. They must stay identical, so edit them there and run:
+
+    python MsSQLConnect/sync_shared.py           # copy
+    python MsSQLConnect/sync_shared.py --check   # exit 1 if a copy has drifted
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+SHARED = ("mssql_common.py", "responses.py")
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(HERE, "..", "MsSQLinDocker", "app")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the MSSQL modules shared with MsSQLinDocker/app.")
+    parser.add_argument("--check", action="store_true", help="only report copies that differ")
+    args = parser.parse_args()
+
+    drifted = []
+    for name in SHARED:
+        source, mirror = os.path.join(SOURCE, name), os.path.join(HERE, name)
+        if os.path.exists(mirror) and filecmp.cmp(source, mirror, shallow=False):
+            continue
+        if args.check:
+            drifted.append(name)
+        else:
+            shutil.copyfile(source, mirror)
+            print(f"[✓] Copied {name}")
+    if drifted:
+        print(f"[!] Out of sync with MsSQLinDocker/app: {', '.join(drifted)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Bulk loading of CSV and Parquet files into SQL Server tables.
+
+Files are read in batches and inserted with pyodbc's fast_executemany, which
+sends a whole parameter array per round trip instead of one INSERT per row.
+Values are converted to the column types from the catalog so every batch
+binds the same parameter types, and the load commits every commit_every rows.
+
+    python bulk_load.py --db SCAI --table devops_metrics devops.csv
+    python bulk_load.py --db SCAI --table devops_metrics --columns metric_date,total_builds,... devops.csv
+"""
+import argparse
+import csv
+import datetime
+import os
+import time
+from decimal import Decimal
+
+import pyodbc
+
+from mssqlConnector import MSSQLConnector, quote_name
+
+BATCH_SIZE = int(os.getenv("MsSQLbulkBatchSize", 5000))        # rows per executemany call
+COMMIT_EVERY = int(os.getenv("MsSQLbulkCommitEvery", 50000))   # rows per transaction
+
+
+def _parse_bit(value):
+    return value.strip().lower() in ("1", "true", "t", "yes", "y")
+
+
+_CONVERTERS = {
+    "tinyint": int, "smallint": int, "int": int, "bigint": int,
+    "bit": _parse_bit,
+    "decimal": Decimal, "numeric": Decimal, "money": Decimal, "smallmoney": Decimal,
+    "float": float, "real": float,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "datetime": datetime.datetime.fromisoformat,
+    "datetime2": datetime.datetime.fromisoformat,
+    "smalldatetime": datetime.datetime.fromisoformat,
+}
+
+
+def _input_size(column):
+    """Parameter size for fast_executemany; bounded strings and decimals need one to avoid re-binding."""
+    data_type, length = column["dataType"], column["maxLength"]
+    if data_type in ("nvarchar", "nchar") and length > 0:
+        return (pyodbc.SQL_WVARCHAR, length // 2, 0)
+    if data_type in ("varchar", "char") and length > 0:
+        return (pyodbc.SQL_VARCHAR, length, 0)
+    if data_type in ("decimal", "numeric"):
+        return (pyodbc.SQL_DECIMAL, column["precision"], column["scale"])
+    return None
+
+
+def _row_converter(columns):
+    """Converts a row of file values to column types; empty strings become NULL."""
+    converters = [_CONVERTERS.get(col["dataType"]) for col in columns]
+
+    def convert(row):
+        values = []
+        for converter, value in zip(converters, row):
+            if isinstance(value, str):
+                if value == "":
+                    value = None
+                elif converter is not None:
+                    value = converter(value)
+            values.append(value)
+        # Short rows are padded with NULLs (TRAILING NULLCOLS)
+        values.extend([None] * (len(converters) - len(values)))
+        return values
+    return convert
+
+
+def read_csv(source, columns=None, batch_size=BATCH_SIZE, delimiter=","):
+    """
+    (header, batches) of a CSV path or text stream. The header is the first
+    line unless columns are given for a file without one.
+    """
+    handle = open(source, newline="", encoding="utf-8-sig") if isinstance(source, str) else source
+    reader = csv.reader(handle, delimiter=delimiter)
+    header = list(columns) if columns else next(reader, [])
+
+    def batches():
+        try:
+            batch = []
+            for row in reader:
+                if not row:
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            if handle is not source:
+                handle.close()
+    return header, batches()
+
+
+def read_parquet(source, columns=None, batch_size=BATCH_SIZE):
+    """(header, batches) of a Parquet path or seekable binary stream."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("pyarrow is required to load Parquet files (pip install pyarrow)")
+    parquet = pq.ParquetFile(source)
+    header = list(columns) if columns else parquet.schema_arrow.names
+
+    def batches():
+        for record_batch in parquet.iter_batches(batch_size=batch_size, columns=header):
+            yield list(zip(*(column.to_pylist() for column in record_batch.columns)))
+    return header, batches()
+
+
+def bulk_insert(connector, table, header, batches, commit_every=COMMIT_EVERY, progress=None):
+    """
+    Insert batches of rows (in header column order) into table through an open
+    MSSQLConnector. Returns {"rows", "seconds", "rowsPerSecond"}; progress, if
+    given, is called with the running totals after every intermediate commit.
+    """
+    entry = connector.describe_table(table)
+    by_name = {col["name"].lower(): col for col in entry["columns"]}
+    header = [name.strip() for name in header]
+    unknown = [name for name in header if name.lower() not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {table}: {', '.join(unknown)}")
+    columns = [by_name[name.lower()] for name in header]
+
+    query = (
+        f"INSERT INTO {quote_name(entry['schema'])}.{quote_name(entry['name'])} "
+        f"({', '.join(quote_name(col['name']) for col in columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+    convert = _row_converter(columns)
+    cursor = connector.conn.cursor()
+    cursor.fast_executemany = True
+    sizes = [_input_size(col) for col in columns]
+    if any(sizes):
+        cursor.setinputsizes(sizes)
+
+    started = time.perf_counter()
+    stats = {"rows": 0, "seconds": 0.0, "rowsPerSecond": 0.0}
+    pending = 0
+    try:
+        for batch in batches:
+            cursor.executemany(query, [convert(row) for row in batch])
+            stats["rows"] += len(batch)
+            pending += len(batch)
+            if pending >= commit_every:
+                connector.conn.commit()
+                pending = 0
+                _update(stats, started)
+                if progress:
+                    progress(stats)
+        connector.conn.commit()
+    except Exception:
+        connector.conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    _update(stats, started)
+    return stats
+
+
+def _update(stats, started):
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rowsPerSecond"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+
+
+def read_file(path, columns=None, batch_size=BATCH_SIZE):
+    """Reader for path by extension (.parquet / .pq, otherwise CSV)."""
+    if path.lower().endswith((".parquet", ".pq")):
+        return read_parquet(path, columns, batch_size)
+    return read_csv(path, columns, batch_size)
+
+
+def print_progress(stats):
+    print(f"[+] {stats['rows']} rows in {stats['seconds']}s ({stats['rowsPerSecond']} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load a CSV or Parquet file into a SQL Server table.")
+    parser.add_argument("path")
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--db", default=os.getenv("MsSQLdb"))
+    parser.add_argument("--columns", help="comma separated target columns, for CSV files without a header")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY)
+    args = parser.parse_args()
+
+    columns = args.columns.split(",") if args.columns else None
+    header, batches = read_file(args.path, columns, args.batch_size)
+    with MSSQLConnector(database=args.db) as connector:
+        stats = bulk_insert(connector, args.table, header, batches, args.commit_every, print_progress)
+    print(f"[✓] Loaded {stats['rows']} rows into {args.table} in {stats['seconds']}s ({stats['rowsPerSecond']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,4 +35,25 @@ INSERT INTO Users (name, email, role, experience_years, skills) VALUES
 ('Charlie', 'charlie@example.com', 'DevOps Engineer', 5, 'Docker, Kubernetes, Azure'),
 ('Grace', 'grace@example.com', 'Full Stack Developer', 3, 'React, Node.js, Firebase'),
 ('Neo', 'neo@matrix.io', 'AI Researcher', 10, 'C++, PyTorch, Reality Bending');
-GO
\ No newline at end of file
+GO
+
+-- DevOps metrics (devops.ctl layout); rows are bulk loaded from seed/devops_metrics.csv when present
+IF OBJECT_ID('devops_metrics', 'U') IS NOT NULL
+    DROP TABLE devops_metrics;
+GO
+
+CREATE TABLE devops_metrics (
+    id INT PRIMARY KEY IDENTITY(1,1),
+    metric_date DATE,
+    total_builds INT,
+    successful_builds INT,
+    failed_tests INT,
+    deployments INT,
+    mttr_mins INT,
+    active_builds INT,
+    code_coverage_pct FLOAT,
+    commits INT,
+    open_prs INT,
+    rollback_events INT
+);
+GO
@@ -1,6 +1,6 @@
 import time
-import pyodbc
 import os
+import re
 
 server = os.getenv("MsSQLserver", "localhost")
 user = os.getenv("MsSQLuser", "sa")
@@ -8,11 +8,16 @@ password = os.getenv("MsSQLpassword", "")
 database = "master"  # start with master, we'll create SCAI
 
 init_sql_path = "/app/init.sql"  # make sure you copy this in Dockerfile
+# <table>.csv / <table>.parquet files here are bulk loaded into seed_database after init.sql
+seed_dir = os.getenv("MsSQLseedDir", "/app/seed")
+seed_database = os.getenv("MsSQLdb", "SCAI")
 
 # Connection string
 conn_str = f"DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={server};UID={user};PWD={password};TrustServerCertificate=yes"
 
 def wait_for_db(timeout=60):
+    # Imported on use, so split_batches can be loaded without the ODBC driver
+    import pyodbc
     for _ in range(timeout):
         try:
             conn = pyodbc.connect(conn_str, timeout=5)
@@ -24,21 +29,102 @@ def wait_for_db(timeout=60):
             time.sleep(1)
     return False
 
+# GO on a line of its own, optionally with a repeat count and a trailing comment (as sqlcmd accepts it)
+_GO = re.compile(r"^\s*GO(?:\s+(\d+))?\s*(?:--.*)?$", re.I)
+
+
+def _scan(line, closing, depth):
+    """
+    Carry the lexer state across one line: closing is the character that ends an
+    open string literal or quoted identifier, depth the block comment nesting.
+    """
+    i = 0
+    while i < len(line):
+        two = line[i:i + 2]
+        if depth:
+            if two in ("/*", "*/"):
+                depth += 1 if two == "/*" else -1
+                i += 2
+            else:
+                i += 1
+        elif closing:
+            if line[i] == closing:
+                if line[i + 1:i + 2] == closing:  # '' ]] "" escapes
+                    i += 2
+                    continue
+                closing = None
+            i += 1
+        elif two == "--":
+            break
+        elif two == "/*":
+            depth = 1
+            i += 2
+        else:
+            if line[i] in ("'", '"'):
+                closing = line[i]
+            elif line[i] == "[":
+                closing = "]"
+            i += 1
+    return closing, depth
+
+
+def split_batches(script):
+    """
+    Split a T-SQL script into batches the way sqlcmd does: on GO lines that are
+    not inside a string literal, quoted identifier or block comment.
+    """
+    batches = []
+    current = []
+    closing, depth = None, 0
+    for line in script.splitlines():
+        match = _GO.match(line) if closing is None and not depth else None
+        if match:
+            batch = "\n".join(current).strip()
+            if batch:
+                batches.extend([batch] * int(match.group(1) or 1))
+            current = []
+            continue
+        current.append(line)
+        closing, depth = _scan(line, closing, depth)
+    batch = "\n".join(current).strip()
+    if batch:
+        batches.append(batch)
+    return batches
+
+
 def run_init_sql():
+    import pyodbc
     print("[+] Running init.sql...")
     with open(init_sql_path, "r") as file:
         sql_script = file.read()
 
     with pyodbc.connect(conn_str, autocommit=True) as conn:
         cursor = conn.cursor()
-        for stmt in sql_script.split("GO"):
-            stmt = stmt.strip()
-            if stmt:
-                cursor.execute(stmt)
+        for stmt in split_batches(sql_script):
+            cursor.execute(stmt)
         print("[+] init.sql executed successfully.")
 
+
+def load_seed_data():
+    if not os.path.isdir(seed_dir):
+        return
+    # Imported here so init.sql still runs if the app modules can't be loaded
+    from bulk_load import bulk_insert, print_progress, read_file
+    from mssqlConnector import MSSQLConnector
+
+    for name in sorted(os.listdir(seed_dir)):
+        table, ext = os.path.splitext(name)
+        if ext.lower() not in (".csv", ".parquet", ".pq"):
+            continue
+        print(f"[+] Loading {name} into {seed_database}.{table}...")
+        header, batches = read_file(os.path.join(seed_dir, name))
+        with MSSQLConnector(password=password, database=seed_database) as conn:
+            stats = bulk_insert(conn, table, header, batches, progress=print_progress)
+        print(f"[+] {stats['rows']} rows in {stats['seconds']}s ({stats['rowsPerSecond']} rows/s)")
+
 if __name__ == "__main__":
     if wait_for_db():
         run_init_sql()
+        load_seed_data()
     else:
         print("[!] SQL Server did not become ready in time.")
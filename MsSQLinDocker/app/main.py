@@ -1,17 +1,22 @@
+import io
 import os
-from flask import Flask, request, jsonify
+import shutil
+import tempfile
+from flask import Flask, Response, request, jsonify
 from mssqlConnector import MSSQLConnector  # import your class
+from responses import chunked, json_rows, ndjson_rows, revalidated
+from bulk_load import bulk_insert, read_csv, read_parquet
 
 app = Flask(__name__)
 password = os.environ.get("MsSQLPsswd", "")
 db = os.environ.get("MsSQLdb", "")
 
+
 @app.route("/fetch-databases", methods=["GET"])
 def fetch_databases():
     try:
-        conn = MSSQLConnector(password=password)
-        result = conn.fetch_databases()
-        conn.close()
+        with MSSQLConnector(password=password) as conn:
+            result = conn.fetch_databases()
         return jsonify(result)
     except Exception as e:
         print("Error in /fetch-databases:", e)
@@ -23,9 +28,8 @@ def fetch_tables():
     if not db:
         return jsonify({"error": "Missing database"}), 400
 
-    conn = MSSQLConnector(password=password, database=db)
-    result = conn.fetch_tables()
-    conn.close()
+    with MSSQLConnector(password=password, database=db) as conn:
+        result = conn.fetch_tables()
     return jsonify(result)
 
 @app.route("/fetch-columns", methods=["GET"])
@@ -34,9 +38,10 @@ def fetch_columns():
     if not db:
         return jsonify({"error": "Missing database"}), 400
 
-    conn = MSSQLConnector(password=password, database=db)
-    result = conn.fetch_columns()
-    conn.close()
+    # ?detail=true adds types, nullability, keys and row estimates per column
+    detail = request.args.get("detail", "").lower() in ("1", "true", "yes")
+    with MSSQLConnector(password=password, database=db) as conn:
+        result = conn.fetch_columns_detail() if detail else conn.fetch_columns()
     return jsonify(result)
 
 @app.route("/fetch-data", methods=["GET"])
@@ -46,17 +51,73 @@ def fetch_data():
     if not db or not table:
         return jsonify({"error": "Missing db or table"}), 400
 
+    # format=json|ndjson streams the table instead of building it in memory
+    fmt = request.args.get("format")
+    if not fmt:
+        with MSSQLConnector(password=password, database=db) as conn:
+            result = conn.fetch_data(table)
+        return jsonify(result)
+    if fmt not in ("json", "ndjson"):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+
+    columns = [col.strip() for col in request.args.get("columns", "").split(",") if col.strip()]
+    after = request.args.getlist("after")
+    limit = request.args.get("limit", type=int)
+    # The connection is handed to the response and released when it is closed
     conn = MSSQLConnector(password=password, database=db)
-    result = conn.fetch_data(table)
-    conn.close()
-    return jsonify(result)
+    try:
+        query, params, key_columns = conn.build_select(table, columns, after, limit)
+    except Exception as e:
+        conn.close()
+        return jsonify({"error": str(e)}), 400
+    rows = conn.stream_data(query, params)
+    if fmt == "ndjson":
+        response = Response(chunked(ndjson_rows(rows)), mimetype="application/x-ndjson")
+    else:
+        response = Response(chunked(json_rows(rows, key_columns, limit)), mimetype="application/json")
+    # Runs even if the body is never iterated (HEAD, client gone before the first chunk)
+    response.call_on_close(conn.close)
+    return response
+
+@app.route("/bulk-load", methods=["POST"])
+def bulk_load():
+    """Load the request body (CSV, or Parquet with format=parquet) into db.table."""
+    db = request.args.get("db")
+    table = request.args.get("table")
+    if not db or not table:
+        return jsonify({"error": "Missing db or table"}), 400
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "parquet"):
+        return jsonify({"error": "format must be csv or parquet"}), 400
+    columns = [col.strip() for col in request.args.get("columns", "").split(",") if col.strip()] or None
+
+    try:
+        with tempfile.TemporaryFile() as spool:
+            if fmt == "csv":
+                # Parsed straight off the request stream, one batch at a time
+                header, batches = read_csv(io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline=""), columns)
+            else:
+                # Parquet keeps its footer at the end, so the body is spooled to disk first
+                shutil.copyfileobj(request.stream, spool)
+                spool.seek(0)
+                header, batches = read_parquet(spool, columns)
+            with MSSQLConnector(password=password, database=db) as conn:
+                stats = bulk_insert(conn, table, header, batches)
+    except Exception as e:
+        print("Error in /bulk-load:", e)
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "message": f"loaded {stats['rows']} rows into {table}",
+        "data": stats,
+        "statusCode": 200
+    })
 
 @app.route("/api/data/<dbname>/<tablename>/<columnname>", methods=["GET"])
 def get_column_data(dbname, tablename, columnname):
     
-    conn = MSSQLConnector(password=password, database=dbname)
-    result = conn.fetch_column_data(tablename, columnname)
-    conn.close()
+    with MSSQLConnector(password=password, database=dbname) as conn:
+        result = conn.fetch_column_data(tablename, columnname)
     return jsonify(result)
 
 @app.route("/Schema/<tablename>", methods=["GET"])
@@ -65,33 +126,26 @@ def get_schema(tablename):
     if not db:
         return jsonify({"error": "Missing database"}), 400
 
-    conn = MSSQLConnector(password=password, database=db)
-    result = conn.fetch_table_schema(tablename)
-    conn.close()
-    return jsonify(result)
+    with MSSQLConnector(password=password, database=db) as conn:
+        return revalidated(conn.schema_version(), lambda: conn.fetch_table_schema(tablename))
 
 @app.route("/listtable/<dbname>", methods=["GET"])
 def list_tables(dbname):
     
-    conn = MSSQLConnector(password=password, database=dbname)
-    result = conn.fetch_tables()
-    conn.close()
-    return jsonify(result)
+    with MSSQLConnector(password=password, database=dbname) as conn:
+        return revalidated(conn.schema_version(), conn.fetch_tables)
 
 @app.route("/listcolumns/<dbname>/<tablename>", methods=["GET"])
 def list_columns(dbname, tablename):
     
-    conn = MSSQLConnector(password=password, database=dbname)
-    result = conn.fetch_column(tablename)
-    conn.close()
-    return jsonify(result)
+    with MSSQLConnector(password=password, database=dbname) as conn:
+        return revalidated(conn.schema_version(), lambda: conn.fetch_column(tablename))
 
 @app.route("/Previewdata/<dbname>/<tablename>", methods=["GET"])
 def preview_table(dbname, tablename):
     
-    conn = MSSQLConnector(password=password, database=dbname)
-    result = conn.fetch_preview_data(tablename)
-    conn.close()
+    with MSSQLConnector(password=password, database=dbname) as conn:
+        result = conn.fetch_preview_data(tablename)
     return jsonify(result)
 
 @app.route("/query", methods=["GET"])
@@ -107,20 +161,30 @@ def run_query():
         query = f"{query} FROM {table}"
     
     try:
-        conn = MSSQLConnector(password=password, database=db)
-        result = conn.run_custom_query(query)  # Implement in MSSQLConnector
-        conn.close()
+        with MSSQLConnector(password=password, database=db) as conn:
+            result = conn.run_custom_query(query)  # Implement in MSSQLConnector
         return jsonify(result)
     except Exception as e:
         print("Error in /query:", e)
         return jsonify({"error": str(e)}), 500
 
+# /metadata body; @@VERSION only changes with a server upgrade (and an app restart)
+_metadata = None
+
+
 @app.route("/metadata", methods=["GET"])
 def get_metadata():
-    conn = MSSQLConnector(password=password, database=db)
-    return jsonify({
+    global _metadata
+    if _metadata is None:
+        with MSSQLConnector(password=password, database=db) as conn:
+            _metadata = _describe_service(conn.fetch_version())
+    return revalidated(_metadata["version"], lambda: _metadata)
+
+
+def _describe_service(version):
+    return {
         "description": "Microsoft SQL Server connection using pyodbc.",
-        "version": f"{conn.fetch_version()}",
+        "version": f"{version}",
         "required_credentials": ["server", "port", "user", "password", "database"],
         "required_parameters": ["db", "table", "query"],
         "query_type": "SQL",
@@ -134,7 +198,7 @@ def get_metadata():
             "Encrypt=yes;"
             "TrustServerCertificate=yes;"
         )
-    })
+    }
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+Connection pool and catalog cache shared by the MSSQL services.
+
+MsSQLinDocker/app holds the source copy; MsSQLConnect keeps an identical
+mirror. Edit this file there, then run `python MsSQLConnect/sync_shared.py`
+(add --check to only report drift).
+"""
+import atexit
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+
+import pyodbc
+
+# Connections kept ready per connection string (i.e. per database), so a request
+# doesn't pay for TLS + login. Tunable through the environment.
+POOL_SIZE = int(os.getenv("MsSQLpoolSize", 5))
+POOL_IDLE_TIMEOUT = float(os.getenv("MsSQLpoolIdleTimeout", 300))
+POOL_PROBE_AFTER = float(os.getenv("MsSQLpoolProbeAfter", 30))   # idle seconds before a liveness probe
+POOL_WAIT_TIMEOUT = float(os.getenv("MsSQLpoolWaitTimeout", 30))
+
+CATALOG_ROWS_TTL = float(os.getenv("MsSQLcatalogRowsTtl", 60))   # seconds before cached row counts are re-read
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of pyodbc connections for one connection string.
+    Connections idle longer than POOL_PROBE_AFTER are checked with SELECT 1
+    before reuse; dead or expired ones are replaced with a fresh connection.
+    """
+
+    def __init__(self, conn_str, max_size=POOL_SIZE):
+        self.conn_str = conn_str
+        self._idle = deque()  # (conn, returned_at)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _alive(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Borrow a connection; returns (conn, reused)."""
+        if not self._slots.acquire(timeout=POOL_WAIT_TIMEOUT):
+            raise RuntimeError("Timed out waiting for a pooled MSSQL connection")
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, returned_at = self._idle.pop()
+                idle = time.monotonic() - returned_at
+                if idle > POOL_IDLE_TIMEOUT or (idle > POOL_PROBE_AFTER and not self._alive(conn)):
+                    _close_quietly(conn)
+                    continue
+                return conn, True
+            return pyodbc.connect(self.conn_str), False
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        """Return a connection; one that can't roll back is treated as dead and closed."""
+        try:
+            try:
+                conn.rollback()
+            except Exception:
+                _close_quietly(conn)
+                return
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def discard(self, conn):
+        """Close a borrowed connection instead of returning it (e.g. its session state changed)."""
+        _close_quietly(conn)
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            _close_quietly(conn)
+
+
+SESSION_STATE = re.compile(r"\b(use|set)\b|#", re.I)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_str):
+    with _pools_lock:
+        pool = _pools.get(conn_str)
+        if pool is None:
+            pool = _pools[conn_str] = ConnectionPool(conn_str)
+        return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
+
+
+# Catalog metadata per (server, database). Every lookup costs one cheap query on
+# sys.objects; the full catalog is only re-read after DDL changed its fingerprint.
+_CATALOG_VERSION_QUERY = """
+    SELECT MAX(modify_date), COUNT(*) FROM sys.objects WHERE is_ms_shipped = 0
+"""
+
+_CATALOG_COLUMNS_QUERY = """
+    SELECT s.name, t.name, c.name, ty.name, c.max_length, c.precision, c.scale,
+           c.is_nullable, c.is_identity,
+           pk.key_ordinal,
+           rs.name, rt.name, rc.name
+    FROM sys.tables t
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.columns c ON c.object_id = t.object_id
+    JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+    LEFT JOIN (
+        SELECT ic.object_id, ic.column_id, ic.key_ordinal
+        FROM sys.indexes i
+        JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        WHERE i.is_primary_key = 1
+    ) pk ON pk.object_id = c.object_id AND pk.column_id = c.column_id
+    LEFT JOIN sys.foreign_key_columns fkc
+        ON fkc.parent_object_id = c.object_id AND fkc.parent_column_id = c.column_id
+    LEFT JOIN sys.tables rt ON rt.object_id = fkc.referenced_object_id
+    LEFT JOIN sys.schemas rs ON rs.schema_id = rt.schema_id
+    LEFT JOIN sys.columns rc
+        ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+    WHERE t.is_ms_shipped = 0
+    ORDER BY s.name, t.name, c.column_id
+"""
+
+# Row counts from partition metadata: an estimate, but free compared to COUNT(*)
+_CATALOG_ROWS_QUERY = """
+    SELECT s.name, t.name, SUM(p.rows)
+    FROM sys.tables t
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+    WHERE t.is_ms_shipped = 0
+    GROUP BY s.name, t.name
+"""
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _read_catalog(cursor):
+    """
+    Tables of the current database keyed by name ("schema.table" when the
+    name exists in more than one schema), each with its columns and row estimate.
+    """
+    cursor.execute(_CATALOG_COLUMNS_QUERY)
+    tables = {}
+    for (schema, table, column, data_type, max_length, precision, scale,
+         nullable, identity, key_ordinal, ref_schema, ref_table, ref_column) in cursor.fetchall():
+        entry = tables.setdefault(
+            (schema, table), {"schema": schema, "name": table, "rowCount": None, "columns": []}
+        )
+        columns = entry["columns"]
+        # A column in several foreign keys comes back once per key
+        if not columns or columns[-1]["name"] != column:
+            columns.append({
+                "name": column,
+                "dataType": data_type,
+                "maxLength": max_length,
+                "precision": precision,
+                "scale": scale,
+                "nullable": bool(nullable),
+                "identity": bool(identity),
+                "primaryKey": key_ordinal is not None,
+                "keyOrdinal": key_ordinal,
+                "references": [],
+            })
+        if ref_table is not None:
+            columns[-1]["references"].append({"schema": ref_schema, "table": ref_table, "column": ref_column})
+
+    for key, rows in _read_row_counts(cursor).items():
+        if key in tables:
+            tables[key]["rowCount"] = rows
+
+    names = Counter(table for _, table in tables)
+    return {
+        (table if names[table] == 1 else f"{schema}.{table}"): entry
+        for (schema, table), entry in tables.items()
+    }
+
+
+def _read_row_counts(cursor):
+    """Row estimates of the current database's tables keyed by (schema, table)."""
+    cursor.execute(_CATALOG_ROWS_QUERY)
+    return {(schema, table): int(rows or 0) for schema, table, rows in cursor.fetchall()}
+
+
+def _with_row_counts(catalog, counts):
+    """Copy of catalog with rowCount replaced from counts; columns are shared."""
+    return {
+        key: dict(entry, rowCount=counts.get((entry["schema"], entry["name"])))
+        for key, entry in catalog.items()
+    }
+
+
+def catalog_version(cursor):
+    """DDL fingerprint of the current database: latest modify_date and object count."""
+    cursor.execute(_CATALOG_VERSION_QUERY)
+    modified, objects = cursor.fetchone()
+    return (str(modified), objects)
+
+
+def get_catalog(cursor, server, database, version=None):
+    """
+    Cached catalog of database, re-read only when its DDL fingerprint changed.
+    Row counts don't change the fingerprint, so they are re-read on their own
+    once they are older than CATALOG_ROWS_TTL seconds.
+    """
+    version = version or catalog_version(cursor)
+    key = (server, database)
+    with _catalogs_lock:
+        cached = _catalogs.get(key)
+    if cached is not None and cached[0] == version:
+        if time.monotonic() - cached[2] < CATALOG_ROWS_TTL:
+            return cached[1]
+        catalog = _with_row_counts(cached[1], _read_row_counts(cursor))
+    else:
+        catalog = _read_catalog(cursor)
+    with _catalogs_lock:
+        _catalogs[key] = (version, catalog, time.monotonic())
+    return catalog
+
+
+def quote_name(name):
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def lookup_name(names, name, kind):
+    """Case-insensitive match of a requested name against catalog names (SQL Server's default collation)."""
+    found = names.get(name.lower())
+    if found is None:
+        raise ValueError(f"Unknown {kind}: {name}")
+    return found
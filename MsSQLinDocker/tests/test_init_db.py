@@ -0,0 +1,38 @@
+from init_db import split_batches
+
+
+def test_splits_on_go_lines():
+    script = "CREATE DATABASE SCAI;\nGO\nUSE SCAI;\ngo\nSELECT 1;\n"
+    assert split_batches(script) == ["CREATE DATABASE SCAI;", "USE SCAI;", "SELECT 1;"]
+
+
+def test_go_with_count_and_trailing_comment():
+    script = "INSERT INTO t VALUES (1);\n  GO 3  -- three rows\nSELECT 1;"
+    assert split_batches(script) == ["INSERT INTO t VALUES (1);"] * 3 + ["SELECT 1;"]
+
+
+def test_empty_batches_are_skipped():
+    assert split_batches("GO\n\nGO\nSELECT 1;\nGO\n") == ["SELECT 1;"]
+
+
+def test_go_inside_string_literal_is_kept():
+    script = "INSERT INTO t VALUES ('first\nGO\nit''s still the string');\nGO\nSELECT 1;"
+    assert split_batches(script) == [
+        "INSERT INTO t VALUES ('first\nGO\nit''s still the string');",
+        "SELECT 1;",
+    ]
+
+
+def test_go_inside_block_comment_is_kept():
+    script = "/* outer /* nested */\nGO\n*/\nSELECT 1;\nGO\nSELECT 2;"
+    assert split_batches(script) == ["/* outer /* nested */\nGO\n*/\nSELECT 1;", "SELECT 2;"]
+
+
+def test_go_inside_bracketed_identifier_is_kept():
+    script = "SELECT 1 AS [odd\nGO\nname]]s];\nGO\nSELECT 2;"
+    assert split_batches(script) == ["SELECT 1 AS [odd\nGO\nname]]s];", "SELECT 2;"]
+
+
+def test_line_comment_does_not_open_a_string():
+    script = "SELECT 1; -- don't\nGO\nSELECT 2;"
+    assert split_batches(script) == ["SELECT 1; -- don't", "SELECT 2;"]
@@ -0,0 +1,212 @@
+"""
+ASGI serving mode for the Unified gateway.
+
+The event loop accepts connections and hands each request to the Flask app
+on a bounded thread pool, so slow upstreams only ever tie up pool threads:
+    - blocking DB drivers (/query/db, TimescaleDB, Redis) run on UNIFIED_DB_WORKERS threads
+    - REST/HTTP connectors run on UNIFIED_HTTP_WORKERS threads
+A slow Snowflake query therefore cannot starve Zoho/ServiceNow calls and
+vice versa. Streaming responses (stream=ndjson) are forwarded as they are produced,
+through a bounded queue that the event loop drains.
+
+The connectors themselves stay synchronous (requests and the DB drivers), so
+every in-flight upstream call still holds one OS thread for its duration;
+there is no shared async HTTP client. Concurrency per process is bounded by
+DB_WORKERS + HTTP_WORKERS, and requests beyond that wait in the executor
+queue. A thread blocked on an HTTP call costs about 45 KB resident, plus the
+thread stack's address space (8 MB reserved by default on Linux, not
+resident). The default 256 HTTP workers thus take roughly 12 MB of RSS and
+2 GB of virtual address space when all of them are busy. Size the pools
+against the container's memory and thread limits rather than raising them
+without bound.
+
+Run (from Unified/sqlite, like main.py):
+    uvicorn --app-dir .. asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from main import app as flask_app
+from modules.pools import close_all_pools, close_all_clients
+
+DB_WORKERS = int(os.getenv("UNIFIED_DB_WORKERS", 32))
+HTTP_WORKERS = int(os.getenv("UNIFIED_HTTP_WORKERS", 256))
+# Response chunks a worker may queue ahead of the client
+SEND_QUEUE_DEPTH = int(os.getenv("UNIFIED_SEND_QUEUE_DEPTH", 16))
+
+# DoI products that use socket/DB drivers rather than HTTP
+BLOCKING_DOI_PRODUCTS = {"timescaledb", "redis"}
+
+_executors = {
+    "db": ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="unified-db"),
+    "http": ThreadPoolExecutor(max_workers=HTTP_WORKERS, thread_name_prefix="unified-http")
+}
+
+
+def executor_for(path):
+    """Pick the pool a request runs on from its route."""
+    parts = path.strip("/").lower().split("/")
+    if parts[:2] == ["query", "db"] and parts[2:3] != ["airtable"]:
+        return _executors["db"]
+    if parts[:2] == ["query", "doi"] and parts[2:3] and parts[2] in BLOCKING_DOI_PRODUCTS:
+        return _executors["db"]
+    return _executors["http"]
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a PEP 3333 environ."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ResponseChannel:
+    """
+    Hands ASGI messages from the worker thread to the event loop without a
+    round trip per chunk. At most SEND_QUEUE_DEPTH messages are in flight, so
+    a slow client throttles the worker instead of buffering the whole body.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.slots = threading.Semaphore(SEND_QUEUE_DEPTH)
+        self.closed = False
+
+    def put(self, message):
+        """Worker side; raises once the client side has gone away."""
+        self.slots.acquire()
+        if self.closed:
+            raise ConnectionError("client disconnected")
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    def finish(self):
+        """Worker side: no more messages (also after an error)."""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    async def drain(self, send):
+        """Loop side: forward messages, joining body chunks that are already queued into one send."""
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:
+                    return
+                taken = 1
+                while message.get("more_body") and not self.queue.empty():
+                    following = self.queue.get_nowait()
+                    if following is None:
+                        self.queue.put_nowait(None)
+                        break
+                    message = dict(following, body=message["body"] + following["body"])
+                    taken += 1
+                await send(message)
+                for _ in range(taken):
+                    self.slots.release()
+        finally:
+            # Unblock a worker still waiting for a slot so it can stop
+            self.closed = True
+            for _ in range(SEND_QUEUE_DEPTH):
+                self.slots.release()
+
+
+def run_wsgi(environ, channel):
+    """Run the Flask app in a worker thread, pushing chunks back to the event loop."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+    def start():
+        channel.put({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+
+    try:
+        result = flask_app(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not started:
+                    start()
+                    started = True
+                channel.put({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not started:
+                start()
+            channel.put({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+    finally:
+        channel.finish()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            for executor in _executors.values():
+                executor.shutdown(wait=False)
+            close_all_pools()
+            close_all_clients()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    # Read the full request body (requests here are small GET/POST payloads)
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    loop = asyncio.get_running_loop()
+    environ = build_environ(scope, body)
+    channel = ResponseChannel(loop)
+    worker = loop.run_in_executor(executor_for(scope["path"]), run_wsgi, environ, channel)
+    try:
+        await channel.drain(send)
+    finally:
+        # The worker stops at its next chunk if the client went away
+        await asyncio.wait([worker])
+    worker.result()
@@ -0,0 +1,371 @@
+"""
+Local stand-in backends for the gateway benchmarks.
+
+All fakes serve the same generated SQLite dataset, so every connector returns
+comparable rows:
+    PostgresStandIn  PostgreSQL wire protocol (simple query + named cursors)
+                     answering from SQLite, for the real psycopg2 connector
+    FakeClickHouse   ClickHouse HTTP interface (FORMAT JSON / ArrowStream)
+    FakeRestApis     Zoho (OAuth token + CRM page/per_page), ServiceNow
+                     (sysparm_limit/sysparm_offset) and Airtable (offset tokens)
+
+Each fake runs on a daemon thread and binds 127.0.0.1 on a free port.
+"""
+import http.server
+import json
+import re
+import socket
+import socketserver
+import sqlite3
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+TABLE = "orders"
+REGIONS = ("north", "south", "east", "west")
+
+
+def create_dataset(path, rows):
+    """Write the benchmark table: orders(id, customer, region, amount, created_at)."""
+    conn = sqlite3.connect(path)
+    conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    conn.execute(f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, customer TEXT, region TEXT, amount REAL, created_at TEXT)")
+    conn.executemany(
+        f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?)",
+        ((i, f"customer-{i % 997}", REGIONS[i % len(REGIONS)], round((i * 7919 % 100000) / 100, 2),
+          f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00")
+         for i in range(1, rows + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def read_rows(path, offset, limit):
+    """Rows of the dataset as dicts, for the REST fakes."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(f"SELECT * FROM {TABLE} ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+        return [dict(row) for row in cursor]
+    finally:
+        conn.close()
+
+
+def count_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class _ThreadedTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Fake:
+    """Start/stop plumbing shared by the fakes."""
+
+    def __init__(self, server):
+        self.server = server
+        self.port = server.server_address[1]
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- PostgreSQL wire protocol over SQLite ---
+
+# Type OIDs psycopg2 knows how to parse
+_PG_TYPES = {int: (20, 8), float: (701, 8), str: (25, -1)}
+_DECLARE = re.compile(r'^\s*DECLARE\s+"?(\w+)"?\s+.*?\bCURSOR\b.*?\bFOR\s+(.*)$', re.I | re.S)
+_FETCH = re.compile(r'^\s*FETCH\s+FORWARD\s+(\d+)\s+FROM\s+"?(\w+)"?\s*$', re.I)
+_CLOSE = re.compile(r'^\s*CLOSE\s+"?(\w+)"?\s*$', re.I)
+
+
+class _PostgresHandler(socketserver.BaseRequestHandler):
+
+    def setup(self):
+        # Replies are several small messages; don't let Nagle hold them back
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.db = sqlite3.connect(self.server.database)
+        self.cursors = {}  # named cursor -> (columns, types, remaining rows)
+        self.in_transaction = False
+
+    def finish(self):
+        self.db.close()
+
+    def _recv(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def _send(self, kind, payload=b""):
+        self.request.sendall(kind + struct.pack("!I", len(payload) + 4) + payload)
+
+    def _ready(self):
+        self._send(b"Z", b"T" if self.in_transaction else b"I")
+
+    def _startup(self):
+        while True:
+            length, code = struct.unpack("!II", self._recv(8))
+            self._recv(length - 8)  # startup parameters are not used
+            if code in (80877103, 80877104):  # SSLRequest / GSSENCRequest: not supported
+                self.request.sendall(b"N")
+                continue
+            break
+        self._send(b"R", struct.pack("!I", 0))  # AuthenticationOk
+        for name, value in (("server_version", "14.0"), ("server_encoding", "UTF8"), ("client_encoding", "UTF8"),
+                            ("DateStyle", "ISO, MDY"), ("integer_datetimes", "on"),
+                            ("standard_conforming_strings", "on"), ("TimeZone", "UTC")):
+            self._send(b"S", name.encode() + b"\0" + value.encode() + b"\0")
+        self._send(b"K", struct.pack("!II", threading.get_ident() & 0x7FFFFFFF, 0))
+        self._ready()
+
+    def _error(self, message):
+        fields = b"SERROR\0VERROR\0C42601\0M" + message.encode("utf-8", "replace") + b"\0\0"
+        self._send(b"E", fields)
+
+    def _row_description(self, columns, types):
+        payload = struct.pack("!H", len(columns))
+        for name, type_ in zip(columns, types):
+            oid, size = _PG_TYPES[type_]
+            payload += name.encode("utf-8") + b"\0" + struct.pack("!IhIhih", 0, 0, oid, size, -1, 0)
+        self._send(b"T", payload)
+
+    def _data_rows(self, rows):
+        out = []
+        for row in rows:
+            payload = struct.pack("!H", len(row))
+            for value in row:
+                if value is None:
+                    payload += struct.pack("!i", -1)
+                else:
+                    text = repr(value).encode() if isinstance(value, float) else str(value).encode("utf-8")
+                    payload += struct.pack("!i", len(text)) + text
+            out.append(b"D" + struct.pack("!I", len(payload) + 4) + payload)
+        self.request.sendall(b"".join(out))
+
+    def _select(self, sql):
+        cursor = self.db.execute(sql)
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+        types = []
+        for index in range(len(columns)):
+            sample = next((row[index] for row in rows if row[index] is not None), "")
+            types.append(type(sample) if type(sample) in _PG_TYPES else str)
+        return columns, types, rows
+
+    def _query(self, sql):
+        sql = sql.strip().rstrip(";").strip()
+        word = sql.split(None, 1)[0].upper() if sql else ""
+        if not sql:
+            self._send(b"I")
+        elif word in ("BEGIN", "START"):
+            self.in_transaction = True
+            self._send(b"C", b"BEGIN\0")
+        elif word in ("ROLLBACK", "COMMIT", "END", "ABORT"):
+            self.in_transaction = False
+            self.cursors.clear()
+            self._send(b"C", (word if word in ("ROLLBACK", "COMMIT") else "COMMIT").encode() + b"\0")
+        elif word in ("SET", "RESET"):
+            self._send(b"C", b"SET\0")
+        elif _DECLARE.match(sql):
+            name, query = _DECLARE.match(sql).groups()
+            self.cursors[name] = self._select(query)
+            self._send(b"C", b"DECLARE CURSOR\0")
+        elif _FETCH.match(sql):
+            count, name = _FETCH.match(sql).groups()
+            columns, types, rows = self.cursors[name]
+            page, rest = rows[:int(count)], rows[int(count):]
+            self.cursors[name] = (columns, types, rest)
+            self._row_description(columns, types)
+            self._data_rows(page)
+            self._send(b"C", f"FETCH {len(page)}\0".encode())
+        elif _CLOSE.match(sql):
+            self.cursors.pop(_CLOSE.match(sql).group(1), None)
+            self._send(b"C", b"CLOSE CURSOR\0")
+        else:
+            columns, types, rows = self._select(sql)
+            self._row_description(columns, types)
+            self._data_rows(rows)
+            self._send(b"C", f"SELECT {len(rows)}\0".encode())
+
+    def handle(self):
+        try:
+            self._startup()
+            while True:
+                kind = self._recv(1)
+                length, = struct.unpack("!I", self._recv(4))
+                body = self._recv(length - 4)
+                if kind == b"X":
+                    return
+                if kind != b"Q":
+                    self._error(f"message type {kind!r} is not supported by the stand-in")
+                    self._ready()
+                    continue
+                try:
+                    self._query(body.rstrip(b"\0").decode("utf-8"))
+                except Exception as e:
+                    self._error(str(e))
+                self._ready()
+        except (ConnectionError, OSError):
+            return
+
+
+class PostgresStandIn(_Fake):
+    """
+    Speaks enough of the PostgreSQL v3 protocol (trust auth, simple queries,
+    DECLARE/FETCH/CLOSE for named cursors) for psycopg2, answering from SQLite.
+    """
+
+    def __init__(self, database):
+        server = _ThreadedTCPServer(("127.0.0.1", 0), _PostgresHandler)
+        server.database = database
+        super().__init__(server)
+
+
+# --- HTTP fakes ---
+
+class _HttpServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _JsonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, status=200, content_type="application/json", headers=()):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+_FORMAT = re.compile(r"\s+FORMAT\s+(\w+)\s*$", re.I)
+
+
+class _ClickHouseHandler(_JsonHandler):
+
+    def do_POST(self):
+        query = self._body().decode("utf-8")
+        match = _FORMAT.search(query)
+        fmt = match.group(1).lower() if match else "tabseparated"
+        query = query[:match.start()] if match else query
+        conn = sqlite3.connect(self.server.database)
+        try:
+            cursor = conn.execute(query)
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            return self._reply(f"Code: 62. DB::Exception: {e}".encode(), status=400, content_type="text/plain")
+        finally:
+            conn.close()
+
+        if fmt == "arrowstream":
+            import pyarrow as pa
+            table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(columns)})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return self._reply(sink.getvalue().to_pybytes(), content_type="application/vnd.apache.arrow.stream")
+        data = [dict(zip(columns, row)) for row in rows]
+        self._reply({
+            "meta": [{"name": name, "type": "String"} for name in columns],
+            "data": data,
+            "rows": len(data),
+            "statistics": {"elapsed": 0.0, "rows_read": len(data), "bytes_read": 0}
+        })
+
+
+class FakeClickHouse(_Fake):
+    """ClickHouse HTTP interface: POSTed SQL runs on SQLite; FORMAT JSON or ArrowStream."""
+
+    def __init__(self, database, latency=0.0):
+        server = _HttpServer(("127.0.0.1", 0), _ClickHouseHandler)
+        server.database = database
+        server.latency = latency
+        super().__init__(server)
+
+
+class _RestHandler(_JsonHandler):
+
+    def do_POST(self):
+        if urlparse(self.path).path == "/oauth/v2/token":
+            self._body()
+            return self._reply({"access_token": "fake-access-token", "expires_in": 3600, "token_type": "Bearer"})
+        self._reply({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        total = self.server.total_rows
+
+        if url.path.startswith("/crm/v2/"):
+            # Zoho CRM: page / per_page, "info.more_records"
+            per_page = min(int(query.get("per_page", 200)), 200)
+            page = max(int(query.get("page", 1)), 1)
+            rows = read_rows(self.server.database, (page - 1) * per_page, per_page)
+            return self._reply({"data": rows, "info": {
+                "per_page": per_page, "count": len(rows), "page": page, "more_records": page * per_page < total
+            }})
+
+        if url.path.startswith("/api/now/"):
+            # ServiceNow Table API: sysparm_limit / sysparm_offset, Link header
+            limit = min(int(query.get("sysparm_limit", 10000)), 10000)
+            offset = int(query.get("sysparm_offset", 0))
+            rows = read_rows(self.server.database, offset, limit)
+            headers = [("X-Total-Count", str(total))]
+            if offset + limit < total:
+                headers.append(("Link", f'<{url.path}?sysparm_limit={limit}&sysparm_offset={offset + limit}>;rel="next"'))
+            return self._reply({"result": rows}, headers=headers)
+
+        if url.path.startswith("/v0/"):
+            # Airtable: pageSize (max 100), opaque "offset" token for the next page
+            page_size = min(int(query.get("pageSize", 100)), 100)
+            offset = int(query.get("offset", "itr0").lstrip("itr") or 0)
+            max_records = int(query.get("maxRecords", total))
+            rows = read_rows(self.server.database, offset, max(0, min(page_size, max_records - offset)))
+            body = {"records": [{"id": f"rec{row['id']:014d}", "createdTime": row["created_at"], "fields": row}
+                                for row in rows]}
+            if offset + page_size < min(total, max_records):
+                body["offset"] = f"itr{offset + page_size}"
+            return self._reply(body)
+
+        self._reply({"error": "not found"}, status=404)
+
+
+class FakeRestApis(_Fake):
+    """Zoho (accounts + CRM), ServiceNow and Airtable REST APIs on one port."""
+
+    def __init__(self, database, latency=0.0):
+        server = _HttpServer(("127.0.0.1", 0), _RestHandler)
+        server.database = database
+        server.latency = latency
+        server.total_rows = count_rows(database)
+        super().__init__(server)
@@ -0,0 +1,358 @@
+"""
+End-to-end benchmark of the Unified gateway against local stand-in backends.
+
+For every scenario a fresh gateway process is started (with its own
+credential DB pointing at the fakes in benchmarks/fakes.py), warmed up, then
+driven by --concurrency client threads for --requests requests. Reports
+p50/p95/p99 latency, throughput and the gateway's peak RSS per scenario, and
+writes them to a JSON file that can be diffed or compared between commits.
+
+Run from the Unified directory:
+    python benchmarks/gateway_bench.py
+    python benchmarks/gateway_bench.py --scenarios postgresql,clickhouse --concurrency 16 --requests 500
+    python benchmarks/gateway_bench.py --server asgi --output benchmarks/results/asgi.json
+    python benchmarks/gateway_bench.py --compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+UNIFIED_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, UNIFIED_DIR)
+
+# name -> (credential table, product, path, query string); {limit} is filled from --limit
+SCENARIOS = {
+    "postgresql": ("Db_connector_credentials", "postgresql", "/query/db/postgresql",
+                   {"query": "SELECT * FROM orders ORDER BY id LIMIT {limit}"}),
+    "postgresql-stream": ("Db_connector_credentials", "postgresql", "/query/db/postgresql",
+                          {"query": "SELECT * FROM orders ORDER BY id LIMIT {limit}", "stream": "ndjson"}),
+    "postgresql-arrow": ("Db_connector_credentials", "postgresql", "/query/db/postgresql",
+                         {"query": "SELECT * FROM orders ORDER BY id LIMIT {limit}", "format": "arrow"}),
+    "postgresql-paged": ("Db_connector_credentials", "postgresql", "/query/db/postgresql",
+                         {"query": "SELECT * FROM orders ORDER BY id", "page_size": "{limit}"}),
+    "clickhouse": ("DoI_connector_credentials", "clickhouse", "/query/doi/clickhouse",
+                   {"query": "SELECT * FROM orders ORDER BY id LIMIT {limit}"}),
+    "clickhouse-arrow": ("DoI_connector_credentials", "clickhouse", "/query/doi/clickhouse",
+                         {"query": "SELECT * FROM orders ORDER BY id LIMIT {limit}", "format": "arrow"}),
+    "zoho": ("App_connector_credentials", "zoho", "/query/app/zoho",
+             {"app_type": "crm", "endpoint": "Leads", "params": '{{"page": 1, "per_page": 200}}'}),
+    "servicenow": ("App_connector_credentials", "servicenow", "/query/app/servicenow",
+                   {"endpoint": "table/incident", "params": '{{"sysparm_limit": {limit}}}'}),
+    "airtable": ("Db_connector_credentials", "airtable", "/query/db/airtable",
+                 {"table": "Orders", "query": '{{"maxRecords": {limit}}}'}),
+}
+
+CREDENTIAL_TABLES = ("Db_connector_credentials", "SS_connector_credentials", "DoI_connector_credentials",
+                     "Ecom_connector_credentials", "App_connector_credentials")
+
+
+def _run_fakes(database, rows, latency, conn):
+    """Child process: serve all fakes and report their ports until told to stop."""
+    import fakes
+    fakes.create_dataset(database, rows)
+    servers = [fakes.PostgresStandIn(database).start(), fakes.FakeClickHouse(database, latency).start(),
+               fakes.FakeRestApis(database, latency).start()]
+    conn.send({"postgresql": servers[0].port, "clickhouse": servers[1].port, "rest": servers[2].port})
+    conn.recv()
+    for server in servers:
+        server.stop()
+
+
+def _credentials(product, ports):
+    rest = f"http://127.0.0.1:{ports['rest']}"
+    return {
+        "postgresql": {"host": "127.0.0.1", "port": ports["postgresql"], "user": "bench", "password": "bench",
+                       "database": "bench"},
+        "clickhouse": {"base_url": f"http://127.0.0.1:{ports['clickhouse']}/", "user": "bench", "password": "bench"},
+        "zoho": {"client_id": "bench", "client_secret": "bench", "refresh_token": "bench"},
+        "servicenow": {"instance": rest, "username": "bench", "password": "bench"},
+        "airtable": {"base_id": "appBench", "api_key": "bench"},
+    }[product]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_mb(pid):
+    """Peak resident set size of a process (Linux /proc), or None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+class Gateway:
+    """A gateway process with its own working directory and credential DB."""
+
+    def __init__(self, workdir, server, env):
+        self.port = _free_port()
+        if server == "asgi":
+            code = ("import sys, uvicorn; sys.path[0] = {dir!r}; "
+                    "uvicorn.run('asgi:app', host='127.0.0.1', port={port}, log_level='warning')")
+        else:
+            code = ("import sys, logging; sys.path[0] = {dir!r}; from main import app; "
+                    "from werkzeug.serving import make_server; logging.getLogger('werkzeug').setLevel(logging.WARNING); "
+                    "make_server('127.0.0.1', {port}, app, threaded=True).serve_forever()")
+        self._log = open(os.path.join(workdir, "gateway.log"), "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", code.format(dir=UNIFIED_DIR, port=self.port)],
+            cwd=workdir, env={**os.environ, **env}, stdout=self._log, stderr=subprocess.STDOUT
+        )
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout=30):
+        import requests
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"gateway exited with {self.process.returncode}; see {self._log.name}")
+            try:
+                requests.get(self.url + "/", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        raise SystemExit("gateway did not start in time")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def _is_error(response):
+    if response.status_code != 200:
+        return True
+    body = response.content
+    if response.headers.get("Content-Type", "").startswith("application/x-ndjson"):
+        # NDJSON streams report failures as their last line
+        body = body.rstrip().rsplit(b"\n", 1)[-1]
+    elif body[:1] != b"{" or len(body) >= 65536:
+        return False
+    try:
+        record = json.loads(body) if body else {}
+    except ValueError:
+        return True
+    return isinstance(record, dict) and record.get("status") == "error"
+
+
+def drive(url, params, concurrency, total, warmup):
+    """Closed-loop load: `concurrency` threads issue `total` requests. Returns (latencies, errors, seconds)."""
+    import requests
+    local = threading.local()
+    lock = threading.Lock()
+    remaining = [total]
+    latencies, errors = [], []
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def one():
+        started = time.perf_counter()
+        try:
+            response = session().get(url, params=params, timeout=300)
+            failed = _is_error(response)
+        except requests.RequestException as e:
+            failed = str(e)
+        return time.perf_counter() - started, failed
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            elapsed, failed = one()
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(failed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: one(), range(warmup)))
+        started = time.perf_counter()
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+        seconds = time.perf_counter() - started
+    return latencies, errors, seconds
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, seconds):
+    ms = sorted(value * 1000 for value in latencies)
+    return {
+        "requests": len(ms),
+        "errors": len(errors),
+        "throughput_rps": round(len(ms) / seconds, 2) if seconds else None,
+        "latency_ms": {
+            "p50": round(_percentile(ms, 0.50), 2) if ms else None,
+            "p95": round(_percentile(ms, 0.95), 2) if ms else None,
+            "p99": round(_percentile(ms, 0.99), 2) if ms else None,
+            "mean": round(statistics.fmean(ms), 2) if ms else None,
+            "max": round(ms[-1], 2) if ms else None,
+        },
+    }
+
+
+def run_scenario(name, ports, args):
+    from sqlite.modules import create_table, upsert_credential
+    table, product, path, query = SCENARIOS[name]
+    params = {key: value.format(limit=args.limit) for key, value in query.items()}
+
+    with tempfile.TemporaryDirectory(prefix=f"unified-bench-{name}-") as workdir:
+        database = os.path.join(workdir, "wwwsmart_credentials.db")
+        for credential_table in CREDENTIAL_TABLES:
+            create_table(database, credential_table)
+        upsert_credential(database, table, "bench", "bench", "bench", product, _credentials(product, ports),
+                          {"cache_ttl": args.cache_ttl})
+
+        rest = f"http://127.0.0.1:{ports['rest']}"
+        gateway = Gateway(workdir, args.server, {
+            "AIRTABLE_API_URL": rest, "AIRTABLE_RATE_LIMIT": str(args.airtable_rate_limit),
+            "ZOHO_ACCOUNTS_URL": rest, "ZOHO_API_URL": rest,
+            "UNIFIED_RESULT_CACHE_TTL": str(args.cache_ttl),
+        })
+        try:
+            gateway.wait_ready()
+            latencies, errors, seconds = drive(gateway.url + path, params, args.concurrency, args.requests, args.warmup)
+            result = summarize(latencies, errors, seconds)
+            result["peak_rss_mb"] = _peak_rss_mb(gateway.process.pid)
+            if errors:
+                result["first_error"] = str(errors[0])[:200]
+        finally:
+            gateway.stop()
+    return result
+
+
+def _git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=UNIFIED_DIR,
+                                  capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=UNIFIED_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{revision}-dirty" if revision and dirty else revision or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path):
+    """Print per-scenario changes between two result files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('revision')} -> {new['meta'].get('revision')}")
+    print(f"{'scenario':20} {'metric':16} {'old':>10} {'new':>10} {'change':>8}")
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        a, b = old["results"][name], new["results"][name]
+        rows = [(f"{p} ms", a["latency_ms"][p], b["latency_ms"][p]) for p in ("p50", "p95", "p99")]
+        rows += [("throughput rps", a["throughput_rps"], b["throughput_rps"]), ("peak rss MB", a["peak_rss_mb"], b["peak_rss_mb"])]
+        for metric, before, after in rows:
+            change = f"{(after - before) / before * 100:+.1f}%" if before and after is not None else ""
+            print(f"{name:20} {metric:16} {before!s:>10} {after!s:>10} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated (default: all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads (default 8)")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario (default 200)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests first (default 20)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the fake dataset (default 10000)")
+    parser.add_argument("--limit", type=int, default=1000, help="rows per request (default 1000)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="added latency per fake HTTP response")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi", help="werkzeug threaded or uvicorn asgi.py")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="result cache TTL for the products (default 0: off)")
+    parser.add_argument("--airtable-rate-limit", type=float, default=1000, help="Airtable requests/s per base")
+    parser.add_argument("--output", help="result file (default benchmarks/results/<git revision>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+
+    with tempfile.TemporaryDirectory(prefix="unified-bench-data-") as datadir:
+        parent, child = multiprocessing.Pipe()
+        fakes = multiprocessing.Process(
+            target=_run_fakes, args=(os.path.join(datadir, "dataset.db"), args.rows, args.latency_ms / 1000, child),
+            daemon=True
+        )
+        fakes.start()
+        ports = parent.recv()
+        results = {}
+        try:
+            for name in names:
+                results[name] = run_scenario(name, ports, args)
+                r = results[name]
+                print(f"{name:20} p50 {r['latency_ms']['p50']} ms  p95 {r['latency_ms']['p95']} ms  "
+                      f"p99 {r['latency_ms']['p99']} ms  {r['throughput_rps']} req/s  "
+                      f"rss {r['peak_rss_mb']} MB  errors {r['errors']}")
+        finally:
+            parent.send("stop")
+            fakes.join(timeout=10)
+
+    revision = _git_revision()
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        "meta": {
+            "revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "server": args.server,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "rows": args.rows,
+            "limit": args.limit,
+            "latency_ms": args.latency_ms,
+            "cache_ttl": args.cache_ttl,
+        },
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"wrote {output}")
+    if any(r["errors"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Import-time check for the Unified gateway.
+
+Imports main.py and every connector module in the registry in fresh
+interpreters with `python -X importtime`, and reports the median cumulative
+import time plus the slowest modules. Exits non-zero if a database/search
+driver gets imported (they must be imported inside the fetch_from_* that uses
+them) or if the median import of main exceeds --budget-ms.
+
+Run from the Unified directory:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --budget-ms 800 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+UNIFIED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must not be loaded just by importing main
+LAZY_DRIVERS = {
+    "databricks", "psycopg2", "pymongo", "bson", "mysql", "neo4j", "oracledb",
+    "snowflake", "redis", "elasticsearch", "opensearchpy", "influxdb_client", "pyarrow"
+}
+
+
+def import_profile():
+    """Import main and the connector modules in a fresh interpreter; returns {module: (self_us, cumulative_us)}."""
+    # Same layout as `python ../main.py` from Unified/sqlite: Unified first on sys.path
+    code = (
+        f"import sys; sys.path[0] = {UNIFIED_DIR!r}; import main\n"
+        "from modules.registry import CONNECTORS\n"
+        "for module in sorted({c.module for c in CONNECTORS.values()}): __import__(module)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.join(UNIFIED_DIR, "sqlite"), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import main failed:\n{result.stderr}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to sample (default 5)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median import of main exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list (default 10)")
+    args = parser.parse_args()
+
+    import_profile()  # warm up .pyc files
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals_ms = [p["main"][1] / 1000 for p in profiles]
+    median_ms = statistics.median(totals_ms)
+
+    print(f"import main: median {median_ms:.1f} ms, min {min(totals_ms):.1f} ms, max {max(totals_ms):.1f} ms ({args.runs} runs)")
+    for name in sorted(name for name in profiles[0] if name.startswith("modules.") and name.count(".") == 1):
+        module_ms = statistics.median(p[name][1] / 1000 for p in profiles if name in p)
+        print(f"  {name}: median {module_ms:.1f} ms")
+    print("slowest modules (cumulative, last run):")
+    last = profiles[-1]
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][1])[1:args.top + 1]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name in last} & LAZY_DRIVERS)
+    if eager:
+        failures.append(f"drivers imported without being used: {', '.join(eager)}")
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        failures.append(f"median {median_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,167 @@
-from flask import Flask, request, jsonify
+import time
+from flask import Flask, Response, request, jsonify, current_app
 from sqlite_loader import *
-from modules.databases import *
-from modules.spreadsheet import *
-from modules.devops_and_iot import *
-from modules.ecommerce import *
-from modules.applications import *
+from modules.registry import get_connector, run_connector, ParamError, REQUIRED_ARGS
+from modules.streaming import ndjson_response
+from modules.columnar import arrow_response
+from modules.result_cache import cached_query, RESULT_CACHE_DEFAULT_TTL
+from modules.singleflight import coalesced
+from modules.pools import credential_fingerprint
+from modules.pagination import MAX_PAGE_SIZE, CursorError, decode_cursor, encode_cursor, split_page
+from modules.batch import BATCH_MAX_ITEMS, run_batch
+from modules.federation import FederationError, run_federated
+from modules.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, connector_scope, exposition, phase, record_response
 
 app = Flask(__name__)
 
+# Credential fetcher per category
+CREDENTIAL_FETCHERS = {
+    "db": fetch_db_credentials,
+    "ss": fetch_ss_credentials,
+    "doi": fetch_doi_credentials,
+    "ecom": fetch_ecom_credentials,
+    "app": fetch_app_credentials
+}
+
+# Formats accepted by ?format= for connectors with columnar output
+COLUMNAR_FORMATS = {"arrow", "parquet"}
+
+def error_response(message, status=400):
+    return jsonify({"status": "error", "message": message}), status
+
+def output_mode(connector, args, productType):
+    """Validate ?stream= and ?format=; returns (output, format or None, error response or None)."""
+    stream = args.get("stream")
+    fmt = args.get("format")
+    if fmt == "json":
+        fmt = None
+
+    if stream and (stream != "ndjson" or not connector or not connector.stream):
+        return None, None, error_response(f"stream={stream} is not supported for {productType}")
+    if fmt and (fmt not in COLUMNAR_FORMATS or not connector or not connector.columnar):
+        return None, None, error_response(f"format={fmt} is not supported for {productType}")
+    if fmt and stream:
+        return None, None, error_response("stream and format cannot be combined")
+    return "stream" if stream else "arrow" if fmt else "rows", fmt, None
+
+def page_request(connector, args, productType, output):
+    """Validate ?page_size= and ?cursor=; returns (page_size or None, offset, error response or None)."""
+    page_size = args.get("page_size")
+    cursor = args.get("cursor")
+    if not page_size:
+        if cursor:
+            return None, 0, error_response("cursor requires page_size")
+        return None, 0, None
+
+    if not connector or not connector.paging:
+        return None, 0, error_response(f"page_size is not supported for {productType}")
+    if output == "stream":
+        return None, 0, error_response("stream and page_size cannot be combined")
+    try:
+        page_size = int(page_size)
+    except ValueError:
+        page_size = 0
+    if not 0 < page_size <= MAX_PAGE_SIZE:
+        return None, 0, error_response(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
+    try:
+        offset = decode_cursor(cursor, args.get("query")) if cursor else 0
+    except CursorError as e:
+        return None, 0, error_response(str(e))
+    return page_size, offset, None
+
+def paged_result(result, args, page_size, offset, fmt=None):
+    """One page of rows plus next_cursor (in the JSON body and the X-Next-Cursor header)."""
+    result, has_more = split_page(result, page_size)
+    next_cursor = encode_cursor(args.get("query"), offset + page_size) if has_more else None
+    if isinstance(result, list) and not fmt:
+        response = jsonify({"data": result, "next_cursor": next_cursor})
+    else:
+        response = current_app.make_response(render_result(result, fmt))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def render_result(result, fmt=None):
+    """Turn a fetcher result into a response: Arrow/Parquet table, NDJSON row stream or plain JSON."""
+    if fmt:
+        return arrow_response(result, fmt)
+    return ndjson_response(result)
+
+def product_cache_policy(category):
+    """
+    Result-cache (ttl, identity) for a request: "cache_ttl" from the product's
+    stored metadata, else the default, keyed by a fingerprint of the credential
+    row it resolves to. Requests the connector marks as writes are never cached.
+    """
+    def cache_policy(productType, args):
+        connector = get_connector(category, productType)
+        if not connector or not connector.cacheable(args):
+            return 0, None
+        creds_entry = fetch_product_credentials(CREDENTIAL_FETCHERS[category], productType, user_id=args.get("userid"))
+        if not creds_entry:
+            return 0, None
+        metadata = creds_entry.get("metadata") or {}
+        return float(metadata.get("cache_ttl", RESULT_CACHE_DEFAULT_TTL)), credential_fingerprint(creds_entry["credentials"])
+    return cache_policy
+
+def credentials_resolver(userid):
+    """resolve_credentials(category, productType) for batch and federated queries."""
+    def resolve_credentials(category, productType):
+        fetch_credentials = CREDENTIAL_FETCHERS.get(category)
+        if not fetch_credentials:
+            return None
+        return fetch_product_credentials(fetch_credentials, productType, user_id=userid)
+    return resolve_credentials
+
+def query_data(category, productType):
+    """Validate the request, look up credentials and run the registered connector."""
+    args = request.args
+    connector = get_connector(category, productType)
+
+    required = REQUIRED_ARGS.get(category)
+    if required and not args.get(required):
+        return error_response(f"{required} parameter is required")
+
+    output, fmt, error = output_mode(connector, args, productType)
+    if error:
+        return error
+
+    page_size, offset, error = page_request(connector, args, productType, output)
+    if error:
+        return error
+
+    # Fetch the one credential row for this product (userid optional)
+    lookup_started = time.perf_counter()
+    creds_entry = fetch_product_credentials(CREDENTIAL_FETCHERS[category], productType, user_id=args.get("userid"))
+    lookup_seconds = time.perf_counter() - lookup_started
+
+    if not creds_entry:
+        return error_response("Invalid productType")
+
+    if not connector:
+        return error_response("Unsupported productType")
+
+    with connector_scope(category, productType) as scope:
+        scope.add("credentials", lookup_seconds)
+        result = None
+        try:
+            # One extra row tells us whether there is a next page
+            page = (page_size + 1, offset) if page_size else None
+            with phase("connector"):
+                result = run_connector(connector, creds_entry['credentials'], args, output, page=page)
+            with phase("serialize"):
+                if page_size:
+                    response = current_app.make_response(paged_result(result, args, page_size, offset, fmt))
+                else:
+                    response = current_app.make_response(render_result(result, fmt))
+        except ParamError as e:
+            response = current_app.make_response(error_response(str(e)))
+        except Exception as e:
+            response = current_app.make_response(error_response(str(e), 500))
+        record_response(scope, result, response)
+        return response
+
 @app.route("/", methods=["GET"])
 def root():
     return jsonify({
@@ -19,353 +173,90 @@ def root():
     })
 
 @app.route("/query/db/<productType>", methods=["GET"])
+@cached_query("db", product_cache_policy("db"))
+@coalesced("db")
 def db_query_data(productType):
-    query = request.args.get("query")
-    userid = request.args.get("userid")
-
-    if not query:
-        return jsonify({"status": "error", "message": "query parameter is required"}), 400
-
-    # Fetch credentials dynamically based on userid or fallback
-    if userid:
-        creds_entry = fetch_db_credentials(user_id=userid)
-        # fetch_db_credentials should return either a single dict or list, handle accordingly
-        if isinstance(creds_entry, list):
-            creds_entry = next((item for item in creds_entry if item['name'].lower() == productType.lower()), None)
-    else:
-        creds_list = fetch_db_credentials()
-        creds_entry = next((item for item in creds_list if item['name'].lower() == productType.lower()), None)
-
-    if not creds_entry:
-        return jsonify({"status": "error", "message": "Invalid productType"}), 400
-
-    creds = creds_entry['credentials']
-
-    try:
-        if productType.lower() == "databricks":    
-            return fetch_from_databricks(creds, query)
-
-        elif productType.lower() == "postgresql":  
-            return fetch_from_postgresql(creds, query)
-        
-        elif productType.lower() == "supabase":
-            return fetch_from_supabase(creds, query)
-
-        elif productType.lower() == "mysql":
-            return fetch_from_mysql(creds, query)
-        
-        elif productType.lower() == "mongodb":
-            collection = request.args.get("collection")
-            database = request.args.get("database")
-            return fetch_from_mongodb(creds, query, collection, database)
-
-        elif productType.lower() == "snowflake":
-            database = request.args.get("database")
-            schema = request.args.get("schema")
-            return fetch_from_snowflake(creds, query, database, schema)
-
-        elif productType.lower() == "airtable":
-            table = request.args.get("table")
-            return fetch_from_airtable(creds, table, query)
-        
-        elif productType.lower() == "neo4j":
-            return fetch_from_neo4j(creds, query)
-        
-        elif productType.lower() == "oracle19":
-            return fetch_from_oracle(creds, query)
-        
-        elif productType.lower() == "oracle23":
-            return fetch_from_oracle(creds, query, version=23)
-        
-        else:
-            return jsonify({"status": "error", "message": "Unsupported productType"}), 400
-
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    return query_data("db", productType)
 
 @app.route("/query/ss/<productType>", methods=["GET"])
 def ss_query_data(productType):
-    query = request.args.get("query")
-    userid = request.args.get("userid")
-
-    if not query:
-        return jsonify({"status": "error", "message": "query parameter is required"}), 400
-
-    # Fetch credentials dynamically based on userid or fallback
-    if userid:
-        creds_entry = fetch_ss_credentials(user_id=userid)
-        if isinstance(creds_entry, list):
-            creds_entry = next((item for item in creds_entry if item['name'].lower() == productType.lower()), None)
-    else:
-        creds_list = fetch_ss_credentials()
-        creds_entry = next((item for item in creds_list if item['name'].lower() == productType.lower()), None)
-
-    if not creds_entry:
-        return jsonify({"status": "error", "message": "Invalid productType"}), 400
-
-    creds = creds_entry['credentials']
-
-    try:
-        if productType.lower() == "googlesheet":
-            query = request.args.get("query", "SELECT *")
-            return fetch_from_googlesheet(creds, query)
-
-        else:
-            return jsonify({"status": "error", "message": "Unsupported productType"}), 400
-
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    return query_data("ss", productType)
 
 @app.route("/query/doi/<productType>", methods=["GET"])
+@cached_query("doi", product_cache_policy("doi"))
+@coalesced("doi")
 def doi_query_data(productType):
-    # main query parameter — different DoI products may interpret it differently
-    query = request.args.get("query")
-    userid = request.args.get("userid")
-
-    if not query:
-        return jsonify({"status": "error", "message": "query parameter is required"}), 400
-
-    # Fetch credentials dynamically
-    if userid:
-        creds_entry = fetch_doi_credentials(user_id=userid)
-        if isinstance(creds_entry, list):
-            creds_entry = next((item for item in creds_entry if item['name'].lower() == productType.lower()), None)
-    else:
-        creds_list = fetch_doi_credentials()
-        creds_entry = next((item for item in creds_list if item['name'].lower() == productType.lower()), None)
-
-    if not creds_entry:
-        return jsonify({"status": "error", "message": "Invalid productType"}), 400
+    return query_data("doi", productType)
 
-    creds = creds_entry['credentials']
-
-    try:
-        if productType.lower() == "clickhouse":
-            # table = request.args.get("table")
-            # database = request.args.get("database", creds.get("database", "default"))
-            return fetch_from_clickhouse(creds, query)
-
-        elif productType.lower() == "tempo":
-            # Example: query_range param contains JSON body for trace search
-            return fetch_from_tempo(creds, query)
-
-        elif productType.lower() == "loki":
-            # query is a LogQL string
-            minutes = request.args.get("minutes", 5)
-            return fetch_from_loki(creds, query, minutes)
-
-        elif productType.lower() == "prometheus":
-            # query is a PromQL string
-            return fetch_from_prometheus(creds, query)
-
-        elif productType.lower() == "influxdb":
-            # query is a Flux query
-            return fetch_from_influxdb(creds, query)
-
-        elif productType.lower() == "timescaledb":
-            # table = request.args.get("table")
-            return fetch_from_timescaledb(creds, query)
-
-        elif productType.lower() == "redis":
-            # query is a Redis command, e.g., "LRANGE logs 0 10"
-            args_str = request.args.get("args", "")
-            return fetch_from_redis(creds, query, args_str)
-
-        elif productType.lower() == "elasticsearch":
-            # query param should be JSON DSL
-            index = request.args.get("index", creds.get("default_index", "_all"))
-            return fetch_from_elasticsearch(creds, query, index)
-        
-        elif productType.lower() == "opensearch":
-            # query param should be JSON DSL
-            index = request.args.get("index", "_all")
-            dsl_query = json.loads(query)
-            return fetch_from_opensearch(creds, dsl_query, index)
-
-        else:
-            return jsonify({"status": "error", "message": "Unsupported productType"}), 400
-
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
-    
 @app.route("/query/ecom/<productType>", methods=["GET"])
 def ecom_query_data(productType):
-    endpoint = request.args.get("endpoint")
-    params = request.args.get("params", "{}")
-    userid = request.args.get("userid")
-    scope = request.args.get("scope")
-
-    if not endpoint:
-        return jsonify({"status": "error", "message": "endpoint parameter is required"}), 400
-
-    # Parse params if sent as JSON string
-    try:
-        params = json.loads(params)
-    except:
-        return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-
-    # Fetch credentials dynamically based on userid or fallback
-    if userid:
-        creds_entry = fetch_ecom_credentials(user_id=userid)  # should return list/dict of ecom credentials
-        if isinstance(creds_entry, list):
-            creds_entry = next((item for item in creds_entry if item['name'].lower() == productType.lower()), None)
-    else:
-        creds_list = fetch_ecom_credentials()
-        creds_entry = next((item for item in creds_list if item['name'].lower() == productType.lower()), None)
-
-    if not creds_entry:
-        return jsonify({"status": "error", "message": "Invalid productType"}), 400
-
-    creds = creds_entry['credentials']
-
-    try:
-        if productType.lower() == "zoho":
-            return fetch_from_zoho_crm(creds, endpoint, params)
-
-        elif productType.lower() == "wix":
-            return fetch_from_wix(creds, endpoint, params, scope)
-
-        elif productType.lower() == "woocommerce":
-            return fetch_from_woocommerce(creds, endpoint, params)
-
-        elif productType.lower() == "shopify":
-            return fetch_from_shopify(creds, endpoint, params)
-
-        else:
-            return jsonify({"status": "error", "message": "Unsupported productType"}), 400
-
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    return query_data("ecom", productType)
 
 @app.route("/query/app/<productType>", methods=["GET"])
+@cached_query("app", product_cache_policy("app"))
 def app_query_data(productType):
-    userid = request.args.get("userid")
-    pt = productType.lower()
-
-    # Fetch credentials dynamically based on userid or fallback
-    if userid:
-        creds_entry = fetch_app_credentials(user_id=userid)
-        if isinstance(creds_entry, list):
-            creds_entry = next((item for item in creds_entry if item['name'].lower() == pt), None)
-    else:
-        creds_list = fetch_app_credentials()
-        creds_entry = next((item for item in creds_list if item['name'].lower() == pt), None)
-
-    if not creds_entry:
-        return jsonify({"status": "error", "message": "Invalid productType"}), 400
-
-    creds = creds_entry['credentials']
-
+    return query_data("app", productType)
+
+@app.route("/query/batch", methods=["POST"])
+def batch_query_data():
+    """
+    Run several queries in one request.
+    Body: {"userid": optional, "items": [{"id", "category", "productType", "query", "params": {...}}]}
+    """
+    body = request.get_json(silent=True) or {}
+    items = body.get("items")
+
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return error_response("items must be a non-empty list of objects")
+    if len(items) > BATCH_MAX_ITEMS:
+        return error_response(f"a batch can have at most {BATCH_MAX_ITEMS} items")
+    ids = [str(item.get("id", index)) for index, item in enumerate(items)]
+    if len(set(ids)) != len(ids):
+        return error_response("item ids must be unique")
+
+    userid = body.get("userid") or request.args.get("userid")
+    return jsonify({"status": "success", "results": run_batch(items, credentials_resolver(userid))})
+
+@app.route("/query/federated", methods=["POST"])
+def federated_query_data():
+    """
+    Join and aggregate results from several connectors.
+    Body: {"userid": optional, "sources": [{"alias", "category", "productType", "query", "params", "rows_path"}],
+           "joins": [{"with", "on": [["a.col", "b.col"]], "type"}], "group_by", "aggregates",
+           "columns", "order_by", "limit", "format": optional "arrow" | "parquet"}
+    """
+    body = request.get_json(silent=True) or {}
+    fmt = body.get("format")
+    if fmt is not None and fmt not in COLUMNAR_FORMATS:
+        return error_response(f"format must be one of {', '.join(sorted(COLUMNAR_FORMATS))}")
+
+    userid = body.get("userid") or request.args.get("userid")
     try:
-        # Zoho
-        if pt == "zoho":
-            app_type = request.args.get("app_type", "crm")  # default to crm
-            endpoint = request.args.get("endpoint")
-            params = request.args.get("params", "{}")
-            try:
-                params = json.loads(params)
-            except:
-                return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-
-            return fetch_from_zoho(creds, app_type, endpoint, params)
-
-        # Freshworks
-        elif pt == "freshworks":
-            app_type = request.args.get("app_type", "freshdesk")  # default to freshdesk
-            endpoint = request.args.get("endpoint")
-            params = request.args.get("params", "{}")
-            method = request.args.get("method")  # optional GET/POST
-            try:
-                params = json.loads(params)
-            except:
-                return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-
-            return fetch_from_freshworks(creds, app_type, endpoint, params, method)
-
-        # Odoo
-        elif pt == "odoo":
-            model = request.args.get("model")
-            method = request.args.get("method")
-            args = request.args.get("args", "[]")
-            kwargs = request.args.get("kwargs", "{}")
-            try:
-                args = json.loads(args)
-                kwargs = json.loads(kwargs)
-            except:
-                return jsonify({"status": "error", "message": "args/kwargs must be valid JSON"}), 400
-
-            return fetch_from_odoo(creds, model, method, args, kwargs)
-
-        # ServiceNow
-        elif pt == "servicenow":
-            endpoint = request.args.get("endpoint")
-            params = request.args.get("params", "{}")
-            try:
-                params = json.loads(params)
-            except:
-                return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-
-            return fetch_from_servicenow(creds, endpoint, params)
-
-        # SAP
-        elif pt == "sap":
-            producttype = request.args.get("producttype")
-            subproducttype = request.args.get("subproducttype")
-            field = request.args.get("field")
-            filters = request.args.get("filters")
-            return fetch_from_sap(creds, producttype, subproducttype, field, filters)
-        
-        # HubSpot
-        elif pt == "hubspot":
-            app_type = request.args.get("app_type", "contacts")
-            endpoint = request.args.get("endpoint")
-            params = request.args.get("params", "{}")
-            try:
-                params = json.loads(params)
-            except:
-                return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-            return fetch_from_hubspot(creds, app_type, endpoint, params)
-        
-        elif pt == "erpnext":
-            endpoint = request.args.get("endpoint")
-            params = request.args.get("params", "{}")
-            method = request.args.get("method", "GET")  # default GET
-            try:
-                params = json.loads(params)
-            except:
-                return jsonify({"status": "error", "message": "params must be a valid JSON string"}), 400
-            return fetch_from_erpnext(creds, endpoint, params, method)
-
-        else:
-            return jsonify({"status": "error", "message": "Unsupported productType"}), 400
-
+        table, stats = run_federated(body, credentials_resolver(userid))
+    except FederationError as e:
+        return error_response(str(e))
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return error_response(str(e), 500)
+
+    if fmt:
+        return arrow_response(table, fmt)
+    return jsonify({"status": "success", "data": table.to_pylist(), "stats": stats})
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Per-connector latency histograms and counters for Prometheus to scrape."""
+    return Response(exposition(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route("/metadata/<category>/<product_type>", methods=["GET"])
 def get_metadata(category, product_type):
-    # Map categories to fetchers
-    fetchers = {
-        "db": fetch_db_credentials,
-        "ss": fetch_ss_credentials,
-        "doi": fetch_doi_credentials,
-        "ecom": fetch_ecom_credentials,
-        "app": fetch_app_credentials
-    }
-
-    if category not in fetchers:
+    if category not in CREDENTIAL_FETCHERS:
         return jsonify({"status": "error", "message": "Invalid category"}), 400
 
-    creds_list = fetchers[category]()
-    metadata_map = {c["name"].lower(): c.get("metadata", {}) for c in creds_list}
-
-    if product_type:
-        data = metadata_map.get(product_type.lower())
-        if not data:
-            return jsonify({"status": "error", "message": "Invalid productType"}), 400
-        return jsonify({"status": "success", "data": data})
-
-    return jsonify({"status": "success", "data": metadata_map})
+    creds_entry = fetch_product_credentials(CREDENTIAL_FETCHERS[category], product_type)
+    data = creds_entry.get("metadata") if creds_entry else None
+    if not data:
+        return jsonify({"status": "error", "message": "Invalid productType"}), 400
+    return jsonify({"status": "success", "data": data})
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
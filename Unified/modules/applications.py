@@ -1,4 +1,7 @@
+import os
 import requests
+from modules.sessions import session_for
+from sqlite.helper_functions.zoho_tokens import zoho_tokens
 
 def fetch_from_freshworks(creds, app_type, endpoint, params=None, method=None):
     """
@@ -41,9 +44,9 @@ def fetch_from_freshworks(creds, app_type, endpoint, params=None, method=None):
 
         # Make request
         if method == "GET":
-            response = requests.get(url, headers=headers, params=params)
+            response = session_for(url).get(url, headers=headers, params=params)
         elif method == "POST":
-            response = requests.post(url, headers=headers, json=params)
+            response = session_for(url).post(url, headers=headers, json=params)
         else:
             return {"status": "error", "message": f"Unsupported HTTP method: {method}"}
 
@@ -55,6 +58,9 @@ def fetch_from_freshworks(creds, app_type, endpoint, params=None, method=None):
     except Exception as e:
         return {"status": "error", "message": f"Freshworks fetch failed: {str(e)}"}
 
+# Replaces the scheme and host of every Zoho app API (other data centres, local fakes)
+ZOHO_API_URL = os.getenv("ZOHO_API_URL")
+
 
 def fetch_from_zoho(creds, app_type, endpoint, params=None):
     """
@@ -77,18 +83,6 @@ def fetch_from_zoho(creds, app_type, endpoint, params=None):
         return {"status": "error", "message": "Invalid params format: must be a dict"}
 
     try:
-        # Refresh access token
-        token_url = "https://accounts.zoho.in/oauth/v2/token"
-        token_data = {
-            "grant_type": "refresh_token",
-            "client_id": creds["client_id"],
-            "client_secret": creds["client_secret"],
-            "refresh_token": creds["refresh_token"]
-        }
-        token_response = requests.post(token_url, data=token_data)
-        token_response.raise_for_status()
-        access_token = token_response.json()["access_token"]
-
         org_id = creds.get("organization_id")
 
         # Determine base URL per app
@@ -102,18 +96,24 @@ def fetch_from_zoho(creds, app_type, endpoint, params=None):
         if app_type not in base_urls:
             return {"status": "error", "message": f"Unsupported Zoho app_type: {app_type}"}
 
-        url = f"{base_urls[app_type]}{endpoint.lstrip('/')}"
+        base_url = base_urls[app_type]
+        if ZOHO_API_URL:
+            base_url = f"{ZOHO_API_URL.rstrip('/')}/{base_url.split('/', 3)[3]}"
+        url = f"{base_url}{endpoint.lstrip('/')}"
 
         # Prepare headers
-        headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
+        headers = {}
         if app_type in ["books", "projects"] and org_id:
             # Some apps require org ID in headers instead of params
             headers["X-com-zoho-books-organizationid"] = org_id
         elif app_type == "crm" and org_id:
             params["organization_id"] = org_id
 
-        # Make request
-        response = requests.get(url, headers=headers, params=params)
+        # Make request with a cached access token (refreshed once on 401)
+        def send(access_token):
+            return session_for(url).get(url, headers={**headers, "Authorization": f"Zoho-oauthtoken {access_token}"}, params=params)
+
+        response = zoho_tokens.call(creds, send, post=session_for(zoho_tokens.token_url).post)
         response.raise_for_status()
         return response.json()
 
@@ -158,7 +158,8 @@ def fetch_from_odoo(creds, model, method, args=None, kwargs=None):
     }
     headers = {"Content-Type": "application/json"}
     try:
-        r = requests.post(f"{creds['url'].rstrip('/')}/jsonrpc", json=payload, headers=headers)
+        url = f"{creds['url'].rstrip('/')}/jsonrpc"
+        r = session_for(url).post(url, json=payload, headers=headers)
         r.raise_for_status()
         return r.json()
     except Exception as e:
@@ -182,7 +183,7 @@ def fetch_from_servicenow(creds, endpoint, params=None):
         auth = (creds["username"], creds["password"])
         headers = {"Content-Type": "application/json"}
 
-        response = requests.get(url, headers=headers, params=params, auth=auth)
+        response = session_for(url).get(url, headers=headers, params=params, auth=auth)
         response.raise_for_status()  # Raises HTTPError for bad responses
         return response.json()
     except Exception as e:
@@ -222,7 +223,7 @@ def fetch_from_sap(creds, producttype, subproducttype, field=None, filters=None)
     params = {"$filter": filters} if filters else {}
 
     try:
-        r = requests.get(url, headers=headers, params=params)
+        r = session_for(url).get(url, headers=headers, params=params)
         r.raise_for_status()
         return r.json(), r.status_code
     except requests.exceptions.RequestException as e:
@@ -246,7 +247,7 @@ def fetch_from_hubspot(creds, app_type, endpoint, params=None, method="GET"):
     if not isinstance(params, dict):
         return {"status": "error", "message": "Invalid params format: must be a dict"}
     
-    resp = requests.request(method, url, headers=headers, json=params if method=="POST" else None, params=params if method=="GET" else None)
+    resp = session_for(url).request(method, url, headers=headers, json=params if method=="POST" else None, params=params if method=="GET" else None)
     return resp.json()
 
 def fetch_from_erpnext(creds, endpoint, params=None, method="GET"):
@@ -275,7 +276,7 @@ def fetch_from_erpnext(creds, endpoint, params=None, method="GET"):
         return {"status": "error", "message": "Invalid params format: must be a dict"}
 
     try:
-        resp = requests.request(
+        resp = session_for(url).request(
             method.upper(),
             url,
             headers=headers,
@@ -0,0 +1,119 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from flask import current_app
+from modules.metrics import connector_scope, mark_error, observe_phase, phase
+from modules.registry import get_connector, run_connector, REQUIRED_ARGS
+
+# Shared by all batch requests, so N concurrent batches can't open N x items upstream queries
+BATCH_WORKERS = int(os.getenv("UNIFIED_BATCH_WORKERS", 16))
+BATCH_MAX_ITEMS = int(os.getenv("UNIFIED_BATCH_MAX_ITEMS", 100))
+
+_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="unified-batch")
+
+
+def _error(message):
+    return {"status": "error", "message": message}
+
+
+def _is_error(data):
+    return isinstance(data, dict) and (data.get("status") == "error" or "error" in data)
+
+
+def item_args(item):
+    """Connector args for a batch item: its "params" object plus "query"."""
+    args = dict(item.get("params") or {})
+    if item.get("query") is not None:
+        args["query"] = item["query"]
+    return args
+
+
+def run_item(app, connector, creds, args, output="rows", labels=None):
+    """
+    Run one connector call off the request thread.
+    labels: optional (category, productType) to record metrics under
+    Returns {"status": "success", "data": result} or {"status": "error", "message": ...}.
+    """
+    with connector_scope(*labels) if labels else nullcontext() as scope:
+        result = _run_item(app, connector, creds, args, output)
+        if result["status"] == "error":
+            mark_error()
+        elif scope is not None and isinstance(result["data"], list):
+            scope.rows += len(result["data"])
+        return result
+
+
+def _run_item(app, connector, creds, args, output):
+    # Fetchers may build Flask responses (jsonify), which needs an app context in this thread
+    with app.app_context():
+        try:
+            with phase("connector"):
+                result = run_connector(connector, creds, args, output)
+        except Exception as e:  # ParamError included
+            return _error(str(e))
+
+        if isinstance(result, tuple) or hasattr(result, "status_code"):
+            response = current_app.make_response(result)
+            result = response.get_json(silent=True)
+            if response.status_code >= 400:
+                return _error(result.get("message", response.status) if isinstance(result, dict) else response.status)
+            if result is None:
+                result = response.get_data(as_text=True)
+
+    if _is_error(result):
+        return _error(result.get("message") or result.get("error"))
+    return {"status": "success", "data": result}
+
+
+def run_batch(items, resolve_credentials):
+    """
+    Run batch items concurrently and return {item id: result}.
+
+    items: list of {"id", "category", "productType", "query", "params"} with unique ids
+    resolve_credentials(category, productType) -> credential row or None;
+    called once per distinct product in the batch.
+    Each result is {"status": "success", "data": ...} or {"status": "error", "message": ...}.
+    """
+    app = current_app._get_current_object()
+    results = {}
+    credentials = {}
+    futures = {}
+
+    for index, item in enumerate(items):
+        item_id = str(item.get("id", index))
+        category = item.get("category")
+        product_type = str(item.get("productType") or "")
+        connector = get_connector(category, product_type) if category and product_type else None
+        if not connector:
+            results[item_id] = _error(f"Unsupported productType: {category}/{product_type}")
+            continue
+
+        args = item_args(item)
+        required = REQUIRED_ARGS.get(category)
+        if required and not args.get(required):
+            results[item_id] = _error(f"{required} parameter is required")
+            continue
+
+        key = (category, product_type.lower())
+        if key not in credentials:
+            started = time.perf_counter()
+            try:
+                credentials[key] = resolve_credentials(category, product_type)
+            except Exception as e:
+                credentials[key] = e
+            observe_phase(category, product_type, "credentials", time.perf_counter() - started)
+        creds_entry = credentials[key]
+        if isinstance(creds_entry, Exception):
+            results[item_id] = _error(f"Credential lookup failed: {creds_entry}")
+            continue
+        if not creds_entry:
+            results[item_id] = _error("Invalid productType")
+            continue
+
+        futures[item_id] = _executor.submit(run_item, app, connector, creds_entry["credentials"], args,
+                                            labels=(category, product_type))
+
+    for item_id, future in futures.items():
+        results[item_id] = future.result()
+    return results
@@ -0,0 +1,69 @@
+import io
+from flask import Response
+from modules.streaming import STREAM_BATCH_SIZE
+
+# pyarrow is only needed for format=arrow|parquet, so it is imported on use
+MIMETYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def cursor_to_arrow(cursor, batch_size=STREAM_BATCH_SIZE):
+    """
+    Read an executed DB-API cursor into a pyarrow.Table.
+
+    Uses the driver's native Arrow fetch when it has one (Snowflake
+    fetch_arrow_all, Databricks fetchall_arrow); otherwise rows are appended
+    straight into per-column buffers with fetchmany, never building row dicts.
+    """
+    import pyarrow as pa
+
+    columns = [col[0] for col in cursor.description]
+
+    if hasattr(cursor, "fetch_arrow_all"):
+        table = cursor.fetch_arrow_all()
+        # Snowflake returns None for an empty result
+        return table if table is not None else pa.table({name: pa.array([]) for name in columns})
+
+    if hasattr(cursor, "fetchall_arrow"):
+        return cursor.fetchall_arrow()
+
+    buffers = [[] for _ in columns]
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        for row in batch:
+            for buffer, value in zip(buffers, row):
+                buffer.append(value)
+
+    return pa.table({name: pa.array(buffer) for name, buffer in zip(columns, buffers)})
+
+
+def arrow_from_ipc(payload):
+    """Decode an Arrow IPC stream (e.g. ClickHouse FORMAT ArrowStream) into a Table."""
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(payload).read_all()
+
+
+def arrow_response(result, fmt):
+    """
+    Serialize a pyarrow.Table as an Arrow IPC stream or a Parquet file.
+    Anything else (e.g. an error dict from a fetcher) is returned unchanged.
+    """
+    import pyarrow as pa
+
+    if not isinstance(result, pa.Table):
+        return result
+
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(result, sink)
+    else:
+        with pa.ipc.new_stream(sink, result.schema) as writer:
+            writer.write_table(result)
+
+    return Response(sink.getvalue(), mimetype=MIMETYPES[fmt])
@@ -1,17 +1,17 @@
 import json
-import requests
+import os
+from concurrent.futures import ThreadPoolExecutor
+from modules.sessions import session_for
+from contextlib import closing
 from flask import jsonify
-import databricks.sql
-import psycopg2
-import psycopg2.extras
-from pymongo import MongoClient
-from bson import json_util, ObjectId
-import mysql.connector
-from neo4j import GraphDatabase
-from neo4j.time import DateTime
-import oracledb
-
-def fetch_from_databricks(creds, query=None):
+from modules.sql_validator import validate_sql_query
+from modules.pools import get_pool, client_for
+from modules.streaming import stream_rows
+from modules.columnar import cursor_to_arrow
+from modules.ratelimit import bucket_for
+
+def fetch_from_databricks(creds, query=None, output="rows"):
+    import databricks.sql
     conn = None
     cursor = None
     
@@ -20,17 +20,27 @@ def fetch_from_databricks(creds, query=None):
         return {"status": "error", "message": validation["error"]}
     query = validation["query"]
 
-    try:
-        # Connect
-        conn = databricks.sql.connect(
+    def connect():
+        return databricks.sql.connect(
             server_hostname=creds["server_hostname"],
             http_path=creds["warehouse_id"],
             access_token=creds["token"]
         )
+
+    # Generator of row dicts read with fetchmany
+    if output == "stream":
+        return stream_rows(lambda: closing(connect()), query, "Databricks")
+
+    try:
+        # Connect
+        conn = connect()
         cursor = conn.cursor()
 
         cursor.execute(query)
 
+        if output == "arrow":
+            return cursor_to_arrow(cursor)
+
         # Extract results
         columns = [col[0] for col in cursor.description]
         rows = cursor.fetchall()
@@ -49,31 +59,38 @@ def fetch_from_databricks(creds, query=None):
         if conn:
             conn.close()
 
-def fetch_from_postgresql(creds, query=None):
-    conn = None
-    cur = None
-    
+def fetch_from_postgresql(creds, query=None, output="rows"):
+    import psycopg2
+    import psycopg2.extras
     validation = validate_sql_query(query, engine="PostgreSQL")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
     query = validation["query"]
 
-    try:
-        # Connect
-        conn = psycopg2.connect(
+    # Borrow a pooled connection for these credentials
+    def pool():
+        return get_pool("postgresql", creds, lambda: psycopg2.connect(
             host=creds["host"],
             port=creds["port"],
             user=creds["user"],
             password=creds["password"],
             database=creds["database"]
-        )
+        ))
 
-        # Use DictCursor so fetch results are dicts directly
-        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    # Generator of row dicts read through a server-side (named) cursor
+    if output == "stream":
+        return stream_rows(lambda: pool().connection(), query, "PostgreSQL",
+                           open_cursor=lambda conn: conn.cursor(name="unified_stream"))
 
-        # Execute
-        cur.execute(query)
-        rows = cur.fetchall()
+    try:
+        with pool().connection() as conn:
+            # Use DictCursor so fetch results are dicts directly
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
+                # Execute
+                cur.execute(query)
+                if output == "arrow":
+                    return cursor_to_arrow(cur)
+                rows = cur.fetchall()
 
         # Convert to list of dicts
         results = [dict(row) for row in rows]
@@ -85,76 +102,85 @@ def fetch_from_postgresql(creds, query=None):
             "status": "error",
             "message": f"PostgreSQL fetch failed: {str(e)}"
         }
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
-def fetch_from_supabase(creds, query=None):
+def fetch_from_supabase(creds, query=None, output="rows"):
     """
     Fetch data from Supabase using either a query or table reference.
     Args:
         creds (dict): Must have 'uri' for Supabase connection.
         query (str, optional): SQL query string.
+        output (str, optional): "rows" (default), "stream" for a row generator or "arrow" for a pyarrow.Table.
     Returns:
         list[dict]: Query results as list of dicts.
     """
-    conn = None
-    cur = None
-    
+    import psycopg2
+    import psycopg2.extras
     validation = validate_sql_query(query, engine="PostgreSQL")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
     query = validation["query"]
 
-    try:
-        conn = psycopg2.connect(creds["uri"], sslmode="require")
-        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    def pool():
+        return get_pool("supabase", creds, lambda: psycopg2.connect(creds["uri"], sslmode="require"))
+
+    if output == "stream":
+        return stream_rows(lambda: pool().connection(), query, "Supabase",
+                           open_cursor=lambda conn: conn.cursor(name="unified_stream"))
 
-        cur.execute(query)
-        rows = cur.fetchall()
+    try:
+        with pool().connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
+                cur.execute(query)
+                if output == "arrow":
+                    return cursor_to_arrow(cur)
+                rows = cur.fetchall()
         return [dict(row) for row in rows]
 
     except Exception as e:
         return {"status": "error", "message": f"Supabase fetch failed: {str(e)}"}
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
-def fetch_from_mysql(creds, query=None):
+def fetch_from_mysql(creds, query=None, output="rows"):
     """
     Fetch data from MySQL using a query or collection reference.
     Args:
         creds (dict): Must have 'host', 'port', 'user', 'password', 'database'.
         query (str, optional): SQL query string.
+        output (str, optional): "rows" (default), "stream" for a row generator or "arrow" for a pyarrow.Table.
     Returns:
         list[dict]: Query results as list of dicts.
     """
-    conn = None
-    cur = None
-    
+    import mysql.connector
     validation = validate_sql_query(query, engine="PostgreSQL")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
     query = validation["query"]
 
-    try:
-        # Connect
-        conn = mysql.connector.connect(
+    # Borrow a pooled connection for these credentials
+    def pool():
+        return get_pool("mysql", creds, lambda: mysql.connector.connect(
             host=creds["host"],
             port=creds["port"],
             user=creds["user"],
             password=creds["password"],
             database=creds["database"]
-        )
-        cur = conn.cursor(dictionary=True)  # dictionary=True => dict rows
+        ))
+
+    # Unbuffered cursor, so rows come off the socket batch by batch
+    if output == "stream":
+        return stream_rows(lambda: pool().connection(), query, "MySQL")
 
-        # Execute
-        cur.execute(query)
-        rows = cur.fetchall()
+    try:
+        with pool().connection() as conn:
+            # dictionary=True => dict rows; Arrow output reads plain tuples
+            cur = conn.cursor(dictionary=(output != "arrow"))
+            try:
+                # Execute
+                cur.execute(query)
+                if output == "arrow":
+                    return cursor_to_arrow(cur)
+                rows = cur.fetchall()
+            finally:
+                cur.close()
 
         return rows  # already dicts
 
@@ -163,13 +189,9 @@ def fetch_from_mysql(creds, query=None):
             "status": "error",
             "message": f"MySQL fetch failed: {str(e)}"
         }
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
 def serialize_document(doc):                                      # For formatting MongoDB results to JSON-friendly types
+    from bson import ObjectId
     if isinstance(doc, list):
         return [serialize_document(d) for d in doc]
     if isinstance(doc, dict):
@@ -178,7 +200,7 @@ def serialize_document(doc):                                      # For formatti
         return str(doc)
     return doc
 
-def fetch_from_mongodb(creds, query=None, collection=None, database=None, limit=None):
+def fetch_from_mongodb(creds, query=None, collection=None, database=None, limit=None, skip=None):
     """
     Fetch data from MongoDB using a query or collection reference.
     Args:
@@ -186,56 +208,56 @@ def fetch_from_mongodb(creds, query=None, collection=None, database=None, limit=
         query (str or dict, optional): MongoDB query as JSON string or dict.
         collection (str, optional): Collection name to fetch data from.
         database (str, optional): Database name if not provided in creds.
+        limit (int, optional): Max documents to return.
+        skip (int, optional): Documents to skip first (for paging).
     Returns:
         list[dict]: Query results as list of dicts.
     """
-    client = None
+    from pymongo import MongoClient
+    from bson import json_util
     try:
-        # Connect
-        client = MongoClient(creds["uri"])
-        db = client[database or creds.get("database")]
-        collection = collection or creds.get("collection")
-        if not collection:
-            raise ValueError("Collection name must be provided for MongoDB queries")
-
-        coll = db[collection]
-
-        # Decide query
-        if query:
-            try:
-                # Try parsing query if passed as JSON string
-                if isinstance(query, str):
-                    query_dict = json_util.loads(query)
-                elif isinstance(query, dict):
-                    query_dict = query
-                else:
-                    raise ValueError("MongoDB query must be a JSON string or dict")
-            except Exception as e:
-                raise ValueError(f"Invalid MongoDB query: {e}")
-        else:
-            query_dict = {}
-
-        cursor = coll.find(query_dict)
-
-        if limit:
-            cursor = cursor.limit(int(limit))
-
-        # Convert cursor to list and serialize BSON to JSON-friendly types
-        results = list(cursor)
-        return serialize_document(results)
+        # Shared client for these credentials; MongoClient pools its own connections
+        with client_for("mongodb", creds, lambda: MongoClient(creds["uri"])) as client:
+            db = client[database or creds.get("database")]
+            collection = collection or creds.get("collection")
+            if not collection:
+                raise ValueError("Collection name must be provided for MongoDB queries")
+
+            coll = db[collection]
+
+            # Decide query
+            if query:
+                try:
+                    # Try parsing query if passed as JSON string
+                    if isinstance(query, str):
+                        query_dict = json_util.loads(query)
+                    elif isinstance(query, dict):
+                        query_dict = query
+                    else:
+                        raise ValueError("MongoDB query must be a JSON string or dict")
+                except Exception as e:
+                    raise ValueError(f"Invalid MongoDB query: {e}")
+            else:
+                query_dict = {}
+
+            cursor = coll.find(query_dict)
+
+            if skip:
+                cursor = cursor.skip(int(skip))
+            if limit:
+                cursor = cursor.limit(int(limit))
+
+            # Convert cursor to list and serialize BSON to JSON-friendly types
+            results = list(cursor)
+            return serialize_document(results)
 
     except Exception as e:
         return {
             "status": "error",
             "message": f"MongoDB fetch failed: {str(e)}"
         }
-    finally:
-        if client:
-            client.close()
 
-import snowflake.connector
-
-def fetch_from_snowflake(creds, query=None, database=None, schema=None):
+def fetch_from_snowflake(creds, query=None, database=None, schema=None, output="rows"):
     """
     Fetch data from Snowflake using either a query or table reference.
     Args:
@@ -243,12 +265,11 @@ def fetch_from_snowflake(creds, query=None, database=None, schema=None):
         query (str, optional): SQL query string.
         database (str, optional): Database name if not provided in creds.
         schema (str, optional): Schema name if not provided in creds.
+        output (str, optional): "rows" (default), "stream" for a row generator or "arrow" for a pyarrow.Table.
     Returns:
         list[dict]: Query results as list of dicts.
     """
-    conn = None
-    cur = None
-    
+    import snowflake.connector
     validation = validate_sql_query(query, engine="PostgreSQL")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
@@ -260,17 +281,6 @@ def fetch_from_snowflake(creds, query=None, database=None, schema=None):
         schema = schema or creds.get("schema")
         table = creds.get("table")
 
-        # Connect
-        conn = snowflake.connector.connect(
-            user=creds["user"],
-            password=creds["password"],
-            account=creds["account"],
-            warehouse=creds["warehouse"],
-            database=database,
-            schema=schema
-        )
-        cur = conn.cursor()
-
         # Build query
         if query:
             sql_query = query.strip()
@@ -291,12 +301,34 @@ def fetch_from_snowflake(creds, query=None, database=None, schema=None):
         else:
             raise ValueError("Either query or both database and table must be provided")
 
-        # Execute
-        cur.execute(sql_query)
+        # Borrow a pooled connection (database/schema overrides are part of the key)
+        pool = get_pool("snowflake", {**creds, "database": database, "schema": schema}, lambda: snowflake.connector.connect(
+            user=creds["user"],
+            password=creds["password"],
+            account=creds["account"],
+            warehouse=creds["warehouse"],
+            database=database,
+            schema=schema
+        ))
 
-        # Extract results
-        columns = [desc[0] for desc in cur.description]
-        rows = cur.fetchall()
+        if output == "stream":
+            return stream_rows(pool.connection, sql_query, "Snowflake")
+
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                # Execute
+                cur.execute(sql_query)
+
+                # Native Arrow result batches
+                if output == "arrow":
+                    return cursor_to_arrow(cur)
+
+                # Extract results
+                columns = [desc[0] for desc in cur.description]
+                rows = cur.fetchall()
+            finally:
+                cur.close()
         results = [dict(zip(columns, row)) for row in rows]
 
         return results
@@ -306,13 +338,66 @@ def fetch_from_snowflake(creds, query=None, database=None, schema=None):
             "status": "error",
             "message": f"Snowflake fetch failed: {str(e)}"
         }
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
-def fetch_from_airtable(creds, table_name, query_params_raw=None):
+# Airtable allows 5 requests/second per base
+AIRTABLE_API_URL = os.getenv("AIRTABLE_API_URL", "https://api.airtable.com")
+AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", 5))
+
+class AirtableError(Exception):
+    """Error object returned in an Airtable API response body."""
+
+def iter_airtable_records(creds, table_name, query_params=None):
+    """
+    Generator over an Airtable table, yielding formatted records (fields + id).
+
+    The request for the next page is sent as soon as the current page arrives,
+    so the network round-trip overlaps with the caller processing the current
+    page. All requests to a base share one token bucket (5 req/s).
+    """
+    url = f"{AIRTABLE_API_URL}/v0/{creds['base_id']}/{table_name}"
+    headers = {"Authorization": f"Bearer {creds['api_key']}"}
+    bucket = bucket_for(("airtable", creds["base_id"]), AIRTABLE_RATE_LIMIT)
+
+    # Flatten params for Airtable
+    base_params = []
+    for key, value in (query_params or {}).items():
+        if isinstance(value, list):
+            for item in value:
+                base_params.append((key, item))
+        else:
+            base_params.append((key, value))
+
+    def fetch_page(offset):
+        params = base_params + ([("offset", offset)] if offset else [])
+        bucket.acquire()
+        response = session_for(url).get(url, headers=headers, params=params)
+        response.raise_for_status()
+        resp_json = response.json()
+        if 'error' in resp_json:
+            raise AirtableError(resp_json["error"]["message"])
+        return resp_json
+
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        page = prefetcher.submit(fetch_page, None)
+        while page is not None:
+            resp_json = page.result()
+
+            # Kick off the next page before handing out this one
+            offset = resp_json.get("offset")
+            page = prefetcher.submit(fetch_page, offset) if offset else None
+
+            for record in resp_json.get("records", []):
+                fields = record.get("fields", {})
+                fields["id"] = record.get("id")
+                yield fields
+
+def _stream_airtable(records):
+    try:
+        yield from records
+    except Exception as e:
+        yield {"status": "error", "message": f"Airtable fetch failed: {str(e)}"}
+
+def fetch_from_airtable(creds, table_name, query_params_raw=None, output="rows"):
     """
     Fetch records from Airtable with optional filtering, sorting, and pagination.
 
@@ -320,70 +405,35 @@ def fetch_from_airtable(creds, table_name, query_params_raw=None):
         creds (dict): Airtable credentials with keys 'base_id' and 'api_key'.
         table_name (str): Airtable table name.
         query_params_raw (str, optional): Raw query parameters (JSON or Airtable formula).
+        output (str, optional): "rows" (default) or "stream" for a record generator.
 
     Returns:
         tuple: (Flask Response, HTTP status code)
     """
-    try:
-        # Build API endpoint & headers
-        url = f"https://api.airtable.com/v0/{creds['base_id']}/{table_name}"
-        headers = {"Authorization": f"Bearer {creds['api_key']}"}
-
-        # Parse incoming query params
-        query_params = {}
-        if query_params_raw:
-            try:
-                query_params = json.loads(query_params_raw)  # JSON-based query
-            except json.JSONDecodeError:
-                query_params = {"filterByFormula": query_params_raw}  # formula string
-                if not isinstance(query_params_raw, str):
-                    return {"valid": False, "error": "Airtable params must be JSON or formula string"}
-
-        all_records = []
-        offset = None
-
-        while True:
-            # Flatten params for Airtable
-            params = []
-            for key, value in query_params.items():
-                if isinstance(value, list):
-                    for item in value:
-                        params.append((key, item))
-                else:
-                    params.append((key, value))
-
-            if offset:
-                params.append(("offset", offset))
-
-            # Make request
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            resp_json = response.json()
-
-            if 'error' in resp_json:
-                return jsonify({
-                    "status": "error",
-                    "message": resp_json["error"]["message"]
-                }), 400
-
-            # Add new batch of records
-            records = resp_json.get("records", [])
-            all_records.extend(records)
-
-            # Handle pagination
-            offset = resp_json.get("offset")
-            if not offset:
-                break
-
-        # Format clean output (fields + id)
-        formatted_data = []
-        for record in all_records:
-            fields = record.get("fields", {})
-            fields["id"] = record.get("id")
-            formatted_data.append(fields)
+    # Parse incoming query params
+    query_params = {}
+    if query_params_raw:
+        try:
+            query_params = json.loads(query_params_raw)  # JSON-based query
+        except json.JSONDecodeError:
+            query_params = {"filterByFormula": query_params_raw}  # formula string
+            if not isinstance(query_params_raw, str):
+                return {"valid": False, "error": "Airtable params must be JSON or formula string"}
+
+    records = iter_airtable_records(creds, table_name, query_params)
+    if output == "stream":
+        return _stream_airtable(records)
 
+    try:
+        formatted_data = list(records)
         return formatted_data, 200
 
+    except AirtableError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -391,6 +441,7 @@ def fetch_from_airtable(creds, table_name, query_params_raw=None):
         }), 500
 
 def serialize_value(value):                                               # Convert Neo4j values to JSON-friendly types
+    from neo4j.time import DateTime
     # Convert Neo4j special types to JSON-friendly ones
     if isinstance(value, DateTime):
         return value.iso_format()  # or str(value) if you want a simple string
@@ -411,7 +462,7 @@ def fetch_from_neo4j(creds, query=None):
     Returns:
         list[dict]: Query results as list of dicts.
     """
-    driver = None
+    from neo4j import GraphDatabase
     if not query or not query.strip():
         return {"error": "Neo4j: Query must be provided"}
     
@@ -425,14 +476,15 @@ def fetch_from_neo4j(creds, query=None):
         return {"error": f"Neo4j: Forbidden keyword detected"}
     
     try:
-        # Connect to Neo4j
-        driver = GraphDatabase.driver(
-            creds["uri"],
-            auth=(creds["username"], creds["password"])
-        )
+        # Shared driver for these credentials; it keeps its own connection pool
+        def connect():
+            return GraphDatabase.driver(
+                creds["uri"],
+                auth=(creds["username"], creds["password"])
+            )
 
         # Run query
-        with driver.session(database=creds.get("database", "neo4j")) as session:
+        with client_for("neo4j", creds, connect) as driver, driver.session(database=creds.get("database", "neo4j")) as session:
             results = session.run(query)
             data = []
             for record in results:
@@ -447,24 +499,20 @@ def fetch_from_neo4j(creds, query=None):
             "status": "error",
             "message": f"Neo4j fetch failed: {str(e)}"
         }
-    finally:
-        if driver:
-            driver.close()
 
-def fetch_from_oracle(creds, query=None, version=None):
+def fetch_from_oracle(creds, query=None, version=None, output="rows"):
     """
     Fetch data from Oracle 19c using python-oracledb (thin mode).
     
     Args:
         creds (dict): Must have 'host', 'port', 'user', 'password', 'service_name'
         query (str): SQL SELECT query
+        output (str, optional): "rows" (default), "stream" for a row generator or "arrow" for a pyarrow.Table
 
     Returns:
         list[dict]: Query results as list of dicts
     """
-    conn = None
-    cur = None
-
+    import oracledb
     validation = validate_sql_query(query, engine="oraclec")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
@@ -483,20 +531,27 @@ def fetch_from_oracle(creds, query=None, version=None):
             service_name=creds["service_name"]
         )
 
-        # Connect
-        conn = oracledb.connect(
+        # Borrow a pooled connection (the resolved user is part of the key)
+        pool = get_pool("oracle", {**creds, "user": user}, lambda: oracledb.connect(
             user=user,
             password=creds["password"],
             dsn=dsn
-        )
-        cur = conn.cursor()
+        ), ping="SELECT 1 FROM DUAL")
 
-        # Execute query
-        cur.execute(query)
+        if output == "stream":
+            return stream_rows(pool.connection, query, "oraclec")
 
-        # Extract results
-        columns = [col[0] for col in cur.description]
-        rows = cur.fetchall()
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                # Execute query
+                cur.execute(query)
+
+                if output == "arrow":
+                    return cursor_to_arrow(cur)
+
+                # Extract results
+                columns = [col[0] for col in cur.description]
+                rows = cur.fetchall()
         results = [dict(zip(columns, row)) for row in rows]
 
         return results
@@ -506,40 +561,3 @@ def fetch_from_oracle(creds, query=None, version=None):
             "status": "error",
             "message": f"oraclec fetch failed: {str(e)}"
         }
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-
-
-def validate_sql_query(query: str, engine: str = "generic"):
-    """
-    Validate a SQL query to ensure safety (read-only, correct format).
-    
-    Args:
-        query (str): The SQL query string
-        engine (str): Name of the engine (used for error messages/logging)
-    
-    Returns:
-        dict: {"valid": True, "query": query} or {"valid": False, "error": "..."}
-    """
-    if not query or not query.strip():
-        return {"valid": False, "error": f"{engine}: Query must be provided"}
-    
-    lowered = query.strip().lower()
-
-    # must start with SELECT
-    if not lowered.startswith("select"):
-        return {"valid": False, "error": f"{engine}: Only SELECT queries are allowed"}
-    
-    # block forbidden keywords
-    forbidden = ["insert", "update", "delete", "drop", "alter", "truncate", "create", "grant", "revoke"]
-    if any(f" {word} " in lowered for word in forbidden):
-        return {"valid": False, "error": f"{engine}: Forbidden keyword detected"}
-    
-    # must contain FROM
-    if " from " not in lowered:
-        return {"valid": False, "error": f"{engine}: Invalid query (missing FROM clause)"}
-
-    return {"valid": True, "query": query}
\ No newline at end of file
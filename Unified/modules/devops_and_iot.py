@@ -1,37 +1,47 @@
-import requests
-import psycopg2
-import redis
-from elasticsearch import Elasticsearch
-from opensearchpy import OpenSearch
+from modules.sessions import session_for, connector_timeout
 import time
-from influxdb_client import InfluxDBClient
+from modules.columnar import cursor_to_arrow, arrow_from_ipc
+from modules.sql_validator import validate_sql_query
+from modules.pools import client_for
 
-def fetch_from_clickhouse(creds, query):
+# Analytical queries can run for minutes, so ClickHouse has no read limit unless one is set
+CLICKHOUSE_TIMEOUT = connector_timeout("UNIFIED_CLICKHOUSE_READ_TIMEOUT", read=None)
+
+def fetch_from_clickhouse(creds, query, output="rows"):
     """
     creds: { 'base_url': str, 'user': str, 'password': str, 'database': str (optional) }
     query: SQL string to execute on ClickHouse
+    output: "rows" (default, FORMAT JSON) or "arrow" (FORMAT ArrowStream -> pyarrow.Table)
     """
     validation = validate_sql_query(query, engine="ClickHouse")
     if not validation["valid"]:
         return {"status": "error", "message": validation["error"]}
     query = validation["query"]
     try:
+        if output == "arrow":
+            # Let ClickHouse build the columns itself
+            if query.strip().lower().endswith("format json"):
+                query = query.strip()[:-len("format json")]
+            query = f"{query.strip()} FORMAT ArrowStream"
         # Ensure FORMAT JSON for structured output
-        if not query.strip().lower().endswith("format json"):
+        elif not query.strip().lower().endswith("format json"):
             query = f"{query.strip()} FORMAT JSON"
 
         params = {}
         if 'database' in creds:
             params['database'] = creds['database']
 
-        resp = requests.post(
+        resp = session_for(creds['base_url']).post(
             creds['base_url'], 
             params=params,
             data=query.encode("utf-8"),  # Explicit encoding for safety
             auth=(creds['user'], creds['password']),
-            headers={"Content-Type": "text/plain"}  # ClickHouse expects raw SQL
+            headers={"Content-Type": "text/plain"},  # ClickHouse expects raw SQL
+            timeout=CLICKHOUSE_TIMEOUT
         )
         resp.raise_for_status()
+        if output == "arrow":
+            return arrow_from_ipc(resp.content)
         return resp.json()
 
     except Exception as e:
@@ -51,7 +61,7 @@ def fetch_from_tempo(creds, query, endpoint="search"):
     
     try:
         url = f"{creds['base_url']}/api/{endpoint}"
-        resp = requests.get(url, params=query, auth=(creds['username'], creds['api_token']))
+        resp = session_for(url).get(url, params=query, auth=(creds['username'], creds['api_token']))
         resp.raise_for_status()
         return resp.json()
     except Exception as e:
@@ -81,7 +91,7 @@ def fetch_from_loki(creds, query, minutes):
             "end": end,
             "direction": "backward"
         }
-        resp = requests.get(url, params=params,
+        resp = session_for(url).get(url, params=params,
                             auth=(creds['username'], creds['api_token']))
         resp.raise_for_status()
         return resp.json()
@@ -97,7 +107,7 @@ def fetch_from_prometheus(creds, query):
         return {"status": "error", "message": "Prometheus: query must be a string"}
     try:
         url = f"{creds['base_url']}/api/prom/api/v1/query"
-        resp = requests.get(url, params={"query": query}, auth=(creds['username'], creds['api_token']))
+        resp = session_for(url).get(url, params={"query": query}, auth=(creds['username'], creds['api_token']))
         resp.raise_for_status()
         return resp.json()
     except Exception as e:
@@ -108,6 +118,7 @@ def fetch_from_influxdb(creds, flux_query):
     creds: { 'url': str, 'token': str, 'bucket': str, 'org': str }
     flux_query: Flux language query
     """
+    from influxdb_client import InfluxDBClient
     if not flux_query or not isinstance(flux_query, str):
         return {"status": "error", "message": "InfluxDB: query must be a string"}
 
@@ -116,9 +127,9 @@ def fetch_from_influxdb(creds, flux_query):
         return {"status": "error", "message": "InfluxDB: forbidden keyword detected"}
     
     try:
-        client = InfluxDBClient(url=creds["url"], token=creds["token"], org=creds["org"])
-        query_api = client.query_api()
-        result = query_api.query(org=creds["org"], query=flux_query)
+        with client_for("influxdb", creds, lambda: InfluxDBClient(url=creds["url"], token=creds["token"], org=creds["org"])) as client:
+            query_api = client.query_api()
+            result = query_api.query(org=creds["org"], query=flux_query)
         
         # Convert results to list of dicts (like SQL)
         data = [record.values for table in result for record in table.records]
@@ -127,11 +138,13 @@ def fetch_from_influxdb(creds, flux_query):
     except Exception as e:
         return {"status": "error", "message": f"InfluxDB fetch failed: {str(e)}"}
 
-def fetch_from_timescaledb(creds, query):
+def fetch_from_timescaledb(creds, query, output="rows"):
     """
     creds: { 'host': str, 'port': int, 'user': str, 'password': str, 'database': str }
     query: SQL query string
+    output: "rows" (default) or "arrow" for a pyarrow.Table
     """
+    import psycopg2
     if query != "LIST_TABLES":
         validation = validate_sql_query(query, engine="TimescaleDB")
         if not validation["valid"]:
@@ -150,6 +163,8 @@ def fetch_from_timescaledb(creds, query):
         )
         cursor = conn.cursor()
         cursor.execute(query)
+        if output == "arrow":
+            return cursor_to_arrow(cursor)
         columns = [desc[0] for desc in cursor.description]
         rows = cursor.fetchall()
         return [dict(zip(columns, row)) for row in rows]
@@ -165,26 +180,30 @@ def fetch_from_redis(creds, command, args_str=""):
     command: Redis command name (string)
     args_str: comma-separated string of command arguments
     """
+    import redis
     allowed_commands = {"get", "mget", "hget", "hgetall", "lrange", "scan"}
     if command.lower() not in allowed_commands:
         return {"status": "error", "message": f"Redis: command '{command}' not allowed"}
 
     try:
-        r = redis.Redis(
-            host=creds['host'],
-            port=creds['port'],
-            username=creds.get('username'),
-            password=creds.get('password'),
-            decode_responses=True
-        )
-        func = getattr(r, command.lower(), None)
-        if not func:
-            raise ValueError(f"Unsupported Redis command: {command}")
+        def connect():
+            return redis.Redis(
+                host=creds['host'],
+                port=creds['port'],
+                username=creds.get('username'),
+                password=creds.get('password'),
+                decode_responses=True
+            )
+
+        with client_for("redis", creds, connect) as r:
+            func = getattr(r, command.lower(), None)
+            if not func:
+                raise ValueError(f"Unsupported Redis command: {command}")
 
-        # Split comma-separated args and strip spaces
-        args = [arg.strip() for arg in args_str.split(",")] if args_str else []
+            # Split comma-separated args and strip spaces
+            args = [arg.strip() for arg in args_str.split(",")] if args_str else []
 
-        return func(*args)
+            return func(*args)
     except Exception as e:
         return {"status": "error", "message": f"Redis fetch failed: {str(e)}"}
     
@@ -194,6 +213,7 @@ def fetch_from_elasticsearch(creds, dsl_query, index):
     index: Elasticsearch index name
     dsl_query: dict representing Elasticsearch query DSL
     """
+    from elasticsearch import Elasticsearch
     if not isinstance(dsl_query, dict):
         return {"status": "error", "message": "Elasticsearch: query must be a dict"}
 
@@ -205,12 +225,14 @@ def fetch_from_elasticsearch(creds, dsl_query, index):
         return {"status": "error", "message": "Elasticsearch: forbidden operation detected"}
 
     try:
-        es = Elasticsearch(
-            cloud_id=creds["cloud_id"],
-            basic_auth=(creds["username"], creds["password"])
-        )
+        def connect():
+            return Elasticsearch(
+                cloud_id=creds["cloud_id"],
+                basic_auth=(creds["username"], creds["password"])
+            )
 
-        resp = es.search(index=index, body=dsl_query)
+        with client_for("elasticsearch", creds, connect) as es:
+            resp = es.search(index=index, body=dsl_query)
         return resp
 
     except Exception as e:
@@ -225,6 +247,7 @@ def fetch_from_opensearch(creds, dsl_query, index):
     index: OpenSearch index name
     dsl_query: dict representing OpenSearch DSL query
     """
+    from opensearchpy import OpenSearch
     if not isinstance(dsl_query, dict):
         return {"status": "error", "message": "OpenSearch: query must be a dict"}
 
@@ -236,13 +259,16 @@ def fetch_from_opensearch(creds, dsl_query, index):
         return {"status": "error", "message": "OpenSearch: forbidden operation detected"}
 
     try:
-        client = OpenSearch(
-            hosts=[creds["host"]],
-            http_auth=(creds["username"], creds["password"]),
-            use_ssl=creds["host"].startswith("https"),
-            verify_certs=False
-        )
-        resp = client.search(index=index, body=dsl_query)
+        def connect():
+            return OpenSearch(
+                hosts=[creds["host"]],
+                http_auth=(creds["username"], creds["password"]),
+                use_ssl=creds["host"].startswith("https"),
+                verify_certs=False
+            )
+
+        with client_for("opensearch", creds, connect) as client:
+            resp = client.search(index=index, body=dsl_query)
         return resp
 
     except Exception as e:
@@ -250,35 +276,3 @@ def fetch_from_opensearch(creds, dsl_query, index):
             "status": "error",
             "message": f"OpenSearch fetch failed: {str(e)}"
         }
-
-
-def validate_sql_query(query: str, engine: str = "generic"):
-    """
-    Validate a SQL query to ensure safety (read-only, correct format).
-    
-    Args:
-        query (str): The SQL query string
-        engine (str): Name of the engine (used for error messages/logging)
-    
-    Returns:
-        dict: {"valid": True, "query": query} or {"valid": False, "error": "..."}
-    """
-    if not query or not query.strip():
-        return {"valid": False, "error": f"{engine}: Query must be provided"}
-    
-    lowered = query.strip().lower()
-
-    # must start with SELECT
-    if not lowered.startswith("select"):
-        return {"valid": False, "error": f"{engine}: Only SELECT queries are allowed"}
-    
-    # block forbidden keywords
-    forbidden = ["insert", "update", "delete", "drop", "alter", "truncate", "create", "grant", "revoke"]
-    if any(f" {word} " in lowered for word in forbidden):
-        return {"valid": False, "error": f"{engine}: Forbidden keyword detected"}
-    
-    # must contain FROM
-    if " from " not in lowered:
-        return {"valid": False, "error": f"{engine}: Invalid query (missing FROM clause)"}
-
-    return {"valid": True, "query": query}
\ No newline at end of file
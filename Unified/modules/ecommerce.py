@@ -1,5 +1,5 @@
-import requests
-from flask import jsonify
+from modules.sessions import session_for
+from sqlite.helper_functions.zoho_tokens import zoho_tokens
 
 def fetch_from_zoho_crm(creds, endpoint, params=None):
     """
@@ -24,27 +24,19 @@ def fetch_from_zoho_crm(creds, endpoint, params=None):
         if params is None:
             params = {}
 
-        # 1. Get a new access token using refresh token
-        token_url = "https://accounts.zoho.in/oauth/v2/token"
-        token_data = {
-            "grant_type": "refresh_token",
-            "client_id": creds["client_id"],
-            "client_secret": creds["client_secret"],
-            "refresh_token": creds["refresh_token"]
-        }
-        token_response = requests.post(token_url, data=token_data)
-        token_response.raise_for_status()
-        access_token = token_response.json()["access_token"]
-
-        # 2. Add organization_id if present
+        # 1. Add organization_id if present
         org_id = creds.get("organization_id")
         if org_id:
             params["organization_id"] = org_id
 
-        # 3. Make the actual API request
+        # 2. Make the actual API request with a cached access token (refreshed once on 401)
         url = f"https://www.zohoapis.in/crm/v2/{endpoint.lstrip('/')}"
-        headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
-        response = requests.get(url, headers=headers, params=params)
+
+        def send(access_token):
+            headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
+            return session_for(url).get(url, headers=headers, params=params)
+
+        response = zoho_tokens.call(creds, send, post=session_for(zoho_tokens.token_url).post)
         response.raise_for_status()
         return response.json()
 
@@ -81,9 +73,9 @@ def fetch_from_wix(creds, endpoint, params=None, scope=None):
     
     try:
         if "/query" in endpoint:  # POST endpoints
-            response = requests.post(url, headers=headers, json=params)
+            response = session_for(url).post(url, headers=headers, json=params)
         else:  # GET endpoints
-            response = requests.get(url, headers=headers, params=params)
+            response = session_for(url).get(url, headers=headers, params=params)
 
         response.raise_for_status()
         return response.json()
@@ -114,7 +106,7 @@ def fetch_from_woocommerce(creds, endpoint, params=None):
             'consumer_secret': creds['consumer_secret']
         })
 
-        resp = requests.get(
+        resp = session_for(url).get(
             url,
             params=params,
             timeout=10,
@@ -136,7 +128,7 @@ def fetch_from_shopify(creds, endpoint, params=None):
             params = {}
         url = f"https://{creds['store_url'].rstrip('/')}/{endpoint.lstrip('/')}"
         headers = {"X-Shopify-Access-Token": creds['access_token']}
-        response = requests.get(url, headers=headers, params=params)
+        response = session_for(url).get(url, headers=headers, params=params)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -0,0 +1,587 @@
+"""
+Federated queries: run sub-queries on several connectors in parallel, then
+hash-join and aggregate the results in the gateway with pyarrow.
+
+Sources whose results outgrow their share of FEDERATION_MEMORY_LIMIT are
+spilled to Parquet files. Joins whose inputs exceed the limit switch to a
+grace hash join: both sides are hash-partitioned on the join keys to disk
+and joined one partition at a time.
+"""
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from modules.batch import item_args, run_item
+from modules.metrics import connector_scope, observe_phase, phase
+from modules.registry import get_connector, REQUIRED_ARGS
+from modules.streaming import STREAM_BATCH_SIZE
+
+FEDERATION_MEMORY_LIMIT = int(os.getenv("UNIFIED_FEDERATION_MEMORY_LIMIT", 512 * 1024 * 1024))
+FEDERATION_SPILL_DIR = os.getenv("UNIFIED_FEDERATION_SPILL_DIR") or None  # None = system temp dir
+FEDERATION_WORKERS = int(os.getenv("UNIFIED_FEDERATION_WORKERS", 8))
+FEDERATION_MAX_SOURCES = int(os.getenv("UNIFIED_FEDERATION_MAX_SOURCES", 8))
+FEDERATION_MAX_PARTITIONS = 256
+
+JOIN_TYPES = {"inner": "inner", "left": "left outer", "right": "right outer", "outer": "full outer"}
+AGGREGATE_FUNCTIONS = {"sum", "mean", "min", "max", "count", "count_distinct"}
+
+_executor = ThreadPoolExecutor(max_workers=FEDERATION_WORKERS, thread_name_prefix="unified-federation")
+
+
+class FederationError(ValueError):
+    """Invalid federated query spec or a source that could not be loaded."""
+
+
+class Side:
+    """A join input or result: an in-memory pyarrow.Table or a Parquet file on disk."""
+
+    def __init__(self, table=None, path=None):
+        self.table = table
+        self.path = path
+
+    @property
+    def spilled(self):
+        return self.path is not None
+
+    @property
+    def schema(self):
+        import pyarrow.parquet as pq
+        return self.table.schema if self.table is not None else pq.read_schema(self.path)
+
+    @property
+    def nbytes(self):
+        import pyarrow.parquet as pq
+        if self.table is not None:
+            return self.table.nbytes
+        metadata = pq.ParquetFile(self.path).metadata
+        return sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+
+    @property
+    def num_rows(self):
+        import pyarrow.parquet as pq
+        return self.table.num_rows if self.table is not None else pq.ParquetFile(self.path).metadata.num_rows
+
+    def batches(self):
+        import pyarrow.parquet as pq
+        if self.table is not None:
+            return self.table.to_batches(max_chunksize=STREAM_BATCH_SIZE)
+        return pq.ParquetFile(self.path).iter_batches(batch_size=STREAM_BATCH_SIZE)
+
+    def read(self):
+        import pyarrow.parquet as pq
+        return self.table if self.table is not None else pq.read_table(self.path)
+
+
+def _merge_schemas(current, incoming):
+    """
+    Schema holding both: columns in first-seen order, types widened (null ->
+    anything, int -> float, ...) and columns with no common type as strings.
+    """
+    import pyarrow as pa
+    try:
+        return pa.unify_schemas([current, incoming], promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+    fields = {field.name: field for field in current}
+    for field in incoming:
+        known = fields.get(field.name)
+        if known is None:
+            fields[field.name] = field
+            continue
+        try:
+            fields[field.name] = pa.unify_schemas(
+                [pa.schema([known]), pa.schema([field])], promote_options="permissive"
+            ).field(0)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            fields[field.name] = pa.field(field.name, pa.string())
+    return pa.schema(list(fields.values()))
+
+
+def _conform(table, schema):
+    """table with schema's columns: missing ones as nulls, others cast (or stringified) to its types."""
+    import pyarrow as pa
+    if table.schema == schema:
+        return table
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        if column.type != field.type:
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                column = pa.array([
+                    None if v is None else json.dumps(v, default=str) if isinstance(v, (dict, list)) else str(v)
+                    for v in column.to_pylist()
+                ], type=field.type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class _SpillingWriter:
+    """
+    Collects record batches in memory and moves them to a Parquet file once over
+    budget. Chunks may differ in schema (stream sources omit empty fields, a
+    column can be all null at first); the schema grows to cover all of them.
+    """
+
+    def __init__(self, budget, path):
+        self.budget = budget
+        self.path = path
+        self._batches = []
+        self._bytes = 0
+        self._writer = None
+        self._schema = None
+        self._file = path  # file being written; differs from path after a rewrite
+        self._rewrites = 0
+
+    def write(self, table):
+        import pyarrow.parquet as pq
+        schema = table.schema if self._schema is None else _merge_schemas(self._schema, table.schema)
+        if self._writer is None:
+            self._schema = schema
+            self._batches.append(table)
+            self._bytes += table.nbytes
+            if self._bytes <= self.budget:
+                return
+            self._writer = pq.ParquetWriter(self._file, self._schema)
+            pending, self._batches = self._batches, []
+            for chunk in pending:
+                self._writer.write_table(_conform(chunk, self._schema))
+            return
+        if schema != self._schema:
+            self._rewrite(schema)
+        self._writer.write_table(_conform(table, self._schema))
+
+    def _rewrite(self, schema):
+        """Copy what was spilled so far into a new file with the widened schema (once per new column or type)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._writer.close()
+        previous = self._file
+        self._rewrites += 1
+        self._file = f"{self.path}.{self._rewrites}"
+        self._schema = schema
+        self._writer = pq.ParquetWriter(self._file, schema)
+        for batch in pq.ParquetFile(previous).iter_batches(batch_size=STREAM_BATCH_SIZE):
+            self._writer.write_table(_conform(pa.Table.from_batches([batch]), schema))
+        os.remove(previous)
+
+    def close(self, schema=None):
+        import pyarrow as pa
+        if self._writer is not None:
+            self._writer.close()
+            if self._file != self.path:
+                os.replace(self._file, self.path)
+            return Side(path=self.path)
+        if not self._batches:
+            return Side(table=(schema or pa.schema([])).empty_table())
+        return Side(table=pa.concat_tables([_conform(chunk, self._schema) for chunk in self._batches]))
+
+
+def _column(values):
+    """Arrow array for a list of JSON values; mixed or nested types fall back to strings."""
+    import pyarrow as pa
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([
+            None if v is None else json.dumps(v, default=str) if isinstance(v, (dict, list)) else str(v)
+            for v in values
+        ], type=pa.string())
+
+
+def rows_to_table(rows):
+    """pyarrow.Table from a list of dicts, using the union of keys across all rows."""
+    import pyarrow as pa
+    names = list(dict.fromkeys(key for row in rows for key in row))
+    return pa.table({name: _column([row.get(name) for row in rows]) for name in names})
+
+
+def extract_rows(data, rows_path=None):
+    """
+    The list of records in a connector result.
+    rows_path: dotted path to the list (e.g. "hits.hits"); without it a bare list
+    is used as-is and a dict must contain exactly one list of objects.
+    """
+    if rows_path:
+        for part in rows_path.split("."):
+            if not isinstance(data, dict) or part not in data:
+                raise FederationError(f"rows_path '{rows_path}' not found in result")
+            data = data[part]
+    elif isinstance(data, dict):
+        candidates = [v for v in data.values() if isinstance(v, list) and all(isinstance(r, dict) for r in v)]
+        if len(candidates) != 1:
+            raise FederationError("result is not a list of rows; set rows_path")
+        data = candidates[0]
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise FederationError("result is not a list of rows")
+    return data
+
+
+def _prefixed(table, alias):
+    return table.rename_columns([f"{alias}.{name}" for name in table.column_names])
+
+
+def _timed_rows(rows):
+    """Iterate a row stream, counting the time spent waiting on the upstream as connector time."""
+    rows = iter(rows)
+    while True:
+        with phase("connector"):
+            row = next(rows, None)
+        if row is None:
+            return
+        yield row
+
+
+def _load_source(app, source, connector, creds, budget, spill_dir):
+    """Run one sub-query and return (alias, Side) with columns named "<alias>.<column>"."""
+    with connector_scope(source["category"], source["productType"]) as scope:
+        alias, side = _read_source(app, source, connector, creds, budget, spill_dir)
+        scope.rows += side.num_rows
+        return alias, side
+
+
+def _read_source(app, source, connector, creds, budget, spill_dir):
+    import pyarrow as pa
+    alias = source["alias"]
+    output = "arrow" if connector.columnar else "stream" if connector.stream else "rows"
+    result = run_item(app, connector, creds, item_args(source), output)
+    if result["status"] != "success":
+        raise FederationError(f"source '{alias}' failed: {result['message']}")
+    data = result["data"]
+
+    writer = _SpillingWriter(budget, os.path.join(spill_dir, f"source-{alias}.parquet"))
+    if isinstance(data, pa.Table):
+        writer.write(_prefixed(data, alias))
+    elif output == "stream" and not isinstance(data, (list, dict)):
+        chunk = []
+        for row in _timed_rows(data):
+            if row.get("status") == "error" and "message" in row and len(row) == 2:
+                raise FederationError(f"source '{alias}' failed: {row['message']}")
+            chunk.append(row)
+            if len(chunk) >= STREAM_BATCH_SIZE:
+                writer.write(_prefixed(rows_to_table(chunk), alias))
+                chunk = []
+        if chunk:
+            writer.write(_prefixed(rows_to_table(chunk), alias))
+    else:
+        writer.write(_prefixed(rows_to_table(extract_rows(data, source.get("rows_path"))), alias))
+    return alias, writer.close()
+
+
+def _key_hash(column):
+    """Deterministic int64 hash per row of an Arrow column (its string form), vectorised with numpy."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    try:
+        column = pc.cast(column, pa.large_string())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        raise FederationError(f"join keys must be scalar values, not {column.type}")
+
+    n = len(column)
+    offsets = np.frombuffer(column.buffers()[1], dtype=np.int64)[column.offset:column.offset + n + 1]
+    lengths = np.diff(offsets)
+    data_buffer = column.buffers()[2]
+    if n == 0 or offsets[-1] == offsets[0] or data_buffer is None:
+        return lengths.astype(np.int64)
+
+    data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]].astype(np.float64)
+    row_of_byte = np.repeat(np.arange(n), lengths)
+    position = np.arange(len(data)) - np.repeat(offsets[:-1] - offsets[0], lengths)
+    # Per-position weights keep "ab" and "ba" apart; sums stay exact in float64
+    weights = (np.arange(1, 17, dtype=np.float64) * 40503) % 65521
+    hashed = np.bincount(row_of_byte, weights=data * weights[position % 16], minlength=n)
+    return hashed.astype(np.int64) * 31 + lengths
+
+
+def _partition_ids(batch, keys, partitions):
+    import numpy as np
+    combined = np.zeros(batch.num_rows, dtype=np.int64)
+    for key in keys:
+        combined = (combined * 31 + _key_hash(batch.column(key)) % 2147483647) % 2147483647
+    return combined % partitions
+
+
+def _partition_to_disk(side, keys, partitions, directory, name):
+    """Hash-partition a side into `partitions` Parquet files; returns their paths."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    paths = [os.path.join(directory, f"{name}-{p}.parquet") for p in range(partitions)]
+    schema = side.schema
+    writers = [None] * partitions
+    try:
+        for batch in side.batches():
+            if batch.num_rows == 0:
+                continue
+            ids = _partition_ids(batch, keys, partitions)
+            order = np.argsort(ids, kind="stable")
+            counts = np.bincount(ids, minlength=partitions)
+            grouped = pa.Table.from_batches([batch]).take(pa.array(order))
+            start = 0
+            for p, count in enumerate(counts):
+                if count:
+                    if writers[p] is None:
+                        writers[p] = pq.ParquetWriter(paths[p], schema)
+                    writers[p].write_table(grouped.slice(start, count))
+                    start += count
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+    for p, writer in enumerate(writers):
+        if writer is None:
+            pq.write_table(schema.empty_table(), paths[p])
+    return paths
+
+
+def _align_key_types(left, right, left_keys, right_keys):
+    """Cast mismatched key pairs (e.g. int vs string from a REST source) to string on both sides."""
+    import pyarrow as pa
+    left_schema, right_schema = left.schema, right.schema
+    cast_left, cast_right = {}, {}
+    for lk, rk in zip(left_keys, right_keys):
+        if left_schema.field(lk).type != right_schema.field(rk).type:
+            cast_left[lk] = pa.string()
+            cast_right[rk] = pa.string()
+    return cast_left, cast_right
+
+
+def _cast_columns(table, casts):
+    if not casts:
+        return table
+    for name, type_ in casts.items():
+        index = table.column_names.index(name)
+        table = table.set_column(index, name, table.column(name).cast(type_))
+    return table
+
+
+def hash_join(left, right, left_keys, right_keys, join_type, memory_limit, spill_dir, name):
+    """
+    Join two Sides; returns (Side, partitions used). In memory when both fit in
+    memory_limit, otherwise a grace hash join over Parquet partitions.
+    """
+    for key in left_keys:
+        if key not in left.schema.names:
+            raise FederationError(f"unknown join column '{key}'")
+    for key in right_keys:
+        if key not in right.schema.names:
+            raise FederationError(f"unknown join column '{key}'")
+    cast_left, cast_right = _align_key_types(left, right, left_keys, right_keys)
+
+    def join(l, r):
+        return _cast_columns(l, cast_left).join(
+            _cast_columns(r, cast_right), keys=left_keys, right_keys=right_keys,
+            join_type=JOIN_TYPES[join_type], coalesce_keys=False
+        )
+
+    total = left.nbytes + right.nbytes
+    if not left.spilled and not right.spilled and total <= memory_limit:
+        return Side(table=join(left.table, right.table)), 1
+
+    # Each partition pair should fit in about half the budget, leaving room for the hash table
+    partitions = min(FEDERATION_MAX_PARTITIONS, max(2, math.ceil(total / max(memory_limit // 2, 1))))
+    left_paths = _partition_to_disk(left, left_keys, partitions, spill_dir, f"{name}-left")
+    right_paths = _partition_to_disk(right, right_keys, partitions, spill_dir, f"{name}-right")
+
+    import pyarrow.parquet as pq
+    writer = _SpillingWriter(memory_limit // 2, os.path.join(spill_dir, f"{name}-result.parquet"))
+    schema = None
+    for left_path, right_path in zip(left_paths, right_paths):
+        joined = join(pq.read_table(left_path), pq.read_table(right_path))
+        schema = schema or joined.schema
+        if joined.num_rows:
+            writer.write(joined)
+        os.remove(left_path)
+        os.remove(right_path)
+    return writer.close(schema), partitions
+
+
+def _group_aggregate(table, keys, aggregations, names):
+    """group_by().aggregate() with the aggregate columns renamed to `names`, whatever order pyarrow emits."""
+    result = table.group_by(keys).aggregate(aggregations)
+    names = iter(names)
+    return result.rename_columns([name if name in keys else next(names) for name in result.column_names])
+
+
+def aggregate(side, group_by, aggregates):
+    """GROUP BY + aggregates over a Side; spilled inputs are aggregated chunk by chunk and combined."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    names = side.schema.names
+    for column in list(group_by) + [agg["column"] for agg in aggregates]:
+        if column not in names:
+            raise FederationError(f"unknown column '{column}'")
+
+    if not side.spilled:
+        return _group_aggregate(side.table, group_by, [(agg["column"], agg["function"]) for agg in aggregates],
+                                [agg["as"] for agg in aggregates])
+
+    # Two phases: partial aggregates per chunk, then combine the partials.
+    # mean = sum(sum) / sum(count); count = sum(count); count_distinct needs the distinct values.
+    partial, combine, distinct_columns = [], [], []
+    for i, agg in enumerate(aggregates):
+        column, function = agg["column"], agg["function"]
+        if function == "mean":
+            partial += [(column, "sum", f"_{i}_sum"), (column, "count", f"_{i}_count")]
+            combine += [(f"_{i}_sum", "sum", f"_{i}_sum"), (f"_{i}_count", "sum", f"_{i}_count")]
+        elif function == "count_distinct":
+            distinct_columns.append(column)
+        else:
+            partial.append((column, function, f"_{i}"))
+            combine.append((f"_{i}", "sum" if function in ("count", "sum") else function, f"_{i}"))
+    if aggregates:
+        # Keeps every group in the partials even when only count_distinct was asked for
+        partial.append((aggregates[0]["column"], "count", "_rows"))
+        combine.append(("_rows", "sum", "_rows"))
+
+    partials, distincts = [], {column: [] for column in distinct_columns}
+    for batch in side.batches():
+        chunk = pa.Table.from_batches([batch])
+        partials.append(_group_aggregate(chunk, group_by, [(c, f) for c, f, _ in partial], [n for _, _, n in partial]))
+        for column in distinct_columns:
+            distincts[column].append(chunk.select(list(group_by) + [column]).group_by(list(group_by) + [column]).aggregate([]))
+
+    merged = pa.concat_tables(partials)
+    result = _group_aggregate(merged, group_by, [(c, f) for c, f, _ in combine], [n for _, _, n in combine])
+    for column in distinct_columns:
+        values = pa.concat_tables(distincts[column])
+        counts = _group_aggregate(values.group_by(list(group_by) + [column]).aggregate([]), group_by,
+                                  [(column, "count")], [f"_distinct_{column}"])
+        result = result.join(counts, keys=list(group_by)) if group_by else \
+            result.append_column(f"_distinct_{column}", counts.column(0))
+
+    output = result.select(list(group_by))
+    for i, agg in enumerate(aggregates):
+        if agg["function"] == "mean":
+            values = pc.divide(pc.cast(result[f"_{i}_sum"], pa.float64()), result[f"_{i}_count"])
+        elif agg["function"] == "count_distinct":
+            values = result[f"_distinct_{agg['column']}"]
+        else:
+            values = result[f"_{i}"]
+        output = output.append_column(agg["as"], values)
+    return output
+
+
+def _validate_spec(spec):
+    sources = spec.get("sources")
+    if not isinstance(sources, list) or not sources or not all(isinstance(s, dict) for s in sources):
+        raise FederationError("sources must be a non-empty list of objects")
+    if len(sources) > FEDERATION_MAX_SOURCES:
+        raise FederationError(f"a federated query can have at most {FEDERATION_MAX_SOURCES} sources")
+    aliases = [s.get("alias") for s in sources]
+    if not all(isinstance(a, str) and a and "." not in a for a in aliases) or len(set(aliases)) != len(aliases):
+        raise FederationError("every source needs a unique alias without '.'")
+
+    joins = spec.get("joins") or []
+    joined = {aliases[0]}
+    for join in joins:
+        if join.get("with") not in aliases or join["with"] in joined:
+            raise FederationError(f"join 'with' must name a source not joined yet: {join.get('with')}")
+        if join.get("type", "inner") not in JOIN_TYPES:
+            raise FederationError(f"join type must be one of {', '.join(JOIN_TYPES)}")
+        on = join.get("on")
+        if not isinstance(on, list) or not on or not all(isinstance(p, list) and len(p) == 2 for p in on):
+            raise FederationError('join "on" must be a list of [left_column, right_column] pairs')
+        joined.add(join["with"])
+    if len(sources) > 1 and joined != set(aliases):
+        raise FederationError("every source after the first must be joined")
+
+    for agg in spec.get("aggregates") or []:
+        if agg.get("function") not in AGGREGATE_FUNCTIONS:
+            raise FederationError(f"aggregate function must be one of {', '.join(sorted(AGGREGATE_FUNCTIONS))}")
+        if not agg.get("column"):
+            raise FederationError("aggregate needs a column")
+        agg.setdefault("as", f"{agg['column']}_{agg['function']}")
+    return sources, joins
+
+
+def run_federated(spec, resolve_credentials, memory_limit=FEDERATION_MEMORY_LIMIT):
+    """
+    Execute a federated query spec; returns (pyarrow.Table, stats).
+
+    spec: {"sources": [{"alias", "category", "productType", "query", "params", "rows_path"}],
+           "joins": [{"with": alias, "on": [[left_col, right_col]], "type": "inner|left|right|outer"}],
+           "group_by": [...], "aggregates": [{"column", "function", "as"}],
+           "columns": [...], "order_by": [{"column", "descending"}], "limit": n}
+    Columns are referred to as "<alias>.<column>"; aggregate outputs by their "as" name.
+    resolve_credentials(category, productType) -> credential row or None
+    """
+    sources, joins = _validate_spec(spec)
+
+    prepared = []
+    for source in sources:
+        category, product_type = source.get("category"), str(source.get("productType") or "")
+        connector = get_connector(category, product_type) if category else None
+        if not connector:
+            raise FederationError(f"Unsupported productType: {category}/{product_type}")
+        required = REQUIRED_ARGS.get(category)
+        if required and not item_args(source).get(required):
+            raise FederationError(f"source '{source['alias']}': {required} parameter is required")
+        started = time.perf_counter()
+        creds_entry = resolve_credentials(category, product_type)
+        observe_phase(category, product_type, "credentials", time.perf_counter() - started)
+        if not creds_entry:
+            raise FederationError(f"source '{source['alias']}': Invalid productType")
+        prepared.append((source, connector, creds_entry["credentials"]))
+
+    app = current_app._get_current_object()
+    with tempfile.TemporaryDirectory(prefix="unified-federation-", dir=FEDERATION_SPILL_DIR) as spill_dir:
+        budget = memory_limit // max(len(prepared), 1)
+        futures = [_executor.submit(_load_source, app, source, connector, creds, budget, spill_dir)
+                   for source, connector, creds in prepared]
+        # Let every source finish before a failure unwinds the spill directory
+        wait(futures)
+        sides = dict(future.result() for future in futures)
+
+        stats = {"sources": {alias: {"rows": side.num_rows, "spilled": side.spilled} for alias, side in sides.items()},
+                 "joins": []}
+
+        current = sides[sources[0]["alias"]]
+        for i, join in enumerate(joins):
+            left_keys = [pair[0] for pair in join["on"]]
+            right_keys = [pair[1] for pair in join["on"]]
+            current, partitions = hash_join(current, sides.pop(join["with"]), left_keys, right_keys,
+                                            join.get("type", "inner"), memory_limit, spill_dir, f"join{i}")
+            stats["joins"].append({"with": join["with"], "partitions": partitions, "rows": current.num_rows})
+
+        if spec.get("aggregates") or spec.get("group_by"):
+            table = aggregate(current, spec.get("group_by") or [], spec.get("aggregates") or [])
+        else:
+            table = _read_limited(current, spec.get("limit") if not spec.get("order_by") else None)
+
+    if spec.get("columns"):
+        missing = [c for c in spec["columns"] if c not in table.column_names]
+        if missing:
+            raise FederationError(f"unknown column(s): {', '.join(missing)}")
+        table = table.select(spec["columns"])
+    if spec.get("order_by"):
+        table = table.sort_by([(o["column"], "descending" if o.get("descending") else "ascending")
+                               for o in spec["order_by"]])
+    if spec.get("limit") is not None:
+        table = table.slice(0, int(spec["limit"]))
+    stats["rows"] = table.num_rows
+    return table, stats
+
+
+def _read_limited(side, limit):
+    """Materialise a Side, reading only the first `limit` rows of a spilled one."""
+    import pyarrow as pa
+    if limit is None or not side.spilled:
+        return side.read()
+    batches, rows = [], 0
+    for batch in side.batches():
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= int(limit):
+            break
+    return pa.Table.from_batches(batches, schema=side.schema)
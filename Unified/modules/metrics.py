@@ -0,0 +1,291 @@
+"""
+Per-connector metrics in the Prometheus text exposition format.
+
+Each /query request runs inside a connector_scope(category, productType).
+The time it spends is split into phases:
+    credentials  credential row lookup
+    connect      borrowing/opening a pooled connection or cached driver client
+    execute      the upstream call itself (connector time not spent in connect/fetch)
+    fetch        reading rows from a DB-API cursor
+    serialize    encoding the response (JSON, NDJSON, Arrow, Parquet)
+Phases are recorded into histograms labelled by (category, product_type, phase)
+when the scope finishes; streaming responses finish when the stream ends.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds; upstream calls range from sub-millisecond cache hits to multi-minute warehouse scans
+LATENCY_BUCKETS = tuple(float(b) for b in os.getenv(
+    "UNIFIED_METRICS_BUCKETS", "0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120"
+).split(","))
+
+PHASES = ("credentials", "connect", "execute", "fetch", "serialize")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+PHASE_SECONDS = Histogram(
+    "unified_connector_phase_seconds", "Time spent per request phase",
+    ("category", "product_type", "phase")
+)
+REQUEST_SECONDS = Histogram(
+    "unified_connector_request_seconds", "Total time per connector request",
+    ("category", "product_type")
+)
+REQUESTS = Counter(
+    "unified_connector_requests_total", "Connector requests by outcome",
+    ("category", "product_type", "status")
+)
+ROWS = Counter(
+    "unified_connector_rows_total", "Rows returned by connectors",
+    ("category", "product_type")
+)
+RESPONSE_BYTES = Counter(
+    "unified_connector_response_bytes_total", "Serialized response bytes",
+    ("category", "product_type")
+)
+REGISTRY = (PHASE_SECONDS, REQUEST_SECONDS, REQUESTS, ROWS, RESPONSE_BYTES)
+
+
+class Scope:
+    """Phase timings of one connector request; recorded once by finish()."""
+
+    def __init__(self, category, product_type):
+        self.labels = (category, str(product_type).lower())
+        self.phases = {}
+        self.rows = 0
+        self.bytes = 0
+        self.status = "success"
+        self.deferred = False
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def add(self, phase_name, seconds):
+        self.phases[phase_name] = self.phases.get(phase_name, 0.0) + seconds
+
+    def finish(self, status=None):
+        if self._finished:
+            return
+        self._finished = True
+        status = status or self.status
+        phases = dict(self.phases)
+        # "connector" is the whole run_connector call; what connect/fetch don't cover is execute
+        connector = phases.pop("connector", None)
+        if connector is not None:
+            phases["execute"] = max(0.0, connector - phases.get("connect", 0.0) - phases.get("fetch", 0.0))
+        for phase_name, seconds in phases.items():
+            PHASE_SECONDS.observe(self.labels + (phase_name,), seconds)
+        REQUEST_SECONDS.observe(self.labels, time.perf_counter() - self._started)
+        REQUESTS.inc(self.labels + (status,))
+        if self.rows:
+            ROWS.inc(self.labels, self.rows)
+        if self.bytes:
+            RESPONSE_BYTES.inc(self.labels, self.bytes)
+
+
+_current = ContextVar("unified_metrics_scope", default=None)
+
+
+def current_scope():
+    return _current.get()
+
+
+@contextmanager
+def connector_scope(category, product_type):
+    """
+    Collect phase timings for the enclosed connector request.
+    The scope is finished on exit unless it was deferred to a streaming response.
+    """
+    scope = Scope(category, product_type)
+    token = _current.set(scope)
+    try:
+        yield scope
+    except Exception:
+        scope.finish("error")
+        raise
+    finally:
+        _current.reset(token)
+        if not scope.deferred:
+            scope.finish()
+
+
+@contextmanager
+def resumed(scope):
+    """Make scope current again, e.g. while a streaming response pulls its next row."""
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """Add the enclosed block's wall time to `name` in the current scope (no-op outside one)."""
+    scope = _current.get()
+    if scope is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        scope.add(name, time.perf_counter() - started)
+
+
+def mark_error():
+    """Record the current request as failed (e.g. the connector returned an error dict)."""
+    scope = _current.get()
+    if scope is not None:
+        scope.status = "error"
+
+
+def record_response(scope, result, response):
+    """Rows, bytes and outcome of a finished (non-streamed) connector response."""
+    is_error = isinstance(result, dict) and (result.get("status") == "error" or "error" in result)
+    if response.status_code >= 400 or is_error:
+        scope.status = "error"
+    if isinstance(result, list):
+        scope.rows += len(result)
+    elif hasattr(result, "num_rows"):  # pyarrow.Table
+        scope.rows += result.num_rows
+    if not response.is_streamed:
+        scope.bytes += response.content_length or 0
+
+
+def observe_phase(category, product_type, phase_name, seconds):
+    """Record a phase that ran outside any request scope (e.g. a batch's shared credential lookup)."""
+    PHASE_SECONDS.observe((category, str(product_type).lower(), phase_name), seconds)
+
+
+_FETCH_METHODS = {"fetchone", "fetchmany", "fetchall", "fetch_arrow_all", "fetchall_arrow"}
+
+
+class TimedCursor:
+    """DB-API cursor proxy that adds time spent in fetch* calls to the "fetch" phase."""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if name not in _FETCH_METHODS:
+            return attribute
+
+        def timed(*args, **kwargs):
+            with phase("fetch"):
+                return attribute(*args, **kwargs)
+        return timed
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+
+class TimedConnection:
+    """DB-API connection proxy whose cursors are TimedCursors."""
+
+    def __init__(self, connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs))
+
+
+def exposition():
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
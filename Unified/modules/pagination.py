@@ -0,0 +1,72 @@
+import base64
+import hashlib
+import json
+import os
+from modules.result_cache import normalize_query
+from modules.sql_validator import analyze_sql
+
+# Largest page a client may ask for with ?page_size=
+MAX_PAGE_SIZE = int(os.getenv("UNIFIED_MAX_PAGE_SIZE", 10000))
+
+
+class CursorError(ValueError):
+    """Malformed cursor token, or one issued for a different query."""
+
+
+def _query_hash(query):
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query, offset):
+    """Opaque token for the page starting at offset; bound to the (normalised) query."""
+    payload = json.dumps({"q": _query_hash(query), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, query):
+    """Offset stored in a token from encode_cursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        offset = int(payload["o"])
+        query_hash = payload["q"]
+    except (ValueError, TypeError, KeyError):
+        raise CursorError("Invalid cursor")
+    if query_hash != _query_hash(query) or offset < 0:
+        raise CursorError("cursor does not belong to this query")
+    return offset
+
+
+def paginate_sql(query, limit, offset, dialect="sql"):
+    """
+    Wrap a SELECT so the engine only returns `limit` rows starting at `offset`.
+
+    dialect: "sql" (LIMIT/OFFSET: PostgreSQL, MySQL, Snowflake, Databricks)
+             or "oracle" (OFFSET ... FETCH NEXT, 12c+)
+    Results are only stable across pages if the query has an ORDER BY.
+    """
+    analysis = analyze_sql(query)
+    if analysis.error:
+        # Left for the connector's validator to reject
+        inner = query.strip().rstrip(";").strip()
+    else:
+        inner = analysis.statement
+        # Never read past the caller's own LIMIT; on the last page this also
+        # drops the extra look-ahead row, so no next cursor is issued
+        if analysis.limit is not None:
+            limit = max(0, min(limit, analysis.limit - offset))
+    # Newlines keep a trailing "-- comment" in the caller's query from eating the wrapper
+    if dialect == "oracle":
+        return f"SELECT * FROM (\n{inner}\n) OFFSET {int(offset)} ROWS FETCH NEXT {int(limit)} ROWS ONLY"
+    return f"SELECT * FROM (\n{inner}\n) unified_page LIMIT {int(limit)} OFFSET {int(offset)}"
+
+
+def split_page(result, page_size):
+    """
+    Trim a result fetched with page_size + 1 rows.
+    Returns (page, has_more); error results are passed through unchanged.
+    """
+    if isinstance(result, list):
+        return result[:page_size], len(result) > page_size
+    if hasattr(result, "num_rows"):  # pyarrow.Table
+        return result.slice(0, page_size), result.num_rows > page_size
+    return result, False
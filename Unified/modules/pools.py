@@ -0,0 +1,354 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from modules.metrics import TimedConnection, current_scope, phase
+
+# Pool sizing can be tuned per deployment without touching code
+POOL_MAX_SIZE = int(os.getenv("UNIFIED_POOL_MAX_SIZE", 5))
+POOL_IDLE_TIMEOUT = float(os.getenv("UNIFIED_POOL_IDLE_TIMEOUT", 300))
+POOL_BORROW_TIMEOUT = float(os.getenv("UNIFIED_POOL_BORROW_TIMEOUT", 30))
+# Long-lived driver clients (MongoClient, neo4j Driver, ...) kept at most
+CLIENT_CACHE_SIZE = int(os.getenv("UNIFIED_CLIENT_CACHE_SIZE", 32))
+CLIENT_IDLE_TIMEOUT = float(os.getenv("UNIFIED_CLIENT_IDLE_TIMEOUT", POOL_IDLE_TIMEOUT))
+
+# A pool's endpoint is every credential field except its secrets. When a
+# credential row is updated (e.g. password rotation) the fingerprint changes
+# but the endpoint stays the same, so the previous pool for it is evicted.
+# Fields whose lower-cased name contains one of these are secrets.
+SECRET_FIELD_MARKERS = ("password", "passwd", "secret", "token", "key")
+
+
+def credential_fingerprint(creds):
+    """Stable hash of a credential dict, used as the pool key."""
+    payload = json.dumps(creds, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of DB-API connections for a single credential set.
+
+    connect: zero-argument callable returning a new driver connection
+    max_size: max connections checked out + idle at the same time
+    idle_timeout: seconds an idle connection is kept before being closed
+    ping: SQL used to health-check a connection when it is borrowed
+    """
+
+    def __init__(self, connect, max_size=POOL_MAX_SIZE, idle_timeout=POOL_IDLE_TIMEOUT, ping="SELECT 1"):
+        self._connect = connect
+        self._ping = ping
+        self.idle_timeout = idle_timeout
+        self._idle = deque()  # (conn, returned_at)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+        self.last_used = time.monotonic()
+
+    def _healthy(self, conn):
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute(self._ping)
+                cur.fetchall()
+            finally:
+                cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _take_idle(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, returned_at = self._idle.pop()
+            if now - returned_at > self.idle_timeout or not self._healthy(conn):
+                self._close_quietly(conn)
+                continue
+            return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless the block raised."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=POOL_BORROW_TIMEOUT):
+            raise TimeoutError("Timed out waiting for a pooled connection")
+        conn = None
+        try:
+            with phase("connect"):
+                conn = self._take_idle() or self._connect()
+            # Time cursor fetches when the request is being measured
+            yield TimedConnection(conn) if current_scope() is not None else conn
+        except Exception:
+            if conn is not None:
+                self._close_quietly(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._release(conn)
+            self.last_used = time.monotonic()
+            self._slots.release()
+
+    def _release(self, conn):
+        # Never hand out a connection with an open read transaction
+        try:
+            conn.rollback()
+        except Exception:
+            self._close_quietly(conn)
+            return
+        with self._lock:
+            if self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+
+    def reap(self):
+        """Close idle connections older than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            keep = deque(item for item in self._idle if item[1] >= cutoff)
+            expired = [conn for conn, returned_at in self._idle if returned_at < cutoff]
+            self._idle = keep
+        for conn in expired:
+            self._close_quietly(conn)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close_quietly(conn)
+
+
+_pools = {}       # fingerprint -> ConnectionPool
+_endpoints = {}   # (kind, endpoint identity) -> fingerprint
+_registry_lock = threading.Lock()
+
+
+def _without_password(value):
+    """Connection string with the password removed from its netloc."""
+    try:
+        parts = urlsplit(value)
+        if parts.password is None:
+            return value
+        netloc = parts.netloc.rpartition("@")[2]
+        if parts.username is not None:
+            netloc = f"{parts.username}@{netloc}"
+        return parts._replace(netloc=netloc).geturl()
+    except ValueError:
+        return value
+
+
+def _endpoint_key(kind, creds):
+    # Connection strings (e.g. Supabase's uri) carry the password in their netloc
+    endpoint = {
+        field: _without_password(value) if isinstance(value, str) else value
+        for field, value in creds.items()
+        if not any(marker in field.lower() for marker in SECRET_FIELD_MARKERS)
+    }
+    return credential_fingerprint({"kind": kind, **endpoint})
+
+
+def get_pool(kind, creds, connect, ping="SELECT 1"):
+    """
+    Return the pool for (kind, creds), creating it on first use.
+
+    kind: driver family, e.g. "postgresql", "mysql", "oracle"
+    creds: credential dict as stored in Db_connector_credentials (plus any
+           per-request overrides such as database/schema)
+    connect: zero-argument callable opening a new connection for these creds
+    """
+    fingerprint = credential_fingerprint({"kind": kind, **creds})
+    endpoint = _endpoint_key(kind, creds)
+    stale = []
+
+    with _registry_lock:
+        pool = _pools.get(fingerprint)
+        if pool is None:
+            pool = ConnectionPool(connect, ping=ping)
+            _pools[fingerprint] = pool
+
+        # Same endpoint, different credentials -> the stored row changed
+        previous = _endpoints.get(endpoint)
+        if previous and previous != fingerprint and previous in _pools:
+            stale.append(_pools.pop(previous))
+        _endpoints[endpoint] = fingerprint
+
+        # Drop whole pools nobody has used for a while
+        now = time.monotonic()
+        for key, other in list(_pools.items()):
+            if key != fingerprint and now - other.last_used > other.idle_timeout:
+                stale.append(_pools.pop(key))
+
+    for old in stale:
+        old.close()
+    pool.reap()
+    return pool
+
+
+def evict_pool(kind, creds):
+    """Close and forget the pool for a credential set (e.g. after it was deleted)."""
+    fingerprint = credential_fingerprint({"kind": kind, **creds})
+    with _registry_lock:
+        pool = _pools.pop(fingerprint, None)
+    if pool:
+        pool.close()
+
+
+def close_all_pools():
+    with _registry_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _endpoints.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
+
+
+def _close_client(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+class _CachedClient:
+    def __init__(self, client, endpoint):
+        self.client = client
+        self.endpoint = endpoint
+        self.leases = 0
+        self.evicted = False
+        self.last_used = time.monotonic()
+
+
+class ClientCache:
+    """
+    LRU of long-lived driver clients keyed by credential fingerprint.
+
+    MongoClient, neo4j drivers, Elasticsearch/OpenSearch, redis and InfluxDB
+    clients each manage their own connection pool, so they are built once per
+    credential set and reused. Evicted clients (LRU overflow, idle timeout or
+    changed credentials) are closed once no request is using them.
+    """
+
+    def __init__(self, max_size=CLIENT_CACHE_SIZE, idle_timeout=CLIENT_IDLE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._entries = OrderedDict()  # fingerprint -> _CachedClient
+        self._endpoints = {}           # (kind, endpoint identity) -> fingerprint
+        self._lock = threading.Lock()
+
+    def _evict(self, fingerprint):
+        """Drop an entry (lock held); returns the client if it can be closed now."""
+        entry = self._entries.pop(fingerprint)
+        entry.evicted = True
+        if self._endpoints.get(entry.endpoint) == fingerprint:
+            del self._endpoints[entry.endpoint]
+        return entry.client if entry.leases == 0 else None
+
+    def _acquire(self, kind, creds, create):
+        fingerprint = credential_fingerprint({"kind": kind, **creds})
+        endpoint = _endpoint_key(kind, creds)
+        closable = []
+
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                # These client constructors connect lazily, so building under the lock is cheap
+                entry = _CachedClient(create(), endpoint)
+                self._entries[fingerprint] = entry
+            self._entries.move_to_end(fingerprint)
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+
+            # Same endpoint, different credentials -> the stored row changed
+            previous = self._endpoints.get(endpoint)
+            if previous and previous != fingerprint and previous in self._entries:
+                closable.append(self._evict(previous))
+            self._endpoints[endpoint] = fingerprint
+
+            cutoff = time.monotonic() - self.idle_timeout
+            for key, other in list(self._entries.items()):
+                if key != fingerprint and (other.last_used < cutoff or len(self._entries) > self.max_size):
+                    closable.append(self._evict(key))
+
+        for client in closable:
+            if client is not None:
+                _close_client(client)
+        return entry
+
+    def _release(self, entry):
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            close = entry.evicted and entry.leases == 0
+        if close:
+            _close_client(entry.client)
+
+    @contextmanager
+    def client(self, kind, creds, create):
+        """
+        Borrow the shared client for (kind, creds), creating it with create() on first use.
+
+        kind: driver family, e.g. "mongodb", "neo4j", "redis"
+        creds: credential dict as stored for the product
+        create: zero-argument callable building a new client for these creds
+        """
+        with phase("connect"):
+            entry = self._acquire(kind, creds, create)
+        try:
+            yield entry.client
+        finally:
+            self._release(entry)
+
+    def evict(self, kind, creds):
+        fingerprint = credential_fingerprint({"kind": kind, **creds})
+        with self._lock:
+            client = self._evict(fingerprint) if fingerprint in self._entries else None
+        if client is not None:
+            _close_client(client)
+
+    def close(self):
+        with self._lock:
+            closable = [self._evict(key) for key in list(self._entries)]
+        for client in closable:
+            if client is not None:
+                _close_client(client)
+
+
+_clients = ClientCache()
+
+
+def client_for(kind, creds, create):
+    """Context manager lending the cached client for (kind, creds); see ClientCache.client."""
+    return _clients.client(kind, creds, create)
+
+
+def evict_client(kind, creds):
+    """Close and forget the cached client for a credential set."""
+    _clients.evict(kind, creds)
+
+
+def close_all_clients():
+    _clients.close()
+
+
+atexit.register(close_all_clients)
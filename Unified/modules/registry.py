@@ -0,0 +1,236 @@
+"""
+Connector registry for the /query/<category>/<productType> routes.
+
+Each (category, productType) maps to a Connector: the module and function
+that fetch the data, a parser that turns request args into the fetcher's
+arguments, and what output modes it supports. Connector modules are only
+imported the first time one of their products is used.
+
+Parsers take any mapping of args (request.args, a batch item, ...) plus the
+product's credentials and return (args, kwargs) for the fetcher. They raise
+ParamError for bad input, which the routes report as HTTP 400.
+"""
+import importlib
+import json
+from collections import namedtuple
+from modules.pagination import paginate_sql
+
+# stream: supports output="stream" (?stream=ndjson)
+# columnar: supports output="arrow" (?format=arrow|parquet)
+# paging: how ?page_size= is pushed down: "sql", "oracle", "mongodb" or None (unsupported)
+# cacheable: cacheable(args) -> True when the request only reads, so the result cache may replay it
+Connector = namedtuple(
+    "Connector", ["module", "function", "parse", "stream", "columnar", "paging", "cacheable"],
+    defaults=(None, lambda args: True)
+)
+
+
+class ParamError(ValueError):
+    """Invalid request parameter for a connector."""
+
+
+def _json_arg(args, name, default, message):
+    value = args.get(name, default)
+    if not isinstance(value, str):
+        # Already decoded, e.g. an object in a JSON batch item
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        raise ParamError(message)
+
+
+def _params(args):
+    return _json_arg(args, "params", "{}", "params must be a valid JSON string")
+
+
+# Required parameter per category, checked before credentials are looked up
+REQUIRED_ARGS = {
+    "db": "query",
+    "ss": "query",
+    "doi": "query",
+    "ecom": "endpoint",
+}
+
+
+# --- Databases ---
+
+def _parse_query(args, creds):
+    return [args.get("query")], {}
+
+
+def _parse_mongodb(args, creds):
+    return [args.get("query"), args.get("collection"), args.get("database")], {}
+
+
+def _parse_snowflake(args, creds):
+    return [args.get("query"), args.get("database"), args.get("schema")], {}
+
+
+def _parse_airtable(args, creds):
+    return [args.get("table"), args.get("query")], {}
+
+
+def _parse_oracle23(args, creds):
+    return [args.get("query")], {"version": 23}
+
+
+# --- Spreadsheets ---
+
+def _parse_googlesheet(args, creds):
+    return [args.get("query", "SELECT *")], {}
+
+
+# --- DevOps & IoT ---
+
+def _parse_loki(args, creds):
+    # query is a LogQL string
+    return [args.get("query"), args.get("minutes", 5)], {}
+
+
+def _parse_redis(args, creds):
+    # query is a Redis command, e.g., "LRANGE logs 0 10"
+    return [args.get("query"), args.get("args", "")], {}
+
+
+def _parse_elasticsearch(args, creds):
+    index = args.get("index", creds.get("default_index", "_all"))
+    return [args.get("query"), index], {}
+
+
+def _parse_opensearch(args, creds):
+    # query param should be JSON DSL
+    return [json.loads(args.get("query")), args.get("index", "_all")], {}
+
+
+# --- E-commerce ---
+
+def _parse_ecom(args, creds):
+    return [args.get("endpoint"), _params(args)], {}
+
+
+def _parse_wix(args, creds):
+    return [args.get("endpoint"), _params(args), args.get("scope")], {}
+
+
+# --- Applications ---
+
+def _parse_zoho(args, creds):
+    return [args.get("app_type", "crm"), args.get("endpoint"), _params(args)], {}
+
+
+def _parse_freshworks(args, creds):
+    return [args.get("app_type", "freshdesk"), args.get("endpoint"), _params(args), args.get("method")], {}
+
+
+def _parse_odoo(args, creds):
+    message = "args/kwargs must be valid JSON"
+    call_args = _json_arg(args, "args", "[]", message)
+    call_kwargs = _json_arg(args, "kwargs", "{}", message)
+    return [args.get("model"), args.get("method"), call_args, call_kwargs], {}
+
+
+def _parse_servicenow(args, creds):
+    return [args.get("endpoint"), _params(args)], {}
+
+
+def _parse_sap(args, creds):
+    return [args.get("producttype"), args.get("subproducttype"), args.get("field"), args.get("filters")], {}
+
+
+def _parse_hubspot(args, creds):
+    return [args.get("app_type", "contacts"), args.get("endpoint"), _params(args)], {}
+
+
+def _parse_erpnext(args, creds):
+    return [args.get("endpoint"), _params(args), args.get("method", "GET")], {}
+
+
+# --- Result cache eligibility (writes must always reach the upstream) ---
+
+_ODOO_READ_METHODS = {
+    "search", "search_read", "search_count", "read", "read_group",
+    "fields_get", "name_search", "name_get", "default_get", "check_access_rights",
+}
+
+
+def _odoo_reads(args):
+    return args.get("method") in _ODOO_READ_METHODS
+
+
+def _freshworks_reads(args):
+    # Same default as fetch_from_freshworks: tickets*/query* endpoints are POSTed
+    endpoint = (args.get("endpoint") or "").lower()
+    default = "POST" if endpoint.startswith(("tickets", "query")) else "GET"
+    return (args.get("method") or default).upper() == "GET"
+
+
+def _erpnext_reads(args):
+    return (args.get("method") or "GET").upper() == "GET"
+
+
+_DB = "modules.databases"
+_SS = "modules.spreadsheet"
+_DOI = "modules.devops_and_iot"
+_ECOM = "modules.ecommerce"
+_APP = "modules.applications"
+
+CONNECTORS = {
+    ("db", "databricks"): Connector(_DB, "fetch_from_databricks", _parse_query, True, True, "sql"),
+    ("db", "postgresql"): Connector(_DB, "fetch_from_postgresql", _parse_query, True, True, "sql"),
+    ("db", "supabase"): Connector(_DB, "fetch_from_supabase", _parse_query, True, True, "sql"),
+    ("db", "mysql"): Connector(_DB, "fetch_from_mysql", _parse_query, True, True, "sql"),
+    ("db", "mongodb"): Connector(_DB, "fetch_from_mongodb", _parse_mongodb, False, False, "mongodb"),
+    ("db", "snowflake"): Connector(_DB, "fetch_from_snowflake", _parse_snowflake, True, True, "sql"),
+    ("db", "airtable"): Connector(_DB, "fetch_from_airtable", _parse_airtable, True, False),
+    ("db", "neo4j"): Connector(_DB, "fetch_from_neo4j", _parse_query, False, False),
+    ("db", "oracle19"): Connector(_DB, "fetch_from_oracle", _parse_query, True, True, "oracle"),
+    ("db", "oracle23"): Connector(_DB, "fetch_from_oracle", _parse_oracle23, True, True, "oracle"),
+
+    ("ss", "googlesheet"): Connector(_SS, "fetch_from_googlesheet", _parse_googlesheet, False, False),
+
+    ("doi", "clickhouse"): Connector(_DOI, "fetch_from_clickhouse", _parse_query, False, True),
+    ("doi", "tempo"): Connector(_DOI, "fetch_from_tempo", _parse_query, False, False),
+    ("doi", "loki"): Connector(_DOI, "fetch_from_loki", _parse_loki, False, False),
+    ("doi", "prometheus"): Connector(_DOI, "fetch_from_prometheus", _parse_query, False, False),
+    ("doi", "influxdb"): Connector(_DOI, "fetch_from_influxdb", _parse_query, False, False),
+    ("doi", "timescaledb"): Connector(_DOI, "fetch_from_timescaledb", _parse_query, False, True),
+    ("doi", "redis"): Connector(_DOI, "fetch_from_redis", _parse_redis, False, False),
+    ("doi", "elasticsearch"): Connector(_DOI, "fetch_from_elasticsearch", _parse_elasticsearch, False, False),
+    ("doi", "opensearch"): Connector(_DOI, "fetch_from_opensearch", _parse_opensearch, False, False),
+
+    ("ecom", "zoho"): Connector(_ECOM, "fetch_from_zoho_crm", _parse_ecom, False, False),
+    ("ecom", "wix"): Connector(_ECOM, "fetch_from_wix", _parse_wix, False, False),
+    ("ecom", "woocommerce"): Connector(_ECOM, "fetch_from_woocommerce", _parse_ecom, False, False),
+    ("ecom", "shopify"): Connector(_ECOM, "fetch_from_shopify", _parse_ecom, False, False),
+
+    ("app", "zoho"): Connector(_APP, "fetch_from_zoho", _parse_zoho, False, False),
+    ("app", "freshworks"): Connector(_APP, "fetch_from_freshworks", _parse_freshworks, False, False, cacheable=_freshworks_reads),
+    ("app", "odoo"): Connector(_APP, "fetch_from_odoo", _parse_odoo, False, False, cacheable=_odoo_reads),
+    ("app", "servicenow"): Connector(_APP, "fetch_from_servicenow", _parse_servicenow, False, False),
+    ("app", "sap"): Connector(_APP, "fetch_from_sap", _parse_sap, False, False),
+    ("app", "hubspot"): Connector(_APP, "fetch_from_hubspot", _parse_hubspot, False, False),
+    ("app", "erpnext"): Connector(_APP, "fetch_from_erpnext", _parse_erpnext, False, False, cacheable=_erpnext_reads),
+}
+
+
+def get_connector(category, product_type):
+    """Connector for (category, productType), or None if unsupported."""
+    return CONNECTORS.get((category, product_type.lower()))
+
+
+def run_connector(connector, creds, args, output="rows", page=None):
+    """
+    Parse args for the connector and call its fetcher (importing its module on first use).
+
+    page: optional (limit, offset) pushed down to the engine per connector.paging
+    """
+    if page and connector.paging in ("sql", "oracle"):
+        args = {**args, "query": paginate_sql(args.get("query"), *page, dialect=connector.paging)}
+    call_args, call_kwargs = connector.parse(args, creds)
+    if page and connector.paging == "mongodb":
+        call_kwargs.update(limit=page[0], skip=page[1])
+    if output != "rows":
+        call_kwargs["output"] = output
+    fetch = getattr(importlib.import_module(connector.module), connector.function)
+    return fetch(creds, *call_args, **call_kwargs)
@@ -0,0 +1,204 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, request
+from modules.sql_validator import normalize_whitespace
+
+# Memory tier budget and optional on-disk tier (path to a sqlite file)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("UNIFIED_RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+RESULT_CACHE_DISK_PATH = os.getenv("UNIFIED_RESULT_CACHE_DISK")
+# TTL used when a product's stored metadata has no "cache_ttl" (0 = don't cache)
+RESULT_CACHE_DEFAULT_TTL = float(os.getenv("UNIFIED_RESULT_CACHE_TTL", 0))
+
+# Args that never change the result
+IGNORED_ARGS = {"query", "userid"}
+# Response headers that carry part of the result and are replayed on hits
+CACHED_HEADERS = ("X-Next-Cursor",)
+
+
+class MemoryTier:
+    """LRU of cached responses bounded by total body size in bytes."""
+
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, stored_at, mimetype, body, headers)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry[3])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry[3])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class SqliteTier:
+    """Persistent second tier; survives restarts and is shared by worker processes on one host."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                stored_at REAL NOT NULL,
+                mimetype TEXT NOT NULL,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL DEFAULT '{}'
+            )
+        """)
+        # Cache files written before headers were stored
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(result_cache)")]
+        if "headers" not in columns:
+            self._conn.execute("ALTER TABLE result_cache ADD COLUMN headers TEXT NOT NULL DEFAULT '{}'")
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, stored_at, mimetype, body, headers FROM result_cache WHERE key=? AND expires_at>?",
+                (key, time.time())
+            ).fetchone()
+        return (row[0], row[1], row[2], bytes(row[3]), json.loads(row[4])) if row else None
+
+    def set(self, key, entry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, expires_at, stored_at, mimetype, body, headers) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *entry[:4], json.dumps(entry[4]))
+            )
+            self._conn.execute("DELETE FROM result_cache WHERE expires_at<=?", (time.time(),))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+
+
+class ResultCache:
+    """Memory tier in front of an optional disk tier; disk hits are promoted to memory."""
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry:
+                for upper in self.tiers[:i]:
+                    upper.set(key, entry)
+                return entry
+        return None
+
+    def set(self, key, mimetype, body, ttl, headers=None):
+        now = time.time()
+        entry = (now + ttl, now, mimetype, body, headers or {})
+        for tier in self.tiers:
+            tier.set(key, entry)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+
+result_cache = ResultCache([MemoryTier()] + ([SqliteTier(RESULT_CACHE_DISK_PATH)] if RESULT_CACHE_DISK_PATH else []))
+
+
+def normalize_query(query):
+    """
+    Collapse whitespace outside string literals and drop trailing semicolons,
+    so trivially different spellings share an entry.
+    """
+    return normalize_whitespace((query or "").strip()).rstrip(";").strip()
+
+
+def cache_key(category, product_type, identity, query, params):
+    payload = json.dumps([category, product_type.lower(), identity, normalize_query(query), sorted(params)], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_error_body(mimetype, body):
+    # Fetchers report failures as {"status": "error", ...} with HTTP 200
+    if mimetype != "application/json" or not body.lstrip().startswith(b"{") or len(body) > 65536:
+        return False
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return True
+    return data.get("status") == "error" or "error" in data
+
+
+def cached_query(category, cache_policy):
+    """
+    Decorator for /query/<category>/<productType> views.
+
+    cache_policy(productType, args) -> (ttl, identity): seconds to keep a
+    successful response (0 disables caching for the request) and an identity
+    of the credentials it runs with, which is part of the key. Streaming
+    requests bypass the cache; "Cache-Control: no-cache" forces a refresh.
+    Responses carry X-Cache: HIT|MISS and, on hits, Age.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(productType):
+            if request.args.get("stream"):
+                return view(productType)
+
+            ttl, identity = cache_policy(productType, request.args)
+            if not ttl or ttl <= 0:
+                return view(productType)
+
+            params = [(k, v) for k, v in request.args.items(multi=True) if k not in IGNORED_ARGS]
+            key = cache_key(category, productType, [request.args.get("userid"), identity], request.args.get("query"), params)
+
+            if "no-cache" not in request.headers.get("Cache-Control", ""):
+                hit = result_cache.get(key)
+                if hit:
+                    expires_at, stored_at, mimetype, body, headers = hit
+                    response = Response(body, mimetype=mimetype, headers=headers)
+                    response.headers["X-Cache"] = "HIT"
+                    response.headers["Age"] = str(int(time.time() - stored_at))
+                    return response
+
+            response = current_app.make_response(view(productType))
+            if response.status_code == 200 and not response.is_streamed:
+                body = response.get_data()
+                if not _is_error_body(response.mimetype, body):
+                    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                    result_cache.set(key, response.mimetype, body, ttl, headers)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
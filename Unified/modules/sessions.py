@@ -0,0 +1,92 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Keep-alive pool settings shared by every REST connector
+HTTP_POOL_SIZE = int(os.getenv("UNIFIED_HTTP_POOL_SIZE", 20))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("UNIFIED_HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("UNIFIED_HTTP_READ_TIMEOUT", 60))
+HTTP_RETRIES = int(os.getenv("UNIFIED_HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(os.getenv("UNIFIED_HTTP_BACKOFF", 0.3))
+
+_sessions = {}  # "scheme://host:port" -> requests.Session
+_sessions_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default (connect, read) timeout when the caller gives none."""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _new_session():
+    # Retries cover connection errors and 429/5xx on idempotent methods only
+    # (urllib3's default allowed_methods), honouring Retry-After.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        pool_connections=1,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    # Sessions are shared across tenants, so never carry cookies between requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def connector_timeout(env_name, read=HTTP_READ_TIMEOUT):
+    """
+    (connect, read) timeout for a connector whose read limit differs from
+    HTTP_READ_TIMEOUT, overridable through env_name. A read of None, or an
+    env value of 0 or "none", means no read limit.
+    """
+    value = os.getenv(env_name)
+    if value is not None:
+        value = value.strip().lower()
+        read = None if value in ("", "0", "none") else float(value)
+    return (HTTP_CONNECT_TIMEOUT, read)
+
+
+def session_for(url):
+    """
+    Return the shared keep-alive session for url's host, creating it on first use.
+    Every connector talking to the same host reuses the same TCP/TLS connections.
+    """
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}".lower()
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _new_session()
+                _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,82 @@
+import functools
+import threading
+from flask import Response, current_app, request
+from modules.result_cache import cache_key, IGNORED_ARGS
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent calls: while fn is running for a key, other
+    callers with the same key wait for it and get the same result (or error).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True for callers that waited on another's call."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+inflight = SingleFlight()
+
+
+def coalesced(category):
+    """
+    Decorator for /query/<category>/<productType> views: identical concurrent
+    requests run the upstream query once and all receive its response.
+    Requests are identical when they share the result cache key (productType,
+    userid, normalised query and remaining args). Followers get X-Coalesced: 1.
+    Streaming requests are not coalesced.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(productType):
+            if request.args.get("stream"):
+                return view(productType)
+
+            params = [(k, v) for k, v in request.args.items(multi=True) if k not in IGNORED_ARGS]
+            key = cache_key(category, productType, request.args.get("userid"), request.args.get("query"), params)
+
+            def run():
+                # Materialise the response so every waiter can build its own copy
+                response = current_app.make_response(view(productType))
+                return response.status_code, list(response.headers.items()), response.get_data()
+
+            (status, headers, body), shared = inflight.do(key, run)
+            response = Response(body, status=status, headers=headers)
+            if shared:
+                response.headers["X-Coalesced"] = "1"
+            return response
+        return wrapper
+    return decorator
@@ -1,4 +1,4 @@
-import requests
+from modules.sessions import session_for
 import json
 import urllib.parse
 
@@ -21,7 +21,7 @@ def fetch_from_googlesheet(creds, query):
         encoded_query = urllib.parse.quote(query) # URL-encode the query string
         url = base_url + encoded_query
 
-        response = requests.get(url)
+        response = session_for(url).get(url)
         response.raise_for_status()
 
         # Google Sheets "gviz" API wraps JSON inside JS function call
@@ -0,0 +1,258 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Words that make a statement write or change something. Matched as whole
+# tokens, so columns like "last_update" or quoted "delete" are fine.
+FORBIDDEN_KEYWORDS = {
+    "insert", "update", "delete", "drop", "alter", "truncate", "create", "grant", "revoke",
+    "merge", "into"
+}
+
+# Keywords that end a FROM item, i.e. are never a table alias
+_CLAUSE_KEYWORDS = {
+    "where", "group", "order", "having", "limit", "offset", "fetch", "union", "intersect", "except",
+    "join", "inner", "left", "right", "full", "outer", "cross", "natural", "on", "using", "window",
+    "qualify", "sample", "tablesample", "for", "format", "settings", "final", "prewhere", "start", "connect"
+}
+
+_TOKEN_PATTERN = r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>{string})
+  | (?P<dollar>{dollar})
+  | (?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`)
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+  | (?P<word>[A-Za-z_][\w$#]*)
+  | (?P<param>[:@]\w+|\$\d+|%\(\w+\)s|%s|\?)
+  | (?P<punct>.)
+"""
+# Two readings of string literals: standard/PostgreSQL ('' escapes, $tag$ quoting) and
+# MySQL (backslash escapes, no dollar quoting). A query containing \ or $ must be valid
+# under both, so a crafted \' or $$ can't hide a second statement from one of them.
+_TOKENIZERS = (
+    re.compile(_TOKEN_PATTERN.format(string=r"'(?:[^']|'')*'", dollar=r"\$(?P<tag>[A-Za-z_]\w*|)\$.*?\$(?P=tag)\$"), re.S | re.X),
+    re.compile(_TOKEN_PATTERN.format(string=r"'(?:[^'\\]|\\.|'')*'", dollar=r"(?!)"), re.S | re.X),
+)
+
+Token = namedtuple("Token", ["kind", "value", "text", "start", "end"])
+
+# error: message or None; statement: query without trailing ";"/comments;
+# tables: tables referenced in FROM/JOIN (CTE names excluded); limit: top-level LIMIT/FETCH/TOP or None
+SqlAnalysis = namedtuple("SqlAnalysis", ["error", "statement", "tables", "limit"])
+
+
+class _SqlError(ValueError):
+    pass
+
+
+def tokenize(query, tokenizer=_TOKENIZERS[0]):
+    """Significant tokens of a SQL string (whitespace and comments dropped)."""
+    tokens = []
+    for match in tokenizer.finditer(query):
+        kind = match.lastgroup if match.lastgroup != "tag" else "dollar"
+        if kind in ("ws", "comment"):
+            continue
+        text = match.group()
+        if kind == "punct" and (text in "'\"`" or query.startswith("/*", match.start())):
+            raise _SqlError("Unterminated string, identifier or comment")
+        value = text.lower() if kind == "word" else text
+        tokens.append(Token(kind, value, text, match.start(), match.end()))
+    return tokens
+
+
+def normalize_whitespace(query):
+    """
+    query with each run of whitespace outside literals, quoted identifiers and
+    comments collapsed to one space (a newline after a line comment). Queries
+    containing a backslash, whose literal boundaries depend on the dialect, are
+    returned unchanged.
+    """
+    if "\\" in query:
+        return query
+    parts = []
+    for match in _TOKENIZERS[0].finditer(query):
+        if match.lastgroup != "ws":
+            parts.append(match.group())
+        elif parts and parts[-1].startswith("--"):
+            parts.append("\n")
+        else:
+            parts.append(" ")
+    return "".join(parts)
+
+
+def _identifier(token):
+    if token.kind == "quoted":
+        return token.text[1:-1]
+    return token.text
+
+
+def _read_name(tokens, i):
+    """Dotted (possibly quoted) name starting at i; returns (name or None, next index)."""
+    parts = []
+    while i < len(tokens) and tokens[i].kind in ("word", "quoted"):
+        parts.append(_identifier(tokens[i]))
+        if i + 1 < len(tokens) and tokens[i + 1].value == ".":
+            i += 2
+        else:
+            i += 1
+            break
+    return (".".join(parts) if parts else None), i
+
+
+def _skip_group(tokens, i):
+    """Index just past the parenthesised group opening at i."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j].value == "(":
+            depth += 1
+        elif tokens[j].value == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(tokens)
+
+
+def _read_from_items(tokens, i, tables, many):
+    """Collect table names after FROM (comma-separated items) or JOIN (one item)."""
+    while i < len(tokens):
+        while i < len(tokens) and tokens[i].value in ("only", "lateral"):
+            i += 1
+        if i >= len(tokens):
+            return
+        if tokens[i].value == "(":
+            # Subquery; its own FROM is picked up by the main scan
+            i = _skip_group(tokens, i)
+        else:
+            name, i = _read_name(tokens, i)
+            if name is None:
+                return
+            if i < len(tokens) and tokens[i].value == "(":
+                # Table function, e.g. generate_series(...)
+                i = _skip_group(tokens, i)
+            else:
+                tables.append(name)
+
+        # Optional alias
+        if i < len(tokens) and tokens[i].value == "as":
+            i += 2
+        elif i < len(tokens) and tokens[i].kind in ("word", "quoted") and tokens[i].value not in _CLAUSE_KEYWORDS:
+            i += 1
+
+        if not many or i >= len(tokens) or tokens[i].value != ",":
+            return
+        i += 1
+
+
+def _cte_names(tokens):
+    """Names defined as `name AS (` or `name (cols) AS (`."""
+    names = set()
+    for i, token in enumerate(tokens[:-2]):
+        if token.kind not in ("word", "quoted"):
+            continue
+        j = i + 1
+        if tokens[j].value == "(" and i > 0 and tokens[i - 1].value in ("with", "recursive", ","):
+            j = _skip_group(tokens, j)
+        if j + 1 < len(tokens) and tokens[j].value == "as" and tokens[j + 1].value == "(":
+            names.add(_identifier(token).lower())
+    return names
+
+
+def _top_level_limit(tokens):
+    depth = 0
+    for i, token in enumerate(tokens):
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+        elif depth == 0 and token.kind == "word":
+            rest = tokens[i + 1:i + 4]
+            if token.value == "limit" and rest and rest[0].kind == "number":
+                # MySQL "LIMIT offset, count"
+                if len(rest) >= 3 and rest[1].value == "," and rest[2].kind == "number":
+                    return int(float(rest[2].text))
+                return int(float(rest[0].text))
+            if token.value == "fetch" and len(rest) >= 2 and rest[0].value in ("first", "next") and rest[1].kind == "number":
+                return int(float(rest[1].text))
+            if token.value == "top" and rest and rest[0].kind == "number":
+                return int(float(rest[0].text))
+    return None
+
+
+def _analyze_tokens(query, tokens):
+    if not tokens:
+        raise _SqlError("Query must be provided")
+
+    first = next((token for token in tokens if token.value != "("), tokens[0])
+    if first.value not in ("select", "with"):
+        raise _SqlError("Only SELECT queries are allowed")
+
+    if any(token.kind == "word" and token.value in FORBIDDEN_KEYWORDS for token in tokens):
+        raise _SqlError("Forbidden keyword detected")
+
+    # Trailing semicolons are fine; anything after one is a second statement
+    end = len(tokens)
+    while end and tokens[end - 1].value == ";":
+        end -= 1
+    tokens = tokens[:end]
+    if any(token.value == ";" for token in tokens):
+        raise _SqlError("Only a single statement is allowed")
+
+    if not any(token.value == "from" for token in tokens if token.kind == "word"):
+        raise _SqlError("Invalid query (missing FROM clause)")
+
+    # FROM inside EXTRACT(... FROM x) / SUBSTRING(... FROM n) is not a table reference,
+    # so only FROMs at the top level or directly inside a subquery count.
+    tables = []
+    subquery_stack = []
+    for i, token in enumerate(tokens):
+        if token.value == "(":
+            subquery_stack.append(i + 1 < len(tokens) and tokens[i + 1].value in ("select", "with"))
+        elif token.value == ")":
+            if subquery_stack:
+                subquery_stack.pop()
+        elif token.value in ("from", "join") and token.kind == "word" and (not subquery_stack or subquery_stack[-1]):
+            _read_from_items(tokens, i + 1, tables, many=token.value == "from")
+
+    ctes = _cte_names(tokens)
+    seen = set()
+    tables = [t for t in tables if t.lower() not in ctes and not (t in seen or seen.add(t))]
+
+    return SqlAnalysis(None, query[:tokens[-1].end], tuple(tables), _top_level_limit(tokens))
+
+
+@lru_cache(maxsize=2048)
+def analyze_sql(query):
+    """
+    Tokenize and check a SQL query once; results are cached by query text.
+    Returns SqlAnalysis(error, statement, tables, limit).
+    """
+    result = None
+    for tokenizer in _TOKENIZERS if "\\" in query or "$" in query else _TOKENIZERS[:1]:
+        try:
+            analysis = _analyze_tokens(query, tokenize(query, tokenizer))
+        except _SqlError as e:
+            return SqlAnalysis(str(e), None, (), None)
+        result = result or analysis
+    return result
+
+
+def validate_sql_query(query: str, engine: str = "generic"):
+    """
+    Validate a SQL query to ensure safety (read-only, single statement).
+
+    Args:
+        query (str): The SQL query string
+        engine (str): Name of the engine (used for error messages/logging)
+
+    Returns:
+        dict: {"valid": True, "query": statement, "tables": [...], "limit": int or None}
+              or {"valid": False, "error": "..."}
+    """
+    if not isinstance(query, str) or not query.strip():
+        return {"valid": False, "error": f"{engine}: Query must be provided"}
+
+    analysis = analyze_sql(query)
+    if analysis.error:
+        return {"valid": False, "error": f"{engine}: {analysis.error}"}
+    return {"valid": True, "query": analysis.statement, "tables": list(analysis.tables), "limit": analysis.limit}
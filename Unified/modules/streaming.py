@@ -0,0 +1,115 @@
+import itertools
+import json
+import os
+import types
+from flask import Response
+from modules.metrics import current_scope, phase, resumed
+
+# Rows pulled from the driver per fetchmany() call when streaming
+STREAM_BATCH_SIZE = int(os.getenv("UNIFIED_STREAM_BATCH_SIZE", 1000))
+
+
+def iter_cursor(cursor, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield rows of an executed cursor as dicts, batch_size rows at a time,
+    so only one batch is held in memory.
+    """
+    columns = None
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        # Server-side cursors only know their description after the first fetch
+        if columns is None:
+            columns = [col[0] for col in cursor.description]
+        for row in batch:
+            yield dict(zip(columns, row))
+
+
+def stream_rows(connection, query, engine, open_cursor=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Generator that runs query and yields rows until the result is exhausted.
+
+    connection: zero-argument callable returning a context manager that yields
+                a DB-API connection (e.g. a pool's connection() method)
+    open_cursor: optional callable(conn) -> cursor, for server-side cursors
+    Errors are yielded as a final {"status": "error"} row, since the HTTP
+    status has already been sent once streaming starts. Errors while the
+    generator is being closed (client went away) are logged and re-raised,
+    because a closing generator must not yield.
+    """
+    closing = False
+    try:
+        with connection() as conn:
+            cur = open_cursor(conn) if open_cursor else conn.cursor()
+            try:
+                if hasattr(cur, "arraysize"):
+                    cur.arraysize = batch_size
+                cur.execute(query)
+                yield from iter_cursor(cur, batch_size)
+            except GeneratorExit:
+                closing = True
+                raise
+            finally:
+                cur.close()
+    except Exception as e:
+        if closing:
+            print(f"[!] {engine} stream cleanup failed after the client disconnected: {e}")
+            raise
+        yield {"status": "error", "message": f"{engine} stream failed: {str(e)}"}
+
+
+def _row_batches(rows, batch_size=STREAM_BATCH_SIZE):
+    """Lists of up to batch_size rows from a row generator."""
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _is_error_row(row):
+    return isinstance(row, dict) and row.get("status") == "error" and len(row) == 2
+
+
+def ndjson_response(result):
+    """
+    Wrap a row generator in a chunked application/x-ndjson response, one
+    write of up to STREAM_BATCH_SIZE lines at a time.
+    Anything else (e.g. a validation error dict) is returned unchanged.
+    """
+    if not isinstance(result, types.GeneratorType):
+        return result
+
+    scope = current_scope()
+    if scope is None:
+        def generate():
+            for batch in _row_batches(result):
+                yield "".join(json.dumps(row, default=str) + "\n" for row in batch)
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    # Rows are produced after the view returns, so the request's metrics scope
+    # is resumed for each batch and finished when the stream ends
+    scope.deferred = True
+
+    def generate_measured():
+        batches = _row_batches(result)
+        try:
+            while True:
+                with resumed(scope), phase("connector"):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                errors = sum(1 for row in batch if _is_error_row(row))
+                if errors:
+                    scope.status = "error"
+                scope.rows += len(batch) - errors
+                with resumed(scope), phase("serialize"):
+                    chunk = "".join(json.dumps(row, default=str) + "\n" for row in batch).encode("utf-8")
+                scope.bytes += len(chunk)
+                yield chunk
+        finally:
+            scope.finish()
+
+    return Response(generate_measured(), mimetype="application/x-ndjson")
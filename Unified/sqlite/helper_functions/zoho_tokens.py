@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+import requests
+
+ZOHO_ACCOUNTS_URL = os.getenv("ZOHO_ACCOUNTS_URL", "https://accounts.zoho.in")
+# Refresh this many seconds before Zoho's expires_in to avoid using a token that dies mid-request
+ZOHO_TOKEN_EXPIRY_MARGIN = int(os.getenv("ZOHO_TOKEN_EXPIRY_MARGIN", 120))
+
+
+class ZohoTokenManager:
+    """
+    Caches Zoho OAuth access tokens per (client_id, refresh_token).
+
+    A cached token is reused until shortly before it expires. Refreshes are
+    single-flight per key: concurrent requests wait for the one refresh in
+    progress instead of each hitting the token endpoint (Zoho rate-limits it).
+    Expired tokens are dropped, with their refresh locks, on the next refresh.
+    """
+
+    def __init__(self, accounts_url=ZOHO_ACCOUNTS_URL, margin=ZOHO_TOKEN_EXPIRY_MARGIN):
+        self.token_url = f"{accounts_url.rstrip('/')}/oauth/v2/token"
+        self.margin = margin
+        self._tokens = {}   # key -> (access_token, expires_at)
+        self._locks = {}    # key -> refresh lock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(creds):
+        return (creds["client_id"], creds["refresh_token"])
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _cached(self, key):
+        entry = self._tokens.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def _store(self, key, access_token, expires_in):
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, entry in self._tokens.items() if entry[1] <= now and k != key]:
+                self._evict(stale)
+            self._tokens[key] = (access_token, now + max(int(expires_in) - self.margin, 0))
+
+    def _evict(self, key):
+        # Caller holds self._lock; a lock a refresh is still using stays until then
+        self._tokens.pop(key, None)
+        lock = self._locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._locks[key]
+
+    def invalidate(self, creds):
+        with self._lock:
+            self._evict(self._key(creds))
+
+    def get_token(self, creds, post=None, force_refresh=False):
+        """
+        Return a valid access token for creds, refreshing it if needed.
+
+        creds: dict with client_id, client_secret, refresh_token
+        post: optional callable with the requests.post signature (e.g. a pooled session's post)
+        force_refresh: ignore the cached token (used after a 401)
+        """
+        key = self._key(creds)
+        stale = self._tokens.get(key) if force_refresh else None
+
+        if not force_refresh:
+            token = self._cached(key)
+            if token:
+                return token
+
+        with self._key_lock(key):
+            # Another thread may have refreshed while we waited
+            entry = self._tokens.get(key)
+            if entry and entry != stale and entry[1] > time.monotonic():
+                return entry[0]
+
+            response = (post or requests.post)(self.token_url, data={
+                "grant_type": "refresh_token",
+                "client_id": creds["client_id"],
+                "client_secret": creds["client_secret"],
+                "refresh_token": creds["refresh_token"]
+            })
+            response.raise_for_status()
+            tokens = response.json()
+            if "access_token" not in tokens:
+                raise ValueError(f"Zoho token refresh failed: {tokens.get('error', tokens)}")
+
+            self._store(key, tokens["access_token"], tokens.get("expires_in", 3600))
+            return tokens["access_token"]
+
+    def call(self, creds, send, post=None):
+        """
+        Run send(access_token) -> requests.Response, retrying once with a
+        fresh token if Zoho answers 401 (token revoked or expired early).
+        """
+        response = send(self.get_token(creds, post=post))
+        if response.status_code == 401:
+            response = send(self.get_token(creds, post=post, force_refresh=True))
+        return response
+
+
+# Shared by the Unified Zoho fetchers within one gateway process
+zoho_tokens = ZohoTokenManager()
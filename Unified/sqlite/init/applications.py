@@ -79,7 +79,8 @@ APP_METADATA = {
         "required_parameters": ["credentials", "endpoint", "params"],
         "query_type": "REST API",
         "example_query": "/api/now/table/incident",
-        "method": "GET"
+        "method": "GET",
+        "cache_ttl": 30
     },
     "sap": {
         "description": "SAP S/4HANA API access.",
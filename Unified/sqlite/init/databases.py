@@ -80,7 +80,8 @@ PRODUCT_METADATA = {
         "example_query": "SELECT * FROM sales LIMIT 10",
         "endpoint": "/api/2.0/sql/statements",
         "method": "POST",
-        "headers": {"Authorization": "Bearer <TOKEN>"}
+        "headers": {"Authorization": "Bearer <TOKEN>"},
+        "cache_ttl": 60
     },
     "postgresql": {
         "description": "PostgreSQL database connection using psycopg2.",
@@ -117,7 +118,8 @@ PRODUCT_METADATA = {
         "required_credentials": ["user", "password", "account", "warehouse", "database", "schema", "table"],
         "required_parameters": ["credentials", "query"],
         "query_type": "SQL",
-        "example_query": "SELECT * FROM products LIMIT 10"
+        "example_query": "SELECT * FROM products LIMIT 10",
+        "cache_ttl": 60
     },
     "airtable": {
         "description": "Airtable API for accessing tables.",
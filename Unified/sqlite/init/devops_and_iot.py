@@ -68,7 +68,8 @@ PRODUCT_METADATA_DOI = {
         "required_parameters": ["credentials", "query"],
         "query_type": "SQL",
         "example_query": "SELECT * FROM system.tables LIMIT 10",
-        "notes": "Base URL should include protocol and port (e.g., https://host:8443/). POST query with 'FORMAT JSON' for structured results."
+        "notes": "Base URL should include protocol and port (e.g., https://host:8443/). POST query with 'FORMAT JSON' for structured results.",
+        "cache_ttl": 30
     },
     "tempo": {
         "description": "Grafana Tempo trace backend via HTTP API.",
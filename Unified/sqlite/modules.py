@@ -1,5 +1,38 @@
 import sqlite3
 import json
+import os
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# In-process cache of parsed credential rows
+CREDENTIAL_CACHE_TTL = float(os.getenv("CREDENTIAL_CACHE_TTL", 60))
+CREDENTIAL_CACHE_SIZE = int(os.getenv("CREDENTIAL_CACHE_SIZE", 1024))
+
+_cache = OrderedDict()      # (db_name, table, userid, uuid, name) -> (expires_at, rows)
+_cache_lock = threading.Lock()
+_version_conns = {}         # db_name -> long-lived connection used to read PRAGMA data_version
+_data_versions = {}         # db_name -> last data_version seen
+
+def _check_data_version(db_name):
+    """Drop cached rows for db_name if another connection/process committed a write."""
+    conn = _version_conns.get(db_name)
+    if conn is None:
+        conn = sqlite3.connect(db_name, check_same_thread=False)
+        _version_conns[db_name] = conn
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if _data_versions.get(db_name) != version:
+        _data_versions[db_name] = version
+        for key in [k for k in _cache if k[0] == db_name]:
+            del _cache[key]
+
+def invalidate_credential_cache(db_name=None, table=None):
+    """Forget cached rows, optionally only those of one db/table."""
+    with _cache_lock:
+        for key in list(_cache):
+            if (db_name is None or key[0] == db_name) and (table is None or key[1] == table):
+                del _cache[key]
 
 def create_table(db_name, table):
     conn = sqlite3.connect(db_name)
@@ -14,15 +47,55 @@ def create_table(db_name, table):
             metadata TEXT
         );
     """)
+    _create_indexes(cursor, table)
     conn.commit()
     conn.close()
 
+def _create_indexes(cursor, table):
+    """
+    (userid, name) and (name) serve per-request product lookups with and
+    without a userid; unique (userid, uuid, name) backs the ON CONFLICT upsert.
+    Tables created before the unique index existed may hold duplicate rows. The
+    index is then left out (and False returned) until dedupe_credentials is run.
+    """
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_lookup ON {table} (userid, name COLLATE NOCASE)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_name ON {table} (name COLLATE NOCASE)")
+    try:
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_identity ON {table} (userid, uuid, name)")
+    except sqlite3.IntegrityError:
+        print(f"[!] {table} has duplicate (userid, uuid, name) rows; run dedupe_credentials to add its unique index")
+        return False
+    return True
+
+def dedupe_credentials(db_name, table):
+    """
+    One-off migration for tables created before the unique index: deletes all
+    but the newest row of each (userid, uuid, name), logging every removed row,
+    then adds the indexes. Returns the number of rows removed.
+    """
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    stale = cursor.execute(f"""
+        SELECT rowid, userid, uuid, name FROM {table}
+        WHERE rowid NOT IN (SELECT MAX(rowid) FROM {table} GROUP BY userid, uuid, name)
+    """).fetchall()
+    for rowid, userid, uuid, name in stale:
+        print(f"[-] {table}: removing duplicate row {rowid} (userid={userid}, uuid={uuid}, name={name})")
+    cursor.executemany(f"DELETE FROM {table} WHERE rowid=?", [(row[0],) for row in stale])
+    _create_indexes(cursor, table)
+    conn.commit()
+    conn.close()
+    invalidate_credential_cache(db_name, table)
+    print(f"[✓] {table}: removed {len(stale)} duplicate row(s)")
+    return len(stale)
+
 def delete_table(db_name, table):
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
     cursor.execute(f"DROP TABLE IF EXISTS {table}")
     conn.commit()
     conn.close()
+    invalidate_credential_cache(db_name, table)
 
 def upsert_credential(db_name, table, userid, uuid, username, name, credentials, metadata=None):
     if metadata:
@@ -39,31 +112,67 @@ def upsert_credential(db_name, table, userid, uuid, username, name, credentials,
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
 
-    # Check if entry exists
-    cursor.execute(f"""
-        SELECT COUNT(*) FROM {table}
-        WHERE userid=? AND uuid=? AND name=?
-    """, (userid, uuid, name))
-
-    exists = cursor.fetchone()[0] > 0
-    credentials_json = json.dumps(credentials)
-
-    if exists:
-        cursor.execute(f"""
-            UPDATE {table}
-            SET username=?, credentials=?, metadata=?
-            WHERE userid=? AND uuid=? AND name=?
-        """, (username, credentials_json, metadata_json, userid, uuid, name))
-    else:
-        cursor.execute(f"""
-            INSERT INTO {table} (userid, uuid, username, name, credentials, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (userid, uuid, username, name, credentials_json, metadata_json))
+    # Insert, or update the existing (userid, uuid, name) row in one statement
+    upsert = f"""
+        INSERT INTO {table} (userid, uuid, username, name, credentials, metadata)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (userid, uuid, name) DO UPDATE SET
+            username=excluded.username,
+            credentials=excluded.credentials,
+            metadata=excluded.metadata
+    """
+    values = (userid, uuid, username, name, json.dumps(credentials), metadata_json)
+    try:
+        cursor.execute(upsert, values)
+    except sqlite3.OperationalError:
+        # Table created before the unique index existed
+        if _create_indexes(cursor, table):
+            cursor.execute(upsert, values)
+        else:
+            # Duplicates still present: update them all, as before the index
+            cursor.execute(f"""
+                UPDATE {table}
+                SET username=?, credentials=?, metadata=?
+                WHERE userid=? AND uuid=? AND name=?
+            """, (username, values[4], metadata_json, userid, uuid, name))
+            if cursor.rowcount == 0:
+                cursor.execute(f"""
+                    INSERT INTO {table} (userid, uuid, username, name, credentials, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, values)
 
     conn.commit()
     conn.close()
-
-def get_credentials(db_name, table, userid=None, uuid=None, product_name=None):
+    invalidate_credential_cache(db_name, table)
+
+def get_credentials(db_name, table, userid=None, uuid=None, product_name=None, limit=None):
+    """
+    Cached front for _load_credentials. Parsed rows are kept for
+    CREDENTIAL_CACHE_TTL seconds (LRU, at most CREDENTIAL_CACHE_SIZE keys) and
+    dropped on upsert/delete or when PRAGMA data_version shows an outside write.
+    Callers get their own copy, so mutating the result never leaks into the cache.
+    """
+    key = (db_name, table, userid, uuid, product_name, limit)
+    now = time.monotonic()
+
+    with _cache_lock:
+        _check_data_version(db_name)
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            _cache.move_to_end(key)
+            return copy.deepcopy(hit[1])
+
+    rows = _load_credentials(db_name, table, userid, uuid, product_name, limit)
+
+    with _cache_lock:
+        _cache[key] = (now + CREDENTIAL_CACHE_TTL, rows)
+        _cache.move_to_end(key)
+        while len(_cache) > CREDENTIAL_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return copy.deepcopy(rows)
+
+def _load_credentials(db_name, table, userid=None, uuid=None, product_name=None, limit=None):
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
 
@@ -79,9 +188,14 @@ def get_credentials(db_name, table, userid=None, uuid=None, product_name=None):
         params.append(uuid)
 
     if product_name is not None:
-        query += " AND name=?"
+        # Product names are matched case-insensitively (served by idx_<table>_lookup / _name)
+        query += " AND name=? COLLATE NOCASE"
         params.append(product_name)
 
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+
     cursor.execute(query, tuple(params))
     rows = cursor.fetchall()
     conn.close()
@@ -120,4 +234,5 @@ def delete_credential(db_name, table, userid, uuid, name):
         WHERE userid=? AND uuid=? AND name=?
     """, (userid, uuid, name))
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+    invalidate_credential_cache(db_name, table)
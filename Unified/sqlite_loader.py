@@ -1,17 +1,28 @@
 from sqlite.modules import get_credentials
 DB_PATH = "./wwwsmart_credentials.db"
 
-def fetch_app_credentials(user_id=None, uuid=None):
-    return get_credentials(DB_PATH, "App_connector_credentials", userid=user_id, uuid=uuid)
+def fetch_app_credentials(user_id=None, uuid=None, product_name=None, limit=None):
+    return get_credentials(DB_PATH, "App_connector_credentials", userid=user_id, uuid=uuid, product_name=product_name, limit=limit)
 
-def fetch_db_credentials(user_id=None, uuid=None):
-    return get_credentials(DB_PATH, "Db_connector_credentials", userid=user_id, uuid=uuid)
+def fetch_db_credentials(user_id=None, uuid=None, product_name=None, limit=None):
+    return get_credentials(DB_PATH, "Db_connector_credentials", userid=user_id, uuid=uuid, product_name=product_name, limit=limit)
 
-def fetch_ss_credentials(user_id=None, uuid=None):
-    return get_credentials(DB_PATH, "SS_connector_credentials", userid=user_id, uuid=uuid)
+def fetch_ss_credentials(user_id=None, uuid=None, product_name=None, limit=None):
+    return get_credentials(DB_PATH, "SS_connector_credentials", userid=user_id, uuid=uuid, product_name=product_name, limit=limit)
 
-def fetch_doi_credentials(user_id=None, uuid=None):
-    return get_credentials(DB_PATH, "DoI_connector_credentials", userid=user_id, uuid=uuid)
+def fetch_doi_credentials(user_id=None, uuid=None, product_name=None, limit=None):
+    return get_credentials(DB_PATH, "DoI_connector_credentials", userid=user_id, uuid=uuid, product_name=product_name, limit=limit)
 
-def fetch_ecom_credentials(user_id=None, uuid=None):
-    return get_credentials(DB_PATH, "Ecom_connector_credentials", userid=user_id, uuid=uuid)
\ No newline at end of file
+def fetch_ecom_credentials(user_id=None, uuid=None, product_name=None, limit=None):
+    return get_credentials(DB_PATH, "Ecom_connector_credentials", userid=user_id, uuid=uuid, product_name=product_name, limit=limit)
+
+def fetch_product_credentials(fetch_credentials, product_name, user_id=None):
+    """
+    Look up exactly one credential row for a product via one of the fetch_*_credentials above.
+    Returns None when there is no matching row.
+    """
+    try:
+        rows = fetch_credentials(user_id=user_id, product_name=product_name, limit=1)
+    except ValueError:
+        return None
+    return rows[0] if rows else None
@@ -0,0 +1,64 @@
+import pytest
+
+from modules.pagination import CursorError, decode_cursor, encode_cursor, paginate_sql, split_page
+
+QUERY = "SELECT a FROM t ORDER BY a"
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(QUERY, 40), QUERY) == 40
+
+
+def test_cursor_survives_whitespace_and_trailing_semicolon():
+    token = encode_cursor(QUERY, 10)
+    assert decode_cursor(token, "SELECT  a\nFROM t ORDER BY a ;") == 10
+
+
+def test_cursor_rejects_other_query():
+    token = encode_cursor(QUERY, 10)
+    with pytest.raises(CursorError):
+        decode_cursor(token, "SELECT b FROM t ORDER BY b")
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "e30", encode_cursor(QUERY, -1)])
+def test_cursor_rejects_malformed_tokens(token):
+    with pytest.raises(CursorError):
+        decode_cursor(token, QUERY)
+
+
+def test_paginate_sql_wraps_query():
+    assert paginate_sql(QUERY, 11, 20) == (
+        "SELECT * FROM (\nSELECT a FROM t ORDER BY a\n) unified_page LIMIT 11 OFFSET 20"
+    )
+
+
+def test_paginate_sql_oracle_uses_offset_fetch():
+    assert paginate_sql(QUERY, 11, 30, dialect="oracle") == (
+        "SELECT * FROM (\nSELECT a FROM t ORDER BY a\n) OFFSET 30 ROWS FETCH NEXT 11 ROWS ONLY"
+    )
+
+
+def test_paginate_sql_strips_semicolon_and_keeps_comment_inside():
+    sql = paginate_sql("SELECT a FROM t ORDER BY a; -- newest first", 5, 0)
+    assert sql == "SELECT * FROM (\nSELECT a FROM t ORDER BY a\n) unified_page LIMIT 5 OFFSET 0"
+
+
+@pytest.mark.parametrize("offset, expected", [(0, 11), (10, 10), (15, 5), (20, 0), (30, 0)])
+def test_paginate_sql_never_reads_past_caller_limit(offset, expected):
+    sql = paginate_sql("SELECT a FROM t ORDER BY a LIMIT 20", 11, offset)
+    assert sql.endswith(f"LIMIT {expected} OFFSET {offset}")
+
+
+def test_paginate_sql_caller_limit_applies_to_oracle():
+    sql = paginate_sql("SELECT a FROM t ORDER BY a LIMIT 20", 11, 15, dialect="oracle")
+    assert sql.endswith("OFFSET 15 ROWS FETCH NEXT 5 ROWS ONLY")
+
+
+def test_split_page_reports_look_ahead_row():
+    assert split_page([1, 2, 3], 2) == ([1, 2], True)
+    assert split_page([1, 2], 2) == ([1, 2], False)
+
+
+def test_split_page_passes_errors_through():
+    error = {"status": "error", "message": "boom"}
+    assert split_page(error, 2) == (error, False)
@@ -0,0 +1,31 @@
+from modules.result_cache import cache_key, normalize_query
+
+
+def test_normalize_query_collapses_whitespace_and_trailing_semicolon():
+    assert normalize_query("  SELECT  a\n\tFROM t ;") == "SELECT a FROM t"
+
+
+def test_normalize_query_keeps_whitespace_inside_literals():
+    assert normalize_query("SELECT 'a  b'  FROM t") == "SELECT 'a  b' FROM t"
+
+
+def test_normalize_query_keeps_line_break_after_comment():
+    assert normalize_query("SELECT a -- note\n   FROM t") == "SELECT a -- note\nFROM t"
+
+
+def test_normalize_query_leaves_backslash_queries_alone():
+    query = "SELECT 'a\\'  b' FROM t"
+    assert normalize_query(query) == query
+
+
+def test_cache_key_ignores_formatting_product_case_and_arg_order():
+    key = cache_key("db", "PostgreSQL", "u1", "SELECT a FROM t", [("b", "1"), ("a", "2")])
+    assert key == cache_key("db", "postgresql", "u1", "SELECT  a\nFROM t;", [("a", "2"), ("b", "1")])
+
+
+def test_cache_key_separates_identities_literals_and_args():
+    key = cache_key("db", "postgresql", "u1", "SELECT 'a b' FROM t", [])
+    assert key != cache_key("db", "postgresql", "u2", "SELECT 'a b' FROM t", [])
+    assert key != cache_key("db", "postgresql", "u1", "SELECT 'a  b' FROM t", [])
+    assert key != cache_key("db", "postgresql", "u1", "SELECT 'a b' FROM t", [("page_size", "10")])
+    assert key != cache_key("doi", "postgresql", "u1", "SELECT 'a b' FROM t", [])
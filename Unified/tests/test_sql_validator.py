@@ -0,0 +1,71 @@
+import pytest
+
+from modules.sql_validator import analyze_sql, validate_sql_query
+
+
+def test_simple_select():
+    analysis = analyze_sql("SELECT a FROM s.t1, t2")
+    assert analysis.error is None
+    assert analysis.statement == "SELECT a FROM s.t1, t2"
+    assert analysis.tables == ("s.t1", "t2")
+    assert analysis.limit is None
+
+
+def test_cte_names_are_not_tables():
+    analysis = analyze_sql("WITH x AS (SELECT * FROM t) SELECT * FROM x JOIN u ON x.id = u.id")
+    assert analysis.error is None
+    assert analysis.tables == ("t", "u")
+
+
+def test_cte_cannot_hide_a_write():
+    assert analyze_sql("WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x").error
+
+
+def test_trailing_semicolon_and_comment_are_dropped():
+    analysis = analyze_sql("SELECT * FROM t; -- trailing")
+    assert analysis.error is None
+    assert analysis.statement == "SELECT * FROM t"
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT 1 FROM t; SELECT 2 FROM u",
+    "SELECT 1 FROM t; DROP TABLE t",
+])
+def test_stacked_statements_are_rejected(query):
+    assert analyze_sql(query).error
+
+
+def test_semicolon_inside_literal_is_not_a_statement_break():
+    assert analyze_sql("SELECT 'a;b' FROM t").error is None
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM t FOR UPDATE",
+    "SELECT * FROM t FOR  UPDATE NOWAIT",
+    "SELECT * INTO t2 FROM t",
+])
+def test_locking_and_writing_selects_are_rejected(query):
+    assert analyze_sql(query).error == "Forbidden keyword detected"
+
+
+def test_keywords_inside_literals_are_allowed():
+    assert analyze_sql("SELECT * FROM t WHERE note = 'for update; drop table t'").error is None
+
+
+@pytest.mark.parametrize("query", ["DELETE FROM t", "UPDATE t SET a = 1"])
+def test_only_select_is_allowed(query):
+    assert analyze_sql(query).error == "Only SELECT queries are allowed"
+
+
+def test_top_level_limit_ignores_subqueries():
+    assert analyze_sql("SELECT * FROM (SELECT * FROM t LIMIT 5) s LIMIT 3").limit == 3
+    assert analyze_sql("SELECT * FROM (SELECT * FROM t LIMIT 5) s").limit is None
+    assert analyze_sql("SELECT * FROM t LIMIT 10 OFFSET 5").limit == 10
+
+
+def test_validate_sql_query_reports_engine():
+    assert validate_sql_query("", engine="MySQL") == {"valid": False, "error": "MySQL: Query must be provided"}
+    assert validate_sql_query("DELETE FROM t", engine="MySQL")["error"].startswith("MySQL: ")
+    assert validate_sql_query("select * from t limit 10;") == {
+        "valid": True, "query": "select * from t limit 10", "tables": ["t"], "limit": 10,
+    }